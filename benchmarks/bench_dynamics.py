@@ -0,0 +1,106 @@
+"""Inverse dynamics, mass matrices, gravity and Coriolis torques along a UR5 trajectory.
+
+Compares one call per sample (the way InverseDynamicsTrajectory and InertiaMatrix used to
+run, with the model constants rebuilt on every call and one RNEA per mass matrix column)
+with the batched RNEA/CRBA passes of openur.kinematics.dynamics.Dynamics over the whole
+trajectory, and finishes with the torque feasibility check. The second part times
+Dynamics.simulate for one initial state and for a batch of Monte-Carlo initial states,
+against the explicit Euler loop that ForwardDynamicsTrajectory used to run with hstack.
+
+Usage:
+    python benchmarks/bench_dynamics.py [--samples 5000] [--steps 500] [--batch 100]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from openur.kinematics.dynamics import UR5_TORQUE_LIMITS, Dynamics, ur5_parameters  # noqa: E402
+from openur.kinematics.manipulation import JointTrajectoryBatch  # noqa: E402
+
+
+def best_time(function, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def per_sample_inverse_dynamics(q, qd, qdd):
+    params = ur5_parameters()
+    return np.array([Dynamics(*params).inverse_dynamics(*state) for state in zip(q, qd, qdd)])
+
+
+def per_sample_mass_matrix(q):
+    params = ur5_parameters()
+    out = np.empty((len(q), 6, 6))
+    for k, x in enumerate(q):
+        dyn = Dynamics(*params)
+        for i, column in enumerate(np.eye(6)):
+            out[k, :, i] = dyn.inverse_dynamics(x, None, column, g=np.zeros(3))
+    return out
+
+
+def legacy_simulation(dyn, q0, qd0, tau, dt):
+    q, qd = np.asarray(q0), np.asarray(qd0)
+    q_traj, qd_traj = q, qd
+    for torques in tau:
+        qdd = dyn.forward_dynamics(q, qd, torques)
+        q, qd = q + dt * qd, qd + dt * qdd
+        q_traj = np.hstack((q_traj, q))
+        qd_traj = np.hstack((qd_traj, qd))
+    return q_traj.reshape(len(tau) + 1, 6), qd_traj.reshape(len(tau) + 1, 6)
+
+
+def report(name, seconds, count):
+    print(f"{name:<40} N={count:>6}: {seconds * 1e3:10.2f} ms ({count / seconds:12,.0f} samples/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--samples', type=int, default=5000, help='trajectory samples')
+    parser.add_argument('--steps', type=int, default=500, help='simulation steps of 1 ms')
+    parser.add_argument('--batch', type=int, default=100, help='Monte-Carlo initial states')
+    args = parser.parse_args()
+
+    dyn = Dynamics.ur5()
+    q, qd, qdd = JointTrajectoryBatch(np.zeros(6), np.array([1.0, -1.2, 1.5, -0.8, 1.1, 2.0]), 2.0,
+                                      args.samples, 'quintic')
+    loop = min(args.samples, 500)
+    assert np.allclose(per_sample_inverse_dynamics(q[:10], qd[:10], qdd[:10]), dyn.inverse_dynamics(q[:10], qd[:10], qdd[:10]))
+    assert np.allclose(per_sample_mass_matrix(q[:10]), dyn.mass_matrix(q[:10]))
+
+    report("inverse dynamics, per sample", best_time(lambda: per_sample_inverse_dynamics(q[:loop], qd[:loop], qdd[:loop]), 1), loop)
+    report("inverse dynamics, batched RNEA", best_time(lambda: dyn.inverse_dynamics(q, qd, qdd)), args.samples)
+    report("mass matrix, RNEA per column", best_time(lambda: per_sample_mass_matrix(q[:loop]), 1), loop)
+    report("mass matrix, batched CRBA", best_time(lambda: dyn.mass_matrix(q)), args.samples)
+    report("gravity torques, batched", best_time(lambda: dyn.gravity(q)), args.samples)
+    report("Coriolis torques, batched", best_time(lambda: dyn.coriolis(q, qd)), args.samples)
+
+    tau = dyn.inverse_dynamics(q, qd, qdd)
+    feasible = dyn.within_torque_limits(tau, UR5_TORQUE_LIMITS)
+    print(f"torque feasible samples: {feasible.sum()}/{len(feasible)}, peak |tau| {np.abs(tau).max(axis=0).round(2)}")
+
+    dt = 1e-3
+    q0 = np.array([0.3, -0.5, 0.8, 0.1, 0.4, 0.2])
+    tau = np.zeros((args.steps, 6))
+    assert np.allclose(legacy_simulation(dyn, q0, np.zeros(6), tau[:10], dt)[0],
+                       dyn.simulate(q0, np.zeros(6), tau[:10], dt, 'euler')[0])
+    report("simulation steps, Euler with hstack", best_time(lambda: legacy_simulation(dyn, q0, np.zeros(6), tau, dt), 1),
+           args.steps)
+    for method in ('euler', 'semi_implicit', 'rk4'):
+        report(f"simulation steps, {method}", best_time(lambda: dyn.simulate(q0, np.zeros(6), tau, dt, method), 1),
+               args.steps)
+    starts = q0 + np.random.default_rng(0).normal(scale=0.05, size=(args.batch, 6))
+    seconds = best_time(lambda: dyn.simulate(starts, np.zeros_like(starts), tau, dt, 'rk4'), 1)
+    report(f"simulation steps, rk4, batch of {args.batch}", seconds, args.steps * args.batch)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""Inverse kinematics solutions per second.
+
+Times the vectorized closed-form solver in openur.kinematics.analytic_ik for 1, 1000 and
+10000 poses, and the Newton-Raphson solver kinematic.Invkine_manip on a few poses when
+its dependencies (ikpy, sympy, scipy) are installed. The last part replays a pick-and-place
+cycle through ik_cache.IKCache: cold solves, repeated targets and nearby targets seeded
+from cached neighbours.
+
+Usage:
+    python benchmarks/bench_ik.py
+"""
+import contextlib
+import io
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from openur.kinematics import analytic_ik, rotation  # noqa: E402
+from openur.kinematics.ik_cache import IKCache, solve_numerical  # noqa: E402
+
+ROBOT = 'ur10'
+
+
+def random_poses(count, seed=0):
+    rng = np.random.default_rng(seed)
+    q = rng.uniform(-np.pi, np.pi, (count, 6))
+    return q, analytic_ik.forward(q, ROBOT)
+
+
+def best_time(function, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_analytic():
+    for count in (1, 1000, 10000):
+        q, T = random_poses(count)
+        seconds = best_time(lambda: analytic_ik.inverse(T, ROBOT))
+        print(f"analytic inverse, all 8 solutions   N={count:>5}: {seconds * 1e3:9.3f} ms "
+              f"({count / seconds:12,.0f} poses/s)")
+        seconds = best_time(lambda: analytic_ik.closest_solution(T, q, ROBOT))
+        print(f"analytic closest solution           N={count:>5}: {seconds * 1e3:9.3f} ms "
+              f"({count / seconds:12,.0f} poses/s)")
+
+
+def bench_legacy(count=20):
+    try:
+        from openur.kinematics import kinematic
+    except ImportError as e:
+        print(f"legacy Invkine_manip skipped: {e}")
+        return
+    q, T = random_poses(count, seed=1)
+    poses = np.concatenate([T[:, :3, 3], rotation.matrix_to_axis_angle(T[:, :3, :3])], axis=1)
+    # Start next to the answer, the Newton-Raphson solver only converges locally.
+    guesses = q + 0.05
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for pose, guess in zip(poses, guesses):
+            kinematic.Invkine_manip(pose, guess, rob=ROBOT)
+    seconds = time.perf_counter() - start
+    print(f"legacy Invkine_manip, 1 solution    N={count:>5}: {seconds * 1e3:9.3f} ms "
+          f"({count / seconds:12,.0f} poses/s)")
+
+
+def bench_cache(count=20, cycles=5):
+    rng = np.random.default_rng(2)
+    q = np.array([0.2, -1.2, 1.4, -1.7, -1.5, 0.3]) + rng.normal(scale=0.3, size=(count, 6))
+    T = analytic_ik.forward(q, ROBOT)
+    poses = np.concatenate([T[:, :3, 3], rotation.matrix_to_axis_angle(T[:, :3, :3])], axis=1)
+    seed = q[0]
+    start = time.perf_counter()
+    for pose in poses:
+        solve_numerical(pose, seed, ROBOT)
+    seconds = time.perf_counter() - start
+    print(f"Newton-Raphson from a fixed seed    N={count:>5}: {seconds * 1e3:9.3f} ms "
+          f"({count / seconds:12,.0f} poses/s)")
+
+    cache = IKCache()
+    start = time.perf_counter()
+    for _ in range(cycles):
+        for pose in poses:
+            cache.solve(pose, seed, ROBOT)
+    seconds = time.perf_counter() - start
+    print(f"IKCache, {cycles} pick-and-place cycles  N={count * cycles:>5}: {seconds * 1e3:9.3f} ms "
+          f"({count * cycles / seconds:12,.0f} poses/s)")
+    nearby = poses + rng.normal(scale=0.005, size=poses.shape) * [1, 1, 1, 0, 0, 0]
+    start = time.perf_counter()
+    for pose in nearby:
+        cache.solve(pose, seed, ROBOT)
+    seconds = time.perf_counter() - start
+    print(f"IKCache, nearby targets             N={count:>5}: {seconds * 1e3:9.3f} ms "
+          f"({count / seconds:12,.0f} poses/s)")
+    print(cache.cache_info())
+
+
+def main():
+    bench_analytic()
+    bench_legacy()
+    bench_cache()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Import time of the openur packages, measured with ``python -X importtime``.
+
+Every module is imported in a fresh interpreter. The script reports the cumulative import
+time and fails (exit code 1) when an import pulls in one of the heavy optional
+dependencies (sympy, scipy, ikpy) or a module that should load lazily, so it can run as a
+regression check.
+
+Usage:
+    python benchmarks/bench_import_time.py [--repeat 5]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+MODULES = (
+    'openur.dashboard',
+    'openur.rtde_command',
+    'openur.urscript',
+    'openur.kinematics',
+    'openur.kinematics.analytic_ik',
+    'openur.kinematics.dynamics',
+    'openur.kinematics.forward_kinematics',
+    'openur.kinematics.ik_cache',
+    'openur.kinematics.kinematic',
+    'openur.kinematics.pose',
+    'openur.kinematics.rotation',
+)
+
+# Modules no import above may load.
+FORBIDDEN = ('sympy', 'scipy', 'ikpy', 'asyncio')
+
+
+def import_times(module):
+    """Run ``python -X importtime -c 'import module'`` and return {module name: cumulative us}."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr.strip().splitlines()[-1]}")
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help='imports per module, the fastest is reported')
+    args = parser.parse_args()
+
+    failures = []
+    for module in MODULES:
+        runs = [import_times(module) for _ in range(args.repeat)]
+        best = min(run[module] for run in runs)
+        loaded = sorted({name.split('.')[0] for name in runs[0]} & set(FORBIDDEN))
+        print(f"{module:<40} {best / 1000:8.1f} ms" + (f"   loads {', '.join(loaded)}" if loaded else ''))
+        if loaded:
+            failures.append(module)
+    if failures:
+        print(f"Heavy or lazy dependencies imported by: {', '.join(failures)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""Space and body Jacobians per second.
+
+Compares the O(n^2) FixedJacobian/BodyJacobian loops that openur.kinematics.manipulation
+replaced with the single-pass FixedJacobianBatch/BodyJacobianBatch, for one configuration
+and for 10000 configurations (one batched call; the legacy loop runs over the first 1000
+and is reported per configuration).
+
+Usage:
+    python benchmarks/bench_jacobian.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from openur.kinematics import manipulation  # noqa: E402
+from openur.kinematics.forward_kinematics import screw_axes  # noqa: E402
+from openur.kinematics.manipulation import (Adjoint, AdjointBatch, BodyJacobian, BodyJacobianBatch,  # noqa: E402
+                                            FixedJacobian, FixedJacobianBatch, MatrixExp6, TransInv)
+
+
+def legacy_fixed_jacobian(Slist, thetalist):
+    N = len(thetalist)
+    J = np.zeros((6, N))
+    Slist = np.asarray(Slist).T
+    J[:, 0] = Slist[:, 0]
+    for k in range(1, N):
+        c = MatrixExp6(Slist[:, 0] * thetalist[0])
+        for i in range(k - 1):
+            nex = MatrixExp6(Slist[:, i + 1] * thetalist[i + 1])
+            c = np.dot(c, nex)
+        J[:, k] = np.dot(Adjoint(c), Slist[:, k])
+    return J
+
+
+def legacy_body_jacobian(Blist, thetalist):
+    N = len(thetalist)
+    J = np.zeros((6, N))
+    Blist = np.asarray(Blist).T
+    J[:, N - 1] = Blist[:, N - 1]
+    for k in range(N - 1):
+        c = MatrixExp6(-Blist[:, k + 1] * thetalist[k + 1])
+        for i in range(k + 2, len(thetalist)):
+            nex = MatrixExp6(-Blist[:, i] * thetalist[i])
+            c = np.dot(nex, c)
+        J[:, k] = np.dot(Adjoint(c), Blist[:, k])
+    return J
+
+
+def best_time(function, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def report(name, seconds, count):
+    print(f"{name:<42} N={count:>5}: {seconds * 1e3:10.3f} ms ({count / seconds:12,.0f} configurations/s)")
+
+
+def main():
+    M, Slist = screw_axes('ur10')
+    Blist = np.array([np.dot(Adjoint(TransInv(M)), S) for S in Slist])
+    rng = np.random.default_rng(0)
+    q = rng.uniform(-np.pi, np.pi, 6)
+    batch = rng.uniform(-np.pi, np.pi, (10000, 6))
+    assert np.allclose(legacy_fixed_jacobian(Slist, q), FixedJacobian(Slist, q))
+    assert np.allclose(legacy_body_jacobian(Blist, q), BodyJacobian(Blist, q))
+
+    for name, legacy, batched, axes in (('space', legacy_fixed_jacobian, FixedJacobianBatch, Slist),
+                                        ('body', legacy_body_jacobian, BodyJacobianBatch, Blist)):
+        report(f"legacy {name} Jacobian", best_time(lambda: legacy(axes, q), 50), 1)
+        report(f"single-pass {name} Jacobian", best_time(lambda: batched(axes, q), 50), 1)
+        report(f"legacy {name} Jacobian, loop", best_time(lambda: [legacy(axes, x) for x in batch[:1000]], 1), 1000)
+        report(f"single-pass {name} Jacobian, batched", best_time(lambda: batched(axes, batch)), len(batch))
+
+    T = manipulation.MatrixExp6Batch(Slist, batch)[:, 2]
+    report("Adjoint, loop", best_time(lambda: [Adjoint(t) for t in T], 1), len(T))
+    report("AdjointBatch", best_time(lambda: AdjointBatch(T)), len(T))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Pose algebra and point transforms per second.
+
+Compares one call per pose through the 4x4 matrices of kinematic.Pose2Tran_Mat and
+Tran_Mat2Pose (the way UrScript.pose_add works) and Vektor_from_Base_to_TCP with the
+batched functions of openur.kinematics.pose on (N, 6) poses and (N, 3) point clouds.
+
+Usage:
+    python benchmarks/bench_pose.py [--count 20000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from openur.kinematics import pose  # noqa: E402
+from openur.kinematics.kinematic import Pose2Tran_Mat, Tran_Mat2Pose, Vektor_from_Base_to_TCP  # noqa: E402
+
+
+def best_time(function, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def report(name, seconds, count):
+    print(f"{name:<36} N={count:>6}: {seconds * 1e3:10.2f} ms ({count / seconds:12,.0f} poses/s)")
+
+
+def random_poses(rng, count):
+    axes = rng.normal(size=(count, 3))
+    axes /= np.linalg.norm(axes, axis=1, keepdims=True)
+    return np.hstack([rng.uniform(-1, 1, (count, 3)), axes * rng.uniform(0.1, 3.0, (count, 1))])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=20000, help='poses and points per call')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    a, b = random_poses(rng, args.count), random_poses(rng, args.count)
+    points = rng.normal(size=(args.count, 3))
+    loop = min(args.count, 2000)
+
+    def legacy_trans():
+        return np.array([Tran_Mat2Pose(Pose2Tran_Mat(p) @ Pose2Tran_Mat(q)) for p, q in zip(a[:loop], b[:loop])])
+
+    assert np.allclose(pose.pose_to_transform(legacy_trans()[:100]),
+                       pose.pose_to_transform(pose.pose_trans(a[:100], b[:100])))
+    report("pose_trans, per pose (4x4 matrices)", best_time(legacy_trans, 1), loop)
+    report("pose_trans, batched", best_time(lambda: pose.pose_trans(a, b)), args.count)
+    report("pose_add, batched", best_time(lambda: pose.pose_add(a, b)), args.count)
+    report("pose_inv, batched", best_time(lambda: pose.pose_inv(a)), args.count)
+    report("interpolate_pose, batched", best_time(lambda: pose.interpolate_pose(a, b, 0.5)), args.count)
+
+    report("Vektor_from_Base_to_TCP, per vector",
+           best_time(lambda: [Vektor_from_Base_to_TCP(v, r) for v, r in zip(points[:loop], a[:loop, 3:])], 1), loop)
+    report("rotate_vectors, batched", best_time(lambda: pose.rotate_vectors(a[:, 3:], points)), args.count)
+    report("transform_points, one pose", best_time(lambda: pose.transform_points(a[0], points)), args.count)
+    report("transform_points, pose per point", best_time(lambda: pose.transform_points(a, points)), args.count)
+
+
+if __name__ == '__main__':
+    main()
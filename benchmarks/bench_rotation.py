@@ -0,0 +1,134 @@
+"""Rotation conversions per second, and their accuracy next to 0 and pi.
+
+Cross-checks openur.kinematics.rotation against the per-rotation functions it replaced
+(kinematic.RotatMatr2AxisAng and AxisAng2RotaMatri, manipulation.MatrixLog3, copied below)
+away from the singular angles, reports the largest rotation vector error of each at angles
+close to 0 and pi, and times one call per rotation against one batched call.
+
+Usage:
+    python benchmarks/bench_rotation.py [--count 100000]
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from openur.kinematics import rotation  # noqa: E402
+
+
+def legacy_matrix_to_axis_angle(R):
+    theta = np.arccos(0.5 * (R[0, 0] + R[1, 1] + R[2, 2] - 1))
+    e1 = (R[2, 1] - R[1, 2]) / (2 * np.sin(theta))
+    e2 = (R[0, 2] - R[2, 0]) / (2 * np.sin(theta))
+    e3 = (R[1, 0] - R[0, 1]) / (2 * np.sin(theta))
+    return np.array([theta * e1, theta * e2, theta * e3])
+
+
+def legacy_axis_angle_to_matrix(angle_vec):
+    theta = math.sqrt(angle_vec[0] ** 2 + angle_vec[1] ** 2 + angle_vec[2] ** 2)
+    if theta == 0.:
+        return np.identity(3, dtype=float)
+    cs, si = np.cos(theta), np.sin(theta)
+    e1, e2, e3 = angle_vec[0] / theta, angle_vec[1] / theta, angle_vec[2] / theta
+    R = np.zeros((3, 3))
+    R[0, 0] = (1 - cs) * e1 ** 2 + cs
+    R[0, 1] = (1 - cs) * e1 * e2 - e3 * si
+    R[0, 2] = (1 - cs) * e1 * e3 + e2 * si
+    R[1, 0] = (1 - cs) * e1 * e2 + e3 * si
+    R[1, 1] = (1 - cs) * e2 ** 2 + cs
+    R[1, 2] = (1 - cs) * e2 * e3 - e1 * si
+    R[2, 0] = (1 - cs) * e1 * e3 - e2 * si
+    R[2, 1] = (1 - cs) * e2 * e3 + e1 * si
+    R[2, 2] = (1 - cs) * e3 ** 2 + cs
+    return R
+
+
+def legacy_matrix_log3(R):
+    if np.allclose(R, np.eye(3), atol=0.001):
+        return np.zeros(3)
+    if -1.001 < np.trace(R) < -0.999:
+        c = max(np.diag(R))
+        if c == R[2, 2]:
+            w = np.array([R[0, 2], R[1, 2], 1 + c])
+        elif c == R[1, 1]:
+            w = np.array([R[0, 1], 1 + c, R[2, 1]])
+        else:
+            w = np.array([1 + c, R[1, 0], R[2, 0]])
+        return w / (2 * (1 + c)) ** 0.5 * math.pi
+    theta = math.acos((np.trace(R) - 1) / 2)
+    w = (R - R.T) / (2 * math.sin(theta))
+    w = np.array([w[2, 1], w[0, 2], w[1, 0]])
+    return w / np.linalg.norm(w) * theta
+
+
+def best_time(function, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def report(name, seconds, count):
+    print(f"{name:<40} N={count:>7}: {seconds * 1e3:10.2f} ms ({count / seconds:13,.0f} rotations/s)")
+
+
+def rotation_error(rvec, expected):
+    """Angle (rad) of the rotation between two rotation vectors, NaN for NaN input."""
+    R = rotation.axis_angle_to_matrix(rvec) @ np.swapaxes(rotation.axis_angle_to_matrix(expected), -1, -2)
+    return np.linalg.norm(rotation.matrix_to_axis_angle(R), axis=-1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=100000, help='rotations per batched call')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    axes = rng.normal(size=(args.count, 3))
+    axes /= np.linalg.norm(axes, axis=1, keepdims=True)
+    rvec = axes * rng.uniform(0.01, np.pi - 0.01, (args.count, 1))
+    R = rotation.axis_angle_to_matrix(rvec)
+    loop = min(args.count, 5000)
+
+    assert np.allclose([legacy_axis_angle_to_matrix(v) for v in rvec[:1000]], R[:1000])
+    assert np.allclose([legacy_matrix_to_axis_angle(m) for m in R[:1000]], rvec[:1000])
+    # MatrixLog3 snaps rotations within about 0.03 rad of 0 and pi to exactly 0 and pi.
+    regular = np.abs(np.linalg.norm(rvec[:1000], axis=1) - np.pi / 2) < np.pi / 2 - 0.05
+    assert np.allclose([legacy_matrix_log3(m) for m in R[:1000][regular]], rvec[:1000][regular])
+    assert np.allclose(rotation.quaternion_to_matrix(rotation.axis_angle_to_quaternion(rvec)), R)
+    assert np.allclose(rotation.rpy_to_matrix(rotation.matrix_to_rpy(R)), R)
+
+    print("largest rotation error (rad) of matrix -> axis-angle next to the singular angles:")
+    for angle in (1e-9, 1e-6, 1e-3, np.pi - 1e-2, np.pi - 1e-6, np.pi - 1e-9, np.pi):
+        v = axes[:200] * angle
+        m = rotation.axis_angle_to_matrix(v)
+        with np.errstate(all='ignore'):
+            errors = [np.max(rotation_error(np.array([f(x) for x in m]), v))
+                      for f in (legacy_matrix_to_axis_angle, legacy_matrix_log3, rotation.matrix_to_axis_angle)]
+        print(f"  angle {angle:<20.12g} RotatMatr2AxisAng {errors[0]:9.2e}   MatrixLog3 {errors[1]:9.2e}"
+              f"   matrix_to_axis_angle {errors[2]:9.2e}")
+
+    report("AxisAng2RotaMatri, per rotation",
+           best_time(lambda: [legacy_axis_angle_to_matrix(v) for v in rvec[:loop]], 1), loop)
+    report("axis_angle_to_matrix, batched", best_time(lambda: rotation.axis_angle_to_matrix(rvec)), args.count)
+    report("RotatMatr2AxisAng, per rotation", best_time(lambda: [legacy_matrix_to_axis_angle(m) for m in R[:loop]], 1),
+           loop)
+    report("MatrixLog3, per rotation", best_time(lambda: [legacy_matrix_log3(m) for m in R[:loop]], 1), loop)
+    report("matrix_to_axis_angle, batched", best_time(lambda: rotation.matrix_to_axis_angle(R)), args.count)
+    report("matrix_to_quaternion, batched", best_time(lambda: rotation.matrix_to_quaternion(R)), args.count)
+    q = rotation.matrix_to_quaternion(R)
+    report("quaternion_to_matrix, batched", best_time(lambda: rotation.quaternion_to_matrix(q)), args.count)
+    report("matrix_to_rpy, batched", best_time(lambda: rotation.matrix_to_rpy(R)), args.count)
+    rpy = rotation.matrix_to_rpy(R)
+    report("rpy_to_matrix, batched", best_time(lambda: rotation.rpy_to_matrix(rpy)), args.count)
+
+
+if __name__ == '__main__':
+    main()
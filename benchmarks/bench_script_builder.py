@@ -0,0 +1,107 @@
+"""Commands per second generated by the URScript script builder.
+
+Compares the str.format(**locals()) / np.round / += code that the script builder replaced
+with openur.urscript.script_builder. Also times the bulk (N, 6) path formatting: row by
+row, vectorized and as waypoint tables.
+
+Usage:
+    python benchmarks/bench_script_builder.py
+"""
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from openur.urscript import script_builder  # noqa: E402
+from openur.urscript.script_builder import (move_block, move_lines, SERVOJ, format_vector,  # noqa: E402
+                                            waypoint_table_program)
+
+
+def legacy_move(movetype, pose, a=1.2, v=0.25, t=0, r=0):
+    prefix = "p"
+    t_val = ''
+    pose_via_val = ''
+    pose = np.array(pose)
+    movestr = ''
+    if np.size(pose.shape) == 2:
+        for idx in range(np.size(pose, 0)):
+            posex = np.round(pose[idx], 4)
+            posex = posex.tolist()
+            if (np.size(pose, 0) - 1) == idx:
+                r = 0
+            movestr += '    move{movetype}({pose_via_val} {prefix}{posex}, a={a}, v={v}, {t_val} r={r})\n'.format(**locals())
+        movestr += '    stopl({a})\n'.format(**locals())
+    else:
+        posex = np.round(pose, 4)
+        posex = posex.tolist()
+        movestr += '    move{movetype}({pose_via_val} {prefix}{posex}, a={a}, v={v}, {t_val} r={r})\n'.format(**locals())
+    return movestr
+
+
+def legacy_servoj(q, t=0.008, lookahead_time=0.1, gain=100):
+    prg = 'servoj({q}, 0.5, 0.5, {t}, {lookahead_time}, {gain})\n'
+    return prg.format(**locals())
+
+
+def legacy_format_program(commands):
+    program = "def OpenUr():\n"
+    indentation = 2
+    for command in commands:
+        if command == "end":
+            indentation -= 2
+        program += ' ' * indentation + command.lstrip() + "\n"
+        if command.endswith(":") or command.lstrip().startswith("def "):
+            indentation += 2
+    program += "end\n"
+    return program
+
+
+def builder_move(movetype, pose, a=1.2, v=0.25, t=0, r=0):
+    return ''.join(['    ' + line + '\n' for line in move_lines(movetype, pose, a=a, v=v, t=t, r=r)])
+
+
+def builder_servoj(q, t=0.008, lookahead_time=0.1, gain=100):
+    return SERVOJ.render(format_vector(q, 6), t, lookahead_time, gain) + '\n'
+
+
+def rate(func, commands_per_call, number):
+    seconds = min(timeit.repeat(func, number=number, repeat=3))
+    return commands_per_call * number / seconds
+
+
+def main():
+    rng = np.random.default_rng(0)
+    pose = rng.uniform(-1, 1, 6).tolist()
+    path = rng.uniform(-1, 1, (100, 6))
+    program = ['set_digital_out(0, True)', 'while (True):'] + ['movel(p[0.1, 0.2, 0.3, 0, 3.14, 0], a=1.2, v=0.25)'] * 200 + ['end']
+
+    cases = [
+        ('movel, single pose', lambda: legacy_move('l', pose), lambda: builder_move('l', pose), 1, 20000),
+        ('servoj, joint vector', lambda: legacy_servoj(pose), lambda: builder_servoj(pose), 1, 50000),
+        ('movel, 100 waypoints', lambda: legacy_move('l', path), lambda: builder_move('l', path), 101, 300),
+        ('format_program, 203 lines', lambda: legacy_format_program(program),
+         lambda: script_builder.format_program(program), 203, 2000),
+    ]
+    print(f"{'case':<28}{'legacy cmd/s':>16}{'builder cmd/s':>16}{'speedup':>10}")
+    for name, legacy, builder, per_call, number in cases:
+        old = rate(legacy, per_call, number)
+        new = rate(builder, per_call, number)
+        print(f"{name:<28}{old:>16,.0f}{new:>16,.0f}{new / old:>9.1f}x")
+
+    # Bulk path: row-by-row formatting against one vectorized pass over the whole array.
+    bulk = rng.uniform(-1, 1, (20000, 6))
+    print()
+    print(f"{'20k waypoints':<28}{'seconds':>16}{'bytes':>16}")
+    for name, func in [('legacy _move', lambda: legacy_move('l', bulk, r=0.001)),
+                       ('move_lines', lambda: builder_move('l', bulk, r=0.001)),
+                       ('move_block', lambda: move_block('l', bulk, r=0.001)),
+                       ('waypoint_table_program', lambda: waypoint_table_program('l', bulk, r=0.001))]:
+        seconds = min(timeit.repeat(func, number=1, repeat=3))
+        print(f"{name:<28}{seconds:>16.3f}{len(func()):>16,}")
+
+
+if __name__ == '__main__':
+    main()
@@ -13,6 +13,7 @@ __status__ = "Development"
 import logging
 import xml.etree.ElementTree as ET
 from xml.dom import minidom
+from openur.connections.connection_manager import ConnectionManager
 from openur.dashboard import Dashboard
 from openur.rtde_command import RTDECommands
 from openur.urscript import URClient
@@ -29,10 +30,6 @@ else:
     import xmlrpc.client as xmlrpclib
     from xmlrpc.server import SimpleXMLRPCServer
 
-# Configure logging
-logging.basicConfig(level=logging.INFO,
-                    format='%(asctime)s - %(levelname)s - %(message)s')
-
 # Decorator to register a function as an XML-RPC function.
 def rpc(func):
     """Decorator to register a function as an XML-RPC function."""
@@ -48,16 +45,27 @@ class OpenUR:
         self.recipe_rco = self.root.find(".//recipe[@key='rco']")
         self.recipe_rci = self.root.find(".//recipe[@key='rci']")
         self.rtde_cmd = RTDECommands(host=ip_address, recipe_setp="rci", recipe_out="rco")
-        self.rtde_cmd.connect()
         self.dashboard = Dashboard(ip_address)
-        self.dashboard.connect()
-        self.ur_client = URClient(ip_address)
+        self.ur_client = URClient(ip_address, auto_connect=False)
+        # Open all sockets to the controller in parallel with a shared backoff and circuit breaker.
+        self.connections = ConnectionManager(ip_address)
+        self.connections.add_client('rtde', self.rtde_cmd, port=self.rtde_cmd.ROBOT_PORT)
+        self.connections.add_client('dashboard', self.dashboard, port=self.dashboard.port)
+        self.connections.add_client('realtime', self.ur_client, port=self.ur_client.port)
+        failed = [name for name, connected in self.connections.open_all().items() if not connected]
+        if failed:
+            health = self.connections.health()
+            errors = ', '.join(f"{name} ({health[name]['last_error']})" for name in failed)
+            self.connections.close_all()
+            raise ConnectionError(f"Could not open the connections to {ip_address}: {errors}")
 
     
     def close(self):
-        self.rtde_cmd.close()
-        self.dashboard.close()
-        self.ur_client.close()
+        self.connections.close_all()
+
+    def connection_health(self):
+        """State, reconnect and failure counts of the RTDE, Dashboard and realtime connections."""
+        return self.connections.health()
     
     def _write_pretty_xml(self, filename):
         xml_string = ET.tostring(self.root).decode()
@@ -399,7 +407,7 @@ class OpenUR:
         return self.rtde_cmd.output_bit_register_x(number)
     
     def output_int_register_x(self, number):
-        self._add_rco_field_to_xml('output_int_register_' + str(number), 'BOOL')
+        self._add_rco_field_to_xml('output_int_register_' + str(number), 'INT32')
         return self.rtde_cmd.output_int_register_x(number)
 
     def output_double_register_x(self, number):
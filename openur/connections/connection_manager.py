@@ -0,0 +1,274 @@
+__author__ = "Beck Isakov"
+__copyright__ = "Beck isakov"
+__contact__ = "https://github.com/Jp-Beck"
+__license__ = "GPL v3"
+__version__ = "0.2.0"
+__maintainer__ = "Beck Isakov"
+__email__ = "jp-beck@outlook.com"
+__status__ = "Development"
+
+from concurrent.futures import ThreadPoolExecutor
+import functools
+from typing import Callable, Dict, Optional, Tuple
+import logging
+import threading
+import time
+
+
+class CircuitOpenError(ConnectionError):
+    """Raised instead of connecting while the circuit breaker of a host and port is open."""
+
+
+class BackoffPolicy:
+    """Capped exponential backoff between connection attempts.
+
+    Example:
+    >>> policy = BackoffPolicy(initial=0.5, factor=2.0, maximum=4.0, max_attempts=5)
+    >>> [policy.delay(attempt) for attempt in range(5)]
+    [0.5, 1.0, 2.0, 4.0, 4.0]
+
+    Args:
+        initial (float): delay in seconds after the first failed attempt.
+        factor (float): multiplier applied after every further failed attempt.
+        maximum (float): upper bound for the delay.
+        max_attempts (int): number of attempts before giving up.
+    """
+
+    def __init__(self, initial: float = 0.5, factor: float = 2.0, maximum: float = 10.0, max_attempts: int = 5):
+        self.initial = initial
+        self.factor = factor
+        self.maximum = maximum
+        self.max_attempts = max_attempts
+
+    def delay(self, attempt: int) -> float:
+        """Delay in seconds after failed attempt number ``attempt`` (0 based)."""
+        return min(self.initial * self.factor ** attempt, self.maximum)
+
+    def run(self, connect: Callable[[], None], label: str = '', exit_flag: Optional[threading.Event] = None,
+            on_error: Optional[Callable[[Exception], None]] = None) -> bool:
+        """Call ``connect`` until it does not raise, sleeping between attempts but not after the last one.
+
+        Returns True on success and False once all attempts failed or ``exit_flag`` was set.
+        """
+        for attempt in range(self.max_attempts):
+            if exit_flag is not None and exit_flag.is_set():
+                return False
+            try:
+                connect()
+                return True
+            except Exception as e:
+                logging.error(f"Error connecting to {label}: {e}")
+                if on_error is not None:
+                    on_error(e)
+                if isinstance(e, CircuitOpenError) or attempt + 1 == self.max_attempts:
+                    break
+                if exit_flag is not None:
+                    if exit_flag.wait(self.delay(attempt)):
+                        return False
+                else:
+                    time.sleep(self.delay(attempt))
+        logging.error(f"Giving up connecting to {label}")
+        return False
+
+
+class CircuitBreaker:
+    """Stop connection attempts to a host and port after repeated failures.
+
+    After ``failure_threshold`` consecutive failures the breaker opens and every attempt
+    fails immediately with CircuitOpenError. After ``reset_timeout`` seconds one attempt is
+    let through (half open); its success closes the breaker, its failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+
+    def before_attempt(self, label: str = ''):
+        with self._lock:
+            state = self.state
+            if state == 'open':
+                raise CircuitOpenError(f"Circuit breaker for {label} is open, retry in "
+                                       f"{self.reset_timeout - (time.monotonic() - self.opened_at):.1f}s")
+            if state == 'half_open':
+                # Let exactly one attempt through, the others keep failing fast.
+                self.opened_at = time.monotonic()
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+_breakers: Dict[Tuple[str, object], CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def circuit_breaker(host: str, port: object = None) -> CircuitBreaker:
+    """Return the circuit breaker shared by all connections to ``port`` on ``host``.
+
+    Every port has its own breaker, so one failing server (e.g. the Dashboard Server)
+    does not block the other channels of the same controller.
+    """
+    key = (host, port)
+    with _breakers_lock:
+        if key not in _breakers:
+            _breakers[key] = CircuitBreaker()
+        return _breakers[key]
+
+
+class ChannelHealth:
+    """Connection state and counters of one channel."""
+
+    def __init__(self):
+        self.state = 'disconnected'
+        self.connects = 0
+        self.failures = 0
+        self.last_error = None
+        self.connect_time = None
+
+    @property
+    def reconnects(self) -> int:
+        return max(self.connects - 1, 0)
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            'state': self.state,
+            'connects': self.connects,
+            'reconnects': self.reconnects,
+            'failures': self.failures,
+            'last_error': self.last_error,
+            'connect_time': self.connect_time,
+        }
+
+
+class ConnectionManager:
+    """Own all connections (RTDE, Dashboard, realtime, ...) to one controller.
+
+    Every channel is registered with a callable that makes one connection attempt and
+    raises on failure. open_all() opens all channels in parallel, so a cold start takes
+    as long as the slowest channel rather than the sum of all of them. All channels share
+    one BackoffPolicy unless a channel brings its own; each channel uses the CircuitBreaker
+    of its host and port, so once a server is known to be unreachable its attempts fail fast
+    without affecting the others. Clients registered with add_client() also route their
+    own reconnects through the manager, so the health counters cover the whole session.
+
+    Example:
+    >>> manager = ConnectionManager('192.168.1.11')
+    >>> manager.add('rtde', rtde_cmd.connect_once, rtde_cmd.close, port=30004)
+    >>> manager.add_client('dashboard', dashboard, port=29999)
+    >>> manager.open_all()
+    {'rtde': True, 'dashboard': True}
+    >>> manager.health()['dashboard']['reconnects']
+    0
+    """
+
+    def __init__(self, host: str, policy: Optional[BackoffPolicy] = None, breaker: Optional[CircuitBreaker] = None):
+        self.host = host
+        self.policy = policy or BackoffPolicy()
+        # An explicit breaker is shared by all channels, otherwise each channel gets the one of its port.
+        self.breaker = breaker
+        self.exit_flag = threading.Event()
+        self._channels: Dict[str, tuple] = {}
+        self._health: Dict[str, ChannelHealth] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def add(self, name: str, connect: Callable[[], None], close: Optional[Callable[[], None]] = None,
+            port: Optional[int] = None, policy: Optional[BackoffPolicy] = None):
+        """Register a channel. ``connect`` makes one attempt and raises on failure.
+
+        ``port`` selects the circuit breaker of the channel; without it the channel name is used.
+        ``policy`` replaces the manager's BackoffPolicy for this channel.
+        """
+        self._channels[name] = (connect, close, policy or self.policy)
+        self._health[name] = ChannelHealth()
+        self._breakers[name] = self.breaker or circuit_breaker(self.host, name if port is None else port)
+
+    def add_client(self, name: str, client, port: Optional[int] = None):
+        """Register a client with connect_once(), close() and max_retries.
+
+        The channel retries ``client.max_retries`` times, and the client's own connect()
+        (e.g. a Dashboard reconnecting after a lost connection) goes through connect(name),
+        so its breaker and counters see every reconnect.
+        """
+        policy = BackoffPolicy(self.policy.initial, self.policy.factor, self.policy.maximum, client.max_retries)
+        self.add(name, client.connect_once, client.close, port, policy)
+        client.connect_hook = functools.partial(self.connect, name)
+
+    def connect(self, name: str) -> bool:
+        """Connect one channel, retrying according to the policy and the circuit breaker."""
+        connect, _, policy = self._channels[name]
+        health = self._health[name]
+        breaker = self._breakers[name]
+        health.state = 'connecting'
+        # A previous close_all() only aborts the attempts that were running at the time.
+        self.exit_flag.clear()
+
+        def attempt():
+            breaker.before_attempt(f'{name} at {self.host}')
+            start = time.perf_counter()
+            try:
+                connect()
+            except Exception:
+                breaker.record_failure()
+                raise
+            breaker.record_success()
+            health.connect_time = time.perf_counter() - start
+
+        def failed(error):
+            health.failures += 1
+            # Keep the error that opened the breaker rather than the breaker's own message.
+            if not isinstance(error, CircuitOpenError):
+                health.last_error = str(error)
+
+        if policy.run(attempt, f'{name} at {self.host}', self.exit_flag, failed):
+            health.connects += 1
+            health.state = 'connected'
+            return True
+        health.state = 'circuit_open' if breaker.state == 'open' else 'failed'
+        return False
+
+    def reconnect(self, name: str) -> bool:
+        """Close and reopen one channel."""
+        self.close(name)
+        return self.connect(name)
+
+    def open_all(self) -> Dict[str, bool]:
+        """Open all registered channels in parallel and return the success per channel."""
+        with ThreadPoolExecutor(max_workers=max(len(self._channels), 1), thread_name_prefix=f'connect-{self.host}') as pool:
+            results = {name: pool.submit(self.connect, name) for name in self._channels}
+        return {name: future.result() for name, future in results.items()}
+
+    def close(self, name: str):
+        _, close, _ = self._channels[name]
+        if close is not None:
+            try:
+                close()
+            except Exception as e:
+                logging.error(f"Error closing {name} at {self.host}: {e}")
+        self._health[name].state = 'disconnected'
+
+    def close_all(self):
+        self.exit_flag.set()
+        for name in self._channels:
+            self.close(name)
+
+    def health(self) -> Dict[str, Dict[str, object]]:
+        """State, connect/reconnect/failure counts, last error and last connect time per channel."""
+        return {name: health.as_dict() for name, health in self._health.items()}
@@ -0,0 +1,124 @@
+__author__ = "Beck Isakov"
+__copyright__ = "Beck isakov"
+__contact__ = "https://github.com/Jp-Beck"
+__license__ = "GPL v3"
+__version__ = "0.2.0"
+__maintainer__ = "Beck Isakov"
+__email__ = "jp-beck@outlook.com"
+__status__ = "Development"
+
+from collections import deque
+from concurrent.futures import Future
+from typing import List
+import logging
+import socket
+import threading
+
+
+class LineTransport:
+    """Persistent socket to a server that answers every line with one line, in order.
+
+    Requests are queued as futures before they are written; a single reader thread splits
+    the incoming bytes on b"\\n" and hands each reply line to the oldest pending future.
+    Subclasses open the socket, pass it to _attach() and override _handle_reply() to turn
+    a reply line into the result of its future (the raw line by default).
+
+    Args:
+        host (str): server address.
+        port (int): server port.
+        name (str): name of the server in log and error messages, e.g. 'Dashboard'.
+    """
+
+    def __init__(self, host: str, port: int, name: str):
+        self.host = host
+        self.port = port
+        self.name = name
+        self._sock = None
+        self._pending = deque()
+        self._send_lock = threading.Lock()
+        self._reader = None
+        self._closed = threading.Event()
+        self._closed.set()
+
+    @property
+    def is_open(self) -> bool:
+        return not self._closed.is_set()
+
+    @property
+    def pending(self) -> int:
+        """Requests sent but not answered yet."""
+        return len(self._pending)
+
+    def close(self):
+        if self._sock is not None:
+            try:
+                self._sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._sock.close()
+            self._sock = None
+        self._closed.set()
+        self._fail_pending(ConnectionError(f'{self.name} connection closed'))
+
+    def _attach(self, sock: socket.socket, buffer: bytes = b''):
+        """Take over a connected socket and start the reader; ``buffer`` holds bytes already read."""
+        sock.settimeout(None)
+        self._sock = sock
+        self._closed.clear()
+        self._reader = threading.Thread(target=self._read_loop, args=(sock, buffer),
+                                        name=f'{self.name.lower()}-reader-{self.host}', daemon=True)
+        self._reader.start()
+
+    def _send(self, payload: bytes, futures: List[Future], context=None) -> List[Future]:
+        """Write the request lines of ``payload`` in one write, one future per line in order.
+
+        ``context`` is stored with every future and passed to _handle_reply() with its reply.
+        """
+        with self._send_lock:
+            if not self.is_open:
+                raise ConnectionError(f'{self.name} connection to {self.host}:{self.port} is not open')
+            # Queue before writing so a fast reply always finds its future
+            self._pending.extend((future, context) for future in futures)
+            try:
+                self._sock.sendall(payload)
+            except OSError as e:
+                self.close()
+                raise ConnectionError(f'Error sending to {self.host}:{self.port}: {e}') from e
+        return futures
+
+    def _read_loop(self, sock: socket.socket, buffer: bytes):
+        try:
+            while True:
+                while b'\n' in buffer:
+                    line, buffer = buffer.split(b'\n', 1)
+                    self._resolve(line + b'\n')
+                chunk = sock.recv(4096)
+                if not chunk:
+                    break
+                buffer += chunk
+        except OSError as e:
+            if not self._closed.is_set():
+                logging.error(f"{self.name} reader for {self.host}:{self.port} stopped: {e}")
+        self._closed.set()
+        self._fail_pending(ConnectionError(f'{self.name} connection to {self.host}:{self.port} lost'))
+
+    def _resolve(self, line: bytes):
+        try:
+            future, context = self._pending.popleft()
+        except IndexError:
+            logging.warning(f"Unsolicited {self.name} reply: {line}")
+            return
+        self._handle_reply(future, context, line)
+
+    def _handle_reply(self, future: Future, context, line: bytes):
+        """Resolve the future of one request with its reply line (including the b"\\n")."""
+        future.set_result(line)
+
+    def _fail_pending(self, error: Exception):
+        while True:
+            try:
+                future, _ = self._pending.popleft()
+            except IndexError:
+                return
+            if not future.done():
+                future.set_exception(error)
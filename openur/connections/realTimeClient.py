@@ -8,10 +8,6 @@ import logging
 
 from openur.rtde_command import RTDECommands
 
-# Configure logging
-logging.basicConfig(level=logging.INFO,
-                    format='%(asctime)s - %(levelname)s - %(message)s')
-
 
 
 class ConnectionState:
@@ -205,7 +201,6 @@ class RealTimeClient:
 
 
 import socket
-import threading
 import time
 import re
 import select
@@ -213,10 +208,7 @@ import logging
 import numpy as np
 
 from openur.rtde_command import RTDECommands
-
-# Configure logging
-logging.basicConfig(level=logging.INFO,
-                    format='%(asctime)s - %(levelname)s - %(message)s')
+from openur.rtde_command.program_tracker import ProgramRun, ProgramTracker, ERROR, SAFETY_STOP
 
 class ConnectionState:
     ERROR = 0
@@ -228,18 +220,23 @@ class ConnectionState:
 
 DEFAULT_TIMEOUT = 2.0
 
+# Injected around the main program: the start statement clears the finished register so
+# both registers produce a clean edge for every program, without a separate reset program.
+START_STATEMENTS = '  write_output_boolean_register(1, False)\n  write_output_boolean_register(0, True)\n'
+FINISH_STATEMENTS = '  write_output_boolean_register(0, False)\n  write_output_boolean_register(1, True)\n'
+
 class RealTimeClient:
 
     PORT = 30003
 
     def __init__(self):
         self.robot_model = RTDECommands(host='10.2.4.111', recipe_setp='rci', recipe_out='rco')
+        self.tracker = ProgramTracker(self.robot_model)
+        self.tracker.add_recipe_fields()
         self.robot_model.connect()
-        self.robot_model.safety_status_bits()
         self.robot_model.rtc_connection_state = ConnectionState.DISCONNECTED
         self.reconnect_timeout = 60
         self.sock = None
-        self.thread = None
 
         if self.connect():
             logging.info('RealTimeClient constructor done')
@@ -269,6 +266,7 @@ class RealTimeClient:
         return False
 
     def disconnect(self):
+        self.tracker.stop()
         if self.sock:
             self.sock.close()
             self.sock = None
@@ -279,33 +277,56 @@ class RealTimeClient:
     def is_rtc_connected(self):
         return self.robot_model.rtc_connection_state > ConnectionState.DISCONNECTED
 
-    def send_program(self, prg=''):
+    def send_program(self, prg='', name='', start_timeout=None):
+        """Send a program and return its ProgramRun future, or None if it could not be sent.
+
+        A program that is still running is replaced (the controller aborts it) and its
+        future resolves as 'aborted'.
+
+        Example:
+        >>> run = rtc.send_program('movej([0, -1.57, 1.57, 0, 0, 0])', name='home')
+        >>> run.result(timeout=30)
+        'finished'
+        >>> run.start_latency, run.run_time
+        (0.0172, 4.2081)
+        """
         if not self.is_rtc_connected():
             if not self.connect():
                 logging.error('SendProgram: Not connected to robot')
 
         if self.robot_model.stop_running_flag:
             logging.info('SendProgram: Send program aborted due to stop_running_flag')
-            return
+            return None
 
-        # Use a lock here for thread safety
-        thread_lock = threading.Lock()
-        with thread_lock:
-            if self.thread is not None and self.robot_model.rtc_program_running:
-                self.robot_model.stop_running_flag = True
-                while self.robot_model.rtc_program_running:
-                    time.sleep(0.1)
-                self.robot_model.stop_running_flag = False
-                self.thread.join()
+        modified_program = self.add_status_bit_to_prog(prg)
+        if not modified_program:
+            return None
 
+        self.start_tracking()
+        run = self.tracker.track(name, start_timeout)
+        run.add_done_callback(self._program_done)
         self.robot_model.rtc_program_running = True
         self.robot_model.rtc_program_execution_error = False
+        if not self.send_prg(modified_program):
+            self.tracker.abort()
+            return None
+        return run
+
+    def start_tracking(self, timeout=1.0):
+        """Start the program tracker on the RTDE output reader, once, before the first tracked program.
+
+        Waits for the first package so the tracker knows the register state before the
+        program is sent.
+        """
+        if self.tracker.is_running():
+            return
+        self.tracker.start()
+        self.robot_model.output_reader.wait_next(timeout)
 
-        modified_program = self.add_status_bit_to_prog(prg)
-
-        self.send_prg(modified_program)
-        self.thread = threading.Thread(target=self.wait_for_program_to_finish, kwargs={'prg': prg})
-        self.thread.start()
+    def _program_done(self, run: ProgramRun):
+        if run is self.tracker.current:
+            self.robot_model.rtc_program_running = False
+            self.robot_model.rtc_program_execution_error = run.result() in (ERROR, SAFETY_STOP)
 
     def send(self, prg=''):
         if not self.is_rtc_connected() and not self.connect():
@@ -316,33 +337,29 @@ class RealTimeClient:
             logging.info('Send: Send command aborted due to stop_running_flag')
             return
 
-        self.robot_model.rtc_program_running = True
-        self.robot_model.rtc_program_execution_error = False
-
         self.send_prg(prg)
-        self.robot_model.rtc_program_running = False
 
     def add_status_bit_to_prog(self, prg):
         def1 = prg.find('def ')
         if def1 >= 0:
             prg_len = len(prg)
-            prg = prg.replace('):\n', '):\n  write_output_boolean_register(0, True)\n', 1)
+            prg = prg.replace('):\n', '):\n' + START_STATEMENTS, 1)
             if len(prg) == prg_len:
-                self.logger.warning('Send_program: Syntax error in program')
+                logging.warning('Send_program: Syntax error in program')
                 return False
 
             if (len(re.findall('def ', prg))) > 1:
                 main_prg = prg[0:prg[def1 + 4:].find('def ') + def1 + 4]
                 main_prg_end = (np.max([main_prg.rfind('end '), main_prg.rfind('end\n')]))
                 prg = prg.replace(prg[0:main_prg_end],
-                                  f"{prg[0:main_prg_end]}\n  write_output_boolean_register(1, True)\n", 1)
+                                  f"{prg[0:main_prg_end]}\n{FINISH_STATEMENTS}", 1)
             else:
                 main_prg_end = prg.rfind('end')
                 prg = prg.replace(prg[0:main_prg_end],
-                                  f"{prg[0:main_prg_end]}\n  write_output_boolean_register(1, True)\n", 1)
+                                  f"{prg[0:main_prg_end]}\n{FINISH_STATEMENTS}", 1)
 
         else:
-            prg = 'def script():\n  write_output_boolean_register(0, True)\n  ' + prg + '\n  write_output_boolean_register(1, True)\nend\n'
+            prg = 'def script():\n' + START_STATEMENTS + '  ' + prg + '\n' + FINISH_STATEMENTS + 'end\n'
         return prg
 
     def send_prg(self, prg):
@@ -352,49 +369,30 @@ class RealTimeClient:
             try:
                 (_, writable, _) = select.select([], [self.sock], [], DEFAULT_TIMEOUT)
                 if writable:
-                    self.sock.send(prg.encode())
+                    self.sock.sendall(prg.encode())
                     logging.info(f'Program sent to Robot:\n{prg}')
                     program_send = True
-            except:
+            except Exception:
                 self.sock = None
                 self.robot_model.rtc_connection_state = ConnectionState.ERROR
-                self.logger.warning('Could not send program!')
+                logging.warning('Could not send program!')
                 self.connect()
         if not program_send:
             self.robot_model.rtc_program_running = False
             logging.error('Program re-sending timed out - Could not send program!')
-        time.sleep(0.1)
+        return program_send
 
-    def wait_for_program_to_finish(self, prg):
-        wait_for_program_start = len(prg) / 50
-        not_run = 0
-        prg_rest = 'def reset_register():\n  write_output_boolean_register(0, False)\n  write_output_boolean_register(1, False)\nend\n'
-        while not self.robot_model.stop_running_flag and self.robot_model.rtc_program_running:
-            if self.robot_model.safety_status_bits().stopped_due_to_safety:
-                    self.robot_model.rtc_program_running = False
-                    self.robot_model.rtc_program_execution_error = True
-                    logging.error('SendProgram: Safety Stop')
-            elif self.robot_model.output_bit_registers()[0] == False:
-                logging.debug('sendProgram: Program not started')
-                not_run += 1
-                if not_run > wait_for_program_start:
-                    self.robot_model.rtc_program_running = False
-                    logging.error('sendProgram: Program did not start')
-            elif self.robot_model.output_bit_registers()[1] == True:
-                self.robot_model.rtc_program_running = False
-                logging.info('SendProgram: Program finished')
-                self.send(prg_rest)
-            else:
-                logging.debug('SendProgram: Program running')
-        self.robot_model.rtc_program_running = False
+    def wait_for_program_to_finish(self, timeout=None):
+        """Block until the tracked program resolves and return its state, or None if nothing was sent."""
+        run = self.tracker.current
+        if run is None:
+            return None
+        return run.result(timeout)
 
     def abort_program(self):
-        self.robot_model.stop_running_flag = True
+        self.tracker.abort()
         prg_rest = 'def reset_register():\n  write_output_boolean_register(0, False)\n  write_output_boolean_register(1, False)\nend\n'
         self.send(prg_rest)
-        while self.robot_model.rtc_program_running:
-            time.sleep(0.1)
-        self.robot_model.stop_running_flag = False
 
     def pause_program(self):
         if self.is_rtc_connected() and self.robot_model.rtc_program_running:
@@ -420,10 +418,4 @@ class RealTimeClient:
         return self.robot_model.rtc_program_execution_error
 
     def is_safety_stopped(self):
-        return self.robot_model.safety_status_bits().stopped_due_to_safety
-
-
-rob =  RealTimeClient()
-while True:
-    rob.send_program('set_digital_out(0,True)\n  sleep(1)\n  set_digital_out(1,True)\n  sleep(1)\n  set_digital_out(0,False)\n  set_digital_out(2,True)\n  set_digital_out(1,False)\n  set_digital_out(3,True)\n  set_digital_out(2,False)\n  set_digital_out(3,False)')
-    time.sleep(3)
+        return self.tracker.safety_stopped
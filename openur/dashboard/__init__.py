@@ -1 +1,18 @@
-from .dashboard import Dashboard
\ No newline at end of file
+import importlib
+
+from .dashboard import Dashboard
+
+# AsyncDashboard pulls in asyncio and DashboardFleet selectors, import them on first use (PEP 562).
+_LAZY = {'AsyncDashboard': 'async_dashboard', 'DashboardFleet': 'fleet'}
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        value = getattr(importlib.import_module(f'{__name__}.{_LAZY[name]}'), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
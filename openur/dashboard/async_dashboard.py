@@ -0,0 +1,272 @@
+__author__ = "Beck Isakov"
+__copyright__ = "Beck isakov"
+__contact__ = "https://github.com/Jp-Beck"
+__license__ = "GPL v3"
+__version__ = "0.2.0"
+__maintainer__ = "Beck Isakov"
+__email__ = "jp-beck@outlook.com"
+__status__ = "Development"
+
+import asyncio
+import logging
+from typing import Optional
+
+from openur.dashboard import protocol
+
+
+class AsyncDashboard:
+    """asyncio client for the Dashboard Server with the same commands as Dashboard.
+
+    Every robot is one connection on the running event loop, so a whole fleet can be
+    driven concurrently without a thread per robot. Each command has a timeout (the
+    client default or the ``timeout`` argument) and connecting retries with a capped
+    exponential backoff instead of sleeping ``5 ** retries`` seconds.
+
+    Example:
+    >>> async def start(host):
+    ...     async with AsyncDashboard(host, timeout=2.0) as dashboard:
+    ...         await dashboard.power_on()
+    ...         await dashboard.brake_release()
+    ...         await dashboard.load_program('prog.urp')
+    ...         return await dashboard.play()
+    >>> async def start_fleet(hosts):
+    ...     return await asyncio.gather(*(start(host) for host in hosts))
+    >>> asyncio.run(start_fleet(['192.168.1.11', '192.168.1.12']))
+    [True, True]
+
+    Args:
+        host (str): robot IP address.
+        port (int): Dashboard Server port.
+        timeout (float): default timeout in seconds for one command.
+        connect_timeout (float): timeout in seconds for one connection attempt.
+        max_retries (int): connection attempts before giving up.
+        backoff (float): delay before the first retry, doubled on every further retry.
+        max_backoff (float): upper bound for the retry delay.
+    """
+
+    def __init__(self, host: str, port: int = 29999, timeout: float = 5.0, connect_timeout: float = 5.0,
+                 max_retries: int = 5, backoff: float = 0.5, max_backoff: float = 10.0):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.greeting = None
+        self._reader = None
+        self._writer = None
+        self._lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    @property
+    def is_connected(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def connect(self):
+        """Open the connection, retrying with a capped exponential backoff."""
+        for attempt in range(self.max_retries):
+            try:
+                self._reader, self._writer = await asyncio.wait_for(
+                    asyncio.open_connection(self.host, self.port), self.connect_timeout)
+                self.greeting = (await asyncio.wait_for(self._reader.readline(), self.connect_timeout)).rstrip(b'\n')
+                logging.info('Dashboard Connection Established with {}:{}'.format(self.host, self.port))
+                return
+            except (OSError, asyncio.TimeoutError) as e:
+                logging.error(f"Error connecting to {self.host}:{self.port}: {e}")
+                await self._drop()
+                if attempt + 1 < self.max_retries:
+                    await asyncio.sleep(min(self.backoff * 2 ** attempt, self.max_backoff))
+        raise ConnectionError(f"Could not connect to the Dashboard Server at {self.host}:{self.port} "
+                              f"after {self.max_retries} attempts")
+
+    async def close(self):
+        if self.is_connected:
+            logging.info('Dashboard Connection Closed with {}:{}'.format(self.host, self.port))
+        await self._drop()
+
+    async def _drop(self):
+        writer, self._reader, self._writer = self._writer, None, None
+        if writer is not None:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+    async def request(self, command: bytes, timeout: Optional[float] = None) -> bytes:
+        """Send one raw command and return its reply line (bytes, including the trailing newline)."""
+        timeout = self.timeout if timeout is None else timeout
+        async with self._lock:
+            if not self.is_connected:
+                await self.connect()
+            try:
+                self._writer.write(command)
+                await self._writer.drain()
+                reply = await asyncio.wait_for(self._reader.readline(), timeout)
+            except asyncio.TimeoutError:
+                # A late reply would be read as the answer to the next command, so drop the connection.
+                await self._drop()
+                raise TimeoutError(f"No reply to {command!r} from {self.host}:{self.port} within {timeout}s")
+            except OSError as e:
+                await self._drop()
+                raise ConnectionError(f"Error communicating with {self.host}:{self.port}: {e}") from e
+        if not reply:
+            await self._drop()
+            raise ConnectionError(f"Dashboard Server at {self.host}:{self.port} closed the connection")
+        return reply
+
+    async def execute(self, name: str, *args, timeout: Optional[float] = None):
+        """Run a command from protocol.COMMANDS and return the parsed reply."""
+        reply = await self.request(protocol.encode(name, *args), timeout)
+        result = protocol.parse(name, reply)
+        if result is None:
+            logging.debug(f"{self.host}: {name} -> {reply!r}")
+        return result
+
+    # Dashboard Commands
+    async def is_in_remote(self, timeout=None):
+        """Check if the robot is in remote control mode."""
+        return await self.execute('is_in_remote', timeout=timeout)
+
+    async def load_program(self, filename, timeout=None):
+        """Load a program onto the robot."""
+        if not filename:
+            raise ValueError("Filename cannot be empty.")
+        return await self.execute('load_program', filename, timeout=timeout)
+
+    async def play(self, timeout=None):
+        """Play the currently loaded program."""
+        return await self.execute('play', timeout=timeout)
+
+    async def stop(self, timeout=None):
+        """Stop the currently running program."""
+        return await self.execute('stop', timeout=timeout)
+
+    async def pause(self, timeout=None):
+        """Pause the currently running program."""
+        return await self.execute('pause', timeout=timeout)
+
+    async def quit(self, timeout=None):
+        """Quit the current connection to the Dashboard Server."""
+        result = await self.execute('quit', timeout=timeout)
+        await self._drop()
+        return result
+
+    async def shutdown(self, timeout=None):
+        """Shutdown the robot"""
+        return await self.execute('shutdown', timeout=timeout)
+
+    async def running(self, timeout=None):
+        """Check if a program is currently running."""
+        return await self.execute('running', timeout=timeout)
+
+    async def robotmode(self, timeout=None):
+        """Check the current robot mode."""
+        return await self.execute('robotmode', timeout=timeout)
+
+    async def get_loaded_program(self, timeout=None):
+        """Get the currently loaded program."""
+        return await self.execute('get_loaded_program', timeout=timeout)
+
+    async def popup(self, msg="", timeout=None):
+        """Display a popup on the robot teach pendant."""
+        return await self.execute('popup', msg or '.', timeout=timeout)
+
+    async def close_popup(self, timeout=None):
+        """Close the popup on the robot teach pendant."""
+        return await self.execute('close_popup', timeout=timeout)
+
+    async def add_to_log(self, msg, timeout=None):
+        """Add a message to the robot log."""
+        if not msg:
+            raise ValueError("No message to log provided")
+        return await self.execute('add_to_log', msg, timeout=timeout)
+
+    async def is_program_saved(self, timeout=None):
+        """Check if the currently loaded program is saved."""
+        return await self.execute('is_program_saved', timeout=timeout)
+
+    async def program_state(self, timeout=None):
+        """Check the current program state."""
+        return await self.execute('program_state', timeout=timeout)
+
+    async def polyscope_version(self, timeout=None):
+        """Get the version of the installed polyscope software."""
+        return await self.execute('polyscope_version', timeout=timeout)
+
+    async def marketing_version(self, timeout=None):
+        """Get the marketing version of the installed polyscope software."""
+        return await self.execute('marketing_version', timeout=timeout)
+
+    async def set_operational_mode(self, mode='none', timeout=None):
+        """Set the operational mode of the robot."""
+        if mode not in ["manual", "automatic", "none"]:
+            raise ValueError("Invalid mode provided")
+        return await self.execute('set_operational_mode', mode, timeout=timeout)
+
+    async def get_operational_mode(self, timeout=None):
+        """Get the operational mode of the robot."""
+        return await self.execute('get_operational_mode', timeout=timeout)
+
+    async def clear_operational_mode(self, timeout=None):
+        """Clear the operational mode of the robot."""
+        return await self.execute('clear_operational_mode', timeout=timeout)
+
+    async def power_on(self, timeout=None):
+        """Power on the robot."""
+        return await self.execute('power_on', timeout=timeout)
+
+    async def power_off(self, timeout=None):
+        """Power off the robot."""
+        return await self.execute('power_off', timeout=timeout)
+
+    async def brake_release(self, timeout=None):
+        """Release the robot brakes."""
+        return await self.execute('brake_release', timeout=timeout)
+
+    async def safety_status(self, timeout=None):
+        """Get the safety status of the robot."""
+        return await self.execute('safety_status', timeout=timeout)
+
+    async def unlock_protective_stop(self, timeout=None):
+        """Unlock the protective stop."""
+        return await self.execute('unlock_protective_stop', timeout=timeout)
+
+    async def close_safety_popup(self, timeout=None):
+        """Close the safety popup."""
+        return await self.execute('close_safety_popup', timeout=timeout)
+
+    async def load_installation(self, installation, timeout=None):
+        """Load an installation."""
+        if not installation:
+            raise ValueError("Installation must be specified")
+        return await self.execute('load_installation', installation, timeout=timeout)
+
+    async def restart_safety(self, timeout=None):
+        """Restart the safety."""
+        return await self.execute('restart_safety', timeout=timeout)
+
+    async def get_serial_number(self, timeout=None):
+        """Get the serial number of the robot."""
+        return await self.execute('get_serial_number', timeout=timeout)
+
+    async def get_robot_model(self, timeout=None):
+        """Get the robot model."""
+        return await self.execute('get_robot_model', timeout=timeout)
+
+    async def generate_flight_report(self, type="robot", timeout=None):
+        """Generate a flight report."""
+        if type not in ["controller", "robot", "system"]:
+            raise ValueError("Report type must be 'controller', 'robot' or 'system'")
+        return await self.execute('generate_flight_report', type, timeout=timeout)
+
+    async def generate_support_file(self, path='/programs/', timeout=None):
+        """Generate a support file."""
+        return await self.execute('generate_support_file', path or '/programs/', timeout=timeout)
@@ -0,0 +1,89 @@
+__author__ = "Beck Isakov"
+__copyright__ = "Beck isakov"
+__contact__ = "https://github.com/Jp-Beck"
+__license__ = "GPL v3"
+__version__ = "0.2.0"
+__maintainer__ = "Beck Isakov"
+__email__ = "jp-beck@outlook.com"
+__status__ = "Development"
+
+from typing import Dict, Optional, Tuple
+import threading
+import time
+
+# Replies that do not change while the controller is running.
+IMMUTABLE_COMMANDS = frozenset([b'get serial number', b'get robot model', b'polyscopeVersion', b'marketingVersion'])
+
+# Replies that change rarely and only after a command or an operator action.
+VOLATILE_COMMANDS = frozenset([b'robotmode', b'programState', b'is in remote control', b'running',
+                               b'get loaded program', b'get operational mode'])
+
+# Read-only commands that are never cached (safety state must always be fresh).
+UNCACHED_QUERIES = frozenset([b'safetystatus', b'isProgramSaved'])
+
+
+class ResponseCache:
+    """Cache of Dashboard reply lines keyed by command.
+
+    Immutable queries are kept for the lifetime of the cache, volatile queries for
+    ``ttl`` seconds (0 disables them). Any command that is not a known query is treated as
+    state-changing and drops all volatile entries when its reply is stored, so a query
+    answered before the command cannot survive it.
+
+    Example:
+    >>> cache = ResponseCache(ttl=0.5)
+    >>> cache.store(b'robotmode\\n', b'Robotmode: RUNNING\\n')
+    >>> cache.lookup(b'robotmode\\n')
+    b'Robotmode: RUNNING\\n'
+    >>> cache.store(b'power off\\n', b'Powering off\\n')  # state-changing, invalidates robotmode
+    >>> cache.lookup(b'robotmode\\n')
+    """
+
+    def __init__(self, ttl: float = 0.0):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(command: bytes) -> bytes:
+        return command.rstrip(b'\n')
+
+    def lookup(self, command: bytes) -> Optional[bytes]:
+        """Return the cached reply for a command, or None."""
+        key = self._key(command)
+        with self._lock:
+            if key not in IMMUTABLE_COMMANDS and key not in VOLATILE_COMMANDS:
+                return None
+            entry = self._entries.get(key)
+            if entry is not None and (entry[1] is None or entry[1] > time.monotonic()):
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            return None
+
+    def store(self, command: bytes, reply: bytes):
+        """Cache the reply of a query, or invalidate the volatile entries after any other command."""
+        key = self._key(command)
+        with self._lock:
+            if reply.lower().startswith(b'failed to execute'):
+                return
+            if key in IMMUTABLE_COMMANDS:
+                self._entries[key] = (reply, None)
+            elif key in VOLATILE_COMMANDS and self.ttl > 0:
+                self._entries[key] = (reply, time.monotonic() + self.ttl)
+            elif key not in VOLATILE_COMMANDS and key not in UNCACHED_QUERIES:
+                self._invalidate_volatile()
+
+    def invalidate(self, immutable: bool = False):
+        """Drop the volatile entries, and the immutable ones as well if requested."""
+        with self._lock:
+            if immutable:
+                self._entries.clear()
+            else:
+                self._invalidate_volatile()
+
+    def _invalidate_volatile(self):
+        for key in [key for key, (_, expiry) in self._entries.items() if expiry is not None]:
+            del self._entries[key]
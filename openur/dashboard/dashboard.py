@@ -10,40 +10,41 @@ __email__ = "jp-beck@outlook.com"
 __status__ = "Development"
 
 import socket
-import time
 import logging
 import threading
 import os
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 
-# Configure logging
-logging.basicConfig(level=logging.INFO,
-                    format='%(asctime)s - %(levelname)s - %(message)s')
+from openur.connections.connection_manager import BackoffPolicy
+from openur.dashboard.cache import ResponseCache
+from openur.dashboard.transport import DashboardTransport
 
 class DashboardClient:
-    def __init__(self, host, port, max_retries=10):
+    def __init__(self, host, port, max_retries=10, timeout=None, cache_ttl=0.0):
         self.host = host
         self.port = port
         self.conn = None
         self.max_retries = max_retries
+        self.timeout = timeout
+        self.cache = ResponseCache(cache_ttl)
+        self.connect_hook = None   # set by ConnectionManager.add_client()
         self.exit_flag = threading.Event()
         self.lock = threading.Lock()
 
+    def connect_once(self):
+        """Make one connection attempt, raising on failure."""
+        with self.lock:
+            if self.conn:
+                self.conn.close()
+            self.conn = DashboardTransport(self.host, self.port)
+            self.conn.open() # Consumes the greeting message from the robot.
+            self.cache.invalidate()
+        logging.info('Dashboard Connection Established with {}:{}'.format(self.host, self.port))
+
     def connect(self):
-        retries = 0
-        while not self.exit_flag.is_set() and retries < self.max_retries:
-            try:
-                with self.lock:
-                    if self.conn:
-                        self.conn.close()
-                    self.conn = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                    self.conn.connect((self.host, self.port))
-                    data = self.conn.recv(1024).decode('utf8') # Do not delete this as it is needed to discard the greeting message from robot.
-                logging.info('Dashboard Connection Established with {}:{}'.format(self.host, self.port))
-                break 
-            except (socket.error, Exception) as e:
-                logging.error(f"Error connecting to {self.host}:{self.port}: {e}")
-                retries += 1
-                time.sleep(5 ** retries)
+        if self.connect_hook is not None:
+            return self.connect_hook()
+        return BackoffPolicy(max_attempts=self.max_retries).run(self.connect_once, f'{self.host}:{self.port}', self.exit_flag)
 
     def close(self):
         try:
@@ -53,6 +54,44 @@ class DashboardClient:
         except (socket.error, Exception) as e:
             logging.error(f"Error closing Dashboard connection to {self.host}:{self.port}: {e}")
 
+    def _request(self, command):
+        """Send one command and return its reply line (bytes, including the trailing newline).
+
+        Replies to read-only queries may come from the response cache, see ResponseCache.
+        """
+        cached = self.cache.lookup(command)
+        if cached is not None:
+            return cached
+        if not self.conn or not self.conn.is_open:
+            self.connect()
+        # The cache is updated on the reader thread, in reply order, see _cache_callback.
+        future = self.conn.request(command, self._cache_callback)
+        try:
+            return future.result(self.timeout)
+        except FuturesTimeoutError:
+            # A missing reply would shift every later reply by one, so drop the connection.
+            self.conn.close()
+            raise TimeoutError(f"No reply to {command!r} from {self.host}:{self.port} within {self.timeout}s")
+
+    def pipeline(self, *commands):
+        """Send several commands in one write and return one future per reply.
+
+        Example:
+        >>> mode, safety, state = dashboard.pipeline('robotmode', 'safetystatus', 'programState')
+        >>> mode.result()
+        b'Robotmode: RUNNING\\n'
+        """
+        if not self.conn or not self.conn.is_open:
+            self.connect()
+        return self.conn.pipeline(commands, self._cache_callback)
+
+    def _cache_callback(self, command):
+        """Done-callback that stores the reply of a command; attached before the write, so it runs in reply order."""
+        def store(future):
+            if future.exception() is None:
+                self.cache.store(command, future.result())
+        return store
+
     def stop_dashboard_connection(self):
         """Stop any ongoing connection attempts or operations."""
         self.exit_flag.set()
@@ -67,14 +106,23 @@ class Dashboard(DashboardClient):
 
     This client connects to a remote UR dashboard server and provides an interface for checking the
     remote control status of the robot.
+
+    The serial number, robot model and software versions are cached for the session.
+    robotmode, program_state, is_in_remote, running, get_loaded_program and
+    get_operational_mode are cached for ``cache_ttl`` seconds (0, the default, disables
+    this). Every state-changing command (power_on, play, stop, load_program, ...) clears
+    the volatile entries.
+
+    Example:
+    >>> dashboard = Dashboard('192.168.1.11', cache_ttl=0.5)
+    >>> dashboard.get_serial_number()  # round trip
+    >>> dashboard.get_serial_number()  # cached
     """
-    def __init__(self, host, port=29999, max_retries=10):
+    def __init__(self, host, port=29999, max_retries=10, timeout=None, cache_ttl=0.0):
         """Initialize the Dashboard client."""
-        super().__init__(host, port, max_retries)
+        super().__init__(host, port, max_retries, timeout, cache_ttl)
         self.robot_model = None
         self.robot_model_lock = threading.Lock()
-        self.program_state = None
-        self.program_state_lock = threading.Lock()
         self.speed_slider_fraction = None
         self.speed_slider_fraction_lock = threading.Lock()
         self.speed_slider_mask = None
@@ -84,11 +132,7 @@ class Dashboard(DashboardClient):
         """Check if the robot is in remote control mode."""
         while not self.exit_flag.is_set():
             try:
-                with self.lock:
-                    if not self.conn:
-                        self.connect()
-                    self.conn.send(b"is in remote control\n")
-                    data = self.conn.recv(1024)
+                data = self._request(b"is in remote control\n")
                 if data == b'false\n':
                     return False
                 elif data == b'true\n':
@@ -106,11 +150,7 @@ class Dashboard(DashboardClient):
             raise ValueError("Filename cannot be empty.")
         while not self.exit_flag.is_set():
             try:
-                with self.lock:
-                    if not self.conn:
-                        self.connect()
-                    self.conn.send(("load {}\n".format(filename)).encode('utf-8'))
-                    data = self.conn.recv(1024)
+                data = self._request(("load {}\n".format(filename)).encode('utf-8'))
                 if data.lower().startswith(b"loading program:"):
                     logging.info("Loading program: {}".format(filename))
                     return True
@@ -128,11 +168,7 @@ class Dashboard(DashboardClient):
         """Play the currently loaded program."""
         while not self.exit_flag.is_set():
             try:
-                with self.lock:
-                    if not self.conn:
-                        self.connect()
-                    self.conn.send(b"play\n")
-                    data = self.conn.recv(1024)
+                data = self._request(b"play\n")
                 if data.lower().startswith(b"starting program"):
                     logging.info("Starting program")
                     return True
@@ -150,11 +186,7 @@ class Dashboard(DashboardClient):
         """Stop the currently running program."""
         while not self.exit_flag.is_set():
             try:
-                with self.lock:
-                    if not self.conn:
-                        self.connect()
-                    self.conn.send(b"stop\n")
-                    data = self.conn.recv(1024)
+                data = self._request(b"stop\n")
                 if data.lower().startswith(b"stopped"):
                     logging.info("Stopped program")
                     return True
@@ -172,11 +204,7 @@ class Dashboard(DashboardClient):
         """Pause the currently running program."""
         while not self.exit_flag.is_set():
             try:
-                with self.lock:
-                    if not self.conn:
-                        self.connect()
-                    self.conn.send(b"pause\n")
-                    data = self.conn.recv(1024)
+                data = self._request(b"pause\n")
                 if data.lower().startswith(b"pausing program"):
                     logging.info("Pausing program")
                     return True
@@ -194,11 +222,7 @@ class Dashboard(DashboardClient):
         """Quit the current connetion to the Dashboard Server."""
         while not self.exit_flag.is_set():
             try:
-                with self.lock:
-                    if not self.conn:
-                        self.connect()
-                    self.conn.send(b"quit\n")
-                    data = self.conn.recv(1024)
+                data = self._request(b"quit\n")
                 if data.lower().startswith(b"Disconnected"):
                     logging.info("Disconnected")
                     return True
@@ -213,11 +237,7 @@ class Dashboard(DashboardClient):
         """Shutdown the robot"""
         while not self.exit_flag.is_set():
             try:
-                with self.lock:
-                    if not self.conn:
-                        self.connect()
-                    self.conn.send(b"shutdown\n")
-                    data = self.conn.recv(1024)
+                data = self._request(b"shutdown\n")
                 if data.lower().startswith(b'Shutting down\n'):
                     logging.info("Shutting down")
                     return True
@@ -232,11 +252,7 @@ class Dashboard(DashboardClient):
         """Check if a program is currently running."""
         while not self.exit_flag.is_set():
             try:
-                with self.lock:
-                    if not self.conn:
-                        self.connect()
-                    self.conn.send(b"running\n")
-                    data = self.conn.recv(1024)
+                data = self._request(b"running\n")
                 if data.lower().startswith(b"program running: true"):
                     logging.info("Program running")
                     return True
@@ -254,12 +270,8 @@ class Dashboard(DashboardClient):
         """Check the current robot mode."""
         while not self.exit_flag.is_set():
             try:
-                with self.lock:
-                    if not self.conn:
-                        self.connect()
-                    self.conn.send(b"robotmode\n")
-                    data = self.conn.recv(1024)
-                    print(data)
+                data = self._request(b"robotmode\n")
+                print(data)
                 if data.lower().startswith(b"robotmode: no_controller"):
                     logging.info("Robot has no controller")
                     return "no_controller"
@@ -298,11 +310,7 @@ class Dashboard(DashboardClient):
         """Get the currently loaded program."""
         while not self.exit_flag.is_set():
             try:
-                with self.lock:
-                    if not self.conn:
-                        self.connect()
-                    self.conn.send(b"get loaded program\n")
-                    data = self.conn.recv(1024)
+                data = self._request(b"get loaded program\n")
                 if data.lower().startswith(b"loaded program:"):
                     logging.info("Loaded program: {}".format(data[16:].decode('utf-8').rstrip('\n')))
                     return data[16:].decode().rstrip('\n')
@@ -320,14 +328,10 @@ class Dashboard(DashboardClient):
         """Display a popup on the robot teach pendant."""
         while not self.exit_flag.is_set():
             try:
-                with self.lock:
-                    if not self.conn:
-                        self.connect()
-                    if msg:
-                        self.conn.send("popup {}\n".format(msg).encode('utf-8'))
-                    else:
-                        self.conn.send("popup .\n".encode('utf-8'))
-                    data = self.conn.recv(1024)
+                if msg:
+                    data = self._request("popup {}\n".format(msg).encode('utf-8'))
+                else:
+                    data = self._request("popup .\n".encode('utf-8'))
                 if data.lower().startswith(b"showing popup"):
                     logging.info("Showing popup:" + msg)
                     return True
@@ -345,11 +349,7 @@ class Dashboard(DashboardClient):
         """Close the popup on the robot teach pendant."""
         while not self.exit_flag.is_set():
             try:
-                with self.lock:
-                    if not self.conn:
-                        self.connect()
-                    self.conn.send(b"close popup\n")
-                    data = self.conn.recv(1024)
+                data = self._request(b"close popup\n")
                 if data.lower().startswith(b"closing popup"):
                     logging.info("Popup closed")
                     return True
@@ -370,11 +370,7 @@ class Dashboard(DashboardClient):
             raise ValueError("No message to log provided")
         while not self.exit_flag.is_set():
             try:
-                with self.lock:
-                    if not self.conn:
-                        self.connect()
-                    self.conn.send("addToLog {}\n".format(msg).encode('utf-8'))
-                    data = self.conn.recv(1024)
+                data = self._request("addToLog {}\n".format(msg).encode('utf-8'))
                 if data.lower().startswith(b"added log message"):
                     logging.info("Log added")
                     return True
@@ -392,11 +388,7 @@ class Dashboard(DashboardClient):
         """Check if the currently loaded program is saved."""
         while not self.exit_flag.is_set():
             try:
-                with self.lock:
-                    if not self.conn:
-                        self.connect()
-                    self.conn.send(b"isProgramSaved\n")
-                    data = self.conn.recv(1024)
+                data = self._request(b"isProgramSaved\n")
                 if data.lower().startswith(b"true"):
                     logging.info("Program saved")
                     return True
@@ -414,11 +406,7 @@ class Dashboard(DashboardClient):
         """Check the current program state."""
         while not self.exit_flag.is_set():
             try:
-                with self.lock:
-                    if not self.conn:
-                        self.connect()
-                    self.conn.send(b"programState\n")
-                    data = self.conn.recv(1024)
+                data = self._request(b"programState\n")
                 if data.lower().startswith(b"stopped"):
                     logging.info("Program stopped")
                     return "stopped"
@@ -442,11 +430,7 @@ class Dashboard(DashboardClient):
         """Get the version of the installed polyscope software."""
         while not self.exit_flag.is_set():
             try:
-                with self.lock:
-                    if not self.conn:
-                        self.connect()
-                    self.conn.send(b"polyscopeVersion\n")
-                    data = self.conn.recv(1024)
+                data = self._request(b"polyscopeVersion\n")
                 if data.lower().startswith(b"polyscope version"):
                     logging.info("Polyscope version: {}".format(data[19:].decode().rstrip('\n')))
                     return data[19:].decode().rstrip('\n')
@@ -464,11 +448,7 @@ class Dashboard(DashboardClient):
         """Get the marketing version of the installed polyscope software."""
         while not self.exit_flag.is_set():
             try:
-                with self.lock:
-                    if not self.conn:
-                        self.connect()
-                    self.conn.send(b"marketingVersion\n")
-                    data = self.conn.recv(1024)
+                data = self._request(b"marketingVersion\n")
                 if data.lower().startswith(b"marketing version"):
                     logging.info("Marketing version: {}".format(data[19:].decode().rstrip('\n')))
                     return data[19:].decode().rstrip('\n')
@@ -489,11 +469,7 @@ class Dashboard(DashboardClient):
             raise ValueError("Invalid mode provided")
         while not self.exit_flag.is_set():
             try:
-                with self.lock:
-                    if not self.conn:
-                        self.connect()
-                    self.conn.send("set operational mode {}\n".format(mode).encode('utf-8'))
-                    data = self.conn.recv(1024)
+                data = self._request("set operational mode {}\n".format(mode).encode('utf-8'))
                 if data.lower().startswith(b"setting operational mode"):
                     logging.info("Operational mode set to: {}".format(data[21:].decode().rstrip('\n')))
                     return True
@@ -511,11 +487,7 @@ class Dashboard(DashboardClient):
         """Get the operational mode of the robot."""
         while not self.exit_flag.is_set():
             try:
-                with self.lock:
-                    if not self.conn:
-                        self.connect()
-                    self.conn.send(b"get operational mode\n")
-                    data = self.conn.recv(1024)
+                data = self._request(b"get operational mode\n")
                 if data.lower().startswith(b"manual"):
                     logging.info("Operational mode: manual")
                     return "manual"
@@ -536,11 +508,7 @@ class Dashboard(DashboardClient):
         """Clear the operational mode of the robot."""
         while not self.exit_flag.is_set():
             try:
-                with self.lock:
-                    if not self.conn:
-                        self.connect()
-                    self.conn.send(b"clear operational mode\n")
-                    data = self.conn.recv(1024)
+                data = self._request(b"clear operational mode\n")
                 if data.lower().startswith(b"operational mode is no longer controlled by dashboard server"):
                     logging.info("Operational mode cleared")
                     return True
@@ -558,11 +526,7 @@ class Dashboard(DashboardClient):
         """Power on the robot."""
         while not self.exit_flag.is_set():
             try:
-                with self.lock:
-                    if not self.conn:
-                        self.connect()
-                    self.conn.send(b"power on\n")
-                    data = self.conn.recv(1024)
+                data = self._request(b"power on\n")
                 if data.lower().startswith(b"powering on"):
                     logging.info("Robot powered on")
                     return True
@@ -580,11 +544,7 @@ class Dashboard(DashboardClient):
         """Power off the robot."""
         while not self.exit_flag.is_set():
             try:
-                with self.lock:
-                    if not self.conn:
-                        self.connect()
-                    self.conn.send(b"power off\n")
-                    data = self.conn.recv(1024)
+                data = self._request(b"power off\n")
                 if data.lower().startswith(b"powering off"):
                     logging.info("Robot powered off")
                     return True
@@ -602,11 +562,7 @@ class Dashboard(DashboardClient):
         """Release the robot brakes."""
         while not self.exit_flag.is_set():
             try:
-                with self.lock:
-                    if not self.conn:
-                        self.connect()
-                    self.conn.send(b"brake release\n")
-                    data = self.conn.recv(1024)
+                data = self._request(b"brake release\n")
                 if data.lower().startswith(b"brake releasing\n"):
                     logging.info("Brakes releasing")
                     return True
@@ -624,11 +580,7 @@ class Dashboard(DashboardClient):
         """Get the safety status of the robot."""
         while not self.exit_flag.is_set():
             try:
-                with self.lock:
-                    if not self.conn:
-                        self.connect()
-                    self.conn.send(b"safetystatus\n")
-                    data = self.conn.recv(1024)
+                data = self._request(b"safetystatus\n")
                 if data.lower().startswith(b"safetystatus: normal"):
                     logging.info("Safety status: normal")
                     return "NORMAL"
@@ -673,11 +625,7 @@ class Dashboard(DashboardClient):
         """Unlock the protective stop."""
         while not self.exit_flag.is_set():
             try:
-                with self.lock:
-                    if not self.conn:
-                        self.connect()
-                    self.conn.send(b"unlock protective stop\n")
-                    data = self.conn.recv(1024)
+                data = self._request(b"unlock protective stop\n")
                 if data.lower().startswith(b"protective stop releasing"):
                     logging.info("Protective stop releasing")
                     return True
@@ -704,11 +652,7 @@ class Dashboard(DashboardClient):
         """Close the safety popup."""
         while not self.exit_flag.is_set():
             try:
-                with self.lock:
-                    if not self.conn:
-                        self.connect()
-                    self.conn.send(b"close safety popup\n")
-                    data = self.conn.recv(1024)
+                data = self._request(b"close safety popup\n")
                 if data.lower().startswith(b"closing safety popup"):
                     logging.info("Closing safety popup")
                     return True
@@ -729,11 +673,7 @@ class Dashboard(DashboardClient):
             raise ValueError("Installation must be specified")
         while not self.exit_flag.is_set():
             try:
-                with self.lock:
-                    if not self.conn:
-                        self.connect()
-                    self.conn.send(("load installation {}\n".format(installation)).encode('utf-8'))
-                    data = self.conn.recv(1024)
+                data = self._request(("load installation {}\n".format(installation)).encode('utf-8'))
                 if data.lower().startswith(b"loading installation"):
                     logging.info("Loading installation: {}".format(installation))
                     return True
@@ -754,11 +694,7 @@ class Dashboard(DashboardClient):
         """Restart the safety."""
         while not self.exit_flag.is_set():
             try:
-                with self.lock:
-                    if not self.conn:
-                        self.connect()
-                    self.conn.send(b"restart safety\n")
-                    data = self.conn.recv(1024)
+                data = self._request(b"restart safety\n")
                 if data.lower().startswith(b"true"):
                     logging.info("Restarting safety")
                     return True
@@ -779,11 +715,7 @@ class Dashboard(DashboardClient):
         """Get the serial number of the robot."""
         while not self.exit_flag.is_set():
             try:
-                with self.lock:
-                    if not self.conn:
-                        self.connect()
-                    self.conn.send(b"get serial number\n")
-                    data = self.conn.recv(1024)
+                data = self._request(b"get serial number\n")
                 if data.lower().startswith(b"failed to execute:"):
                     logging.error("Failed to get serial number")
                     return None
@@ -798,11 +730,7 @@ class Dashboard(DashboardClient):
         """Get the robot model."""
         while not self.exit_flag.is_set():
             try:
-                with self.lock:
-                    if not self.conn:
-                        self.connect()
-                    self.conn.send(b"get robot model\n")
-                    data = self.conn.recv(1024)
+                data = self._request(b"get robot model\n")
                 if data.lower().startswith(b"failed to execute:"):
                     logging.error("Failed to get robot model")
                     return None
@@ -820,11 +748,7 @@ class Dashboard(DashboardClient):
             raise ValueError("Report type must be 'controller' or 'robot'")
         while not self.exit_flag.is_set():
             try:
-                with self.lock:
-                    if not self.conn:
-                        self.connect()
-                    self.conn.send(("generate flight report {}\n".format(type)).encode('utf-8'))
-                    data = self.conn.recv(1024)
+                data = self._request(("generate flight report {}\n".format(type)).encode('utf-8'))
                 if data.lower().startswith(b"flight report generated with id:"):
                     logging.info("Flight Report generated with id:{}".format(data.decode('utf-8').rstrip('\n').split(":")[1]))
                     return True
@@ -873,12 +797,8 @@ class Dashboard(DashboardClient):
             logging.info("Path not specified, using default path: /programs/")
         while not self.exit_flag.is_set():
             try:
-                with self.lock:
-                    if not self.conn:
-                        self.connect()
-                    self.conn.send(("generate support file {}\n".format(path)).encode('utf-8'))
-                    data = self.conn.recv(1024)
-                    print(data)
+                data = self._request(("generate support file {}\n".format(path)).encode('utf-8'))
+                print(data)
                 if data.lower().startswith(b"completed successfully:"):
                     logging.info("Support file generated with id:{}".format(data.decode('utf-8').rstrip('\n').split(":")[1]))
                     return True
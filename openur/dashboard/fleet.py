@@ -0,0 +1,257 @@
+__author__ = "Beck Isakov"
+__copyright__ = "Beck isakov"
+__contact__ = "https://github.com/Jp-Beck"
+__license__ = "GPL v3"
+__version__ = "0.2.0"
+__maintainer__ = "Beck Isakov"
+__email__ = "jp-beck@outlook.com"
+__status__ = "Development"
+
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Sequence
+import errno
+import logging
+import os
+import selectors
+import socket
+import time
+
+from openur.dashboard import protocol
+
+DEFAULT_QUERIES = ('robotmode', 'safety_status', 'program_state', 'running')
+
+
+class _Channel:
+    """Non-blocking Dashboard connection to one robot, driven by DashboardFleet."""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.sock = None
+        self.state = 'closed'  # closed -> connecting -> greeting -> ready
+        self.rx = b''
+        self.tx = b''
+        self.pending = deque()
+        self.results = {}
+        self.error = None
+        self.deadline = 0.0
+        self.retry_at = 0.0
+        self.connects = 0
+
+    def reset(self):
+        self.results = {}
+        self.error = None
+
+    def events(self) -> int:
+        if self.state == 'connecting':
+            return selectors.EVENT_WRITE
+        if self.state == 'ready' and self.tx:
+            return selectors.EVENT_READ | selectors.EVENT_WRITE
+        return selectors.EVENT_READ
+
+
+class DashboardFleet:
+    """Poll and command the Dashboard Servers of many robots from one selector loop.
+
+    One non-blocking connection per robot is kept open between calls. poll() sends the
+    query set to every robot at once and collects the replies until each robot's deadline,
+    so an unreachable or slow robot only costs its own deadline and never delays the
+    others. A robot whose connection failed is not retried before ``reconnect_interval``.
+
+    Results are returned as a table ``{host: {command: value, ..., 'error': None}}``.
+    Commands that did not get a reply are missing from the row and ``'error'`` describes
+    why.
+
+    Example:
+    >>> fleet = DashboardFleet(['192.168.1.11', '192.168.1.12'], groups={'cell_a': ['192.168.1.11']})
+    >>> fleet.poll()
+    {'192.168.1.11': {'robotmode': 'running', 'safety_status': 'NORMAL', 'program_state': 'playing', 'running': True, 'error': None},
+     '192.168.1.12': {'error': 'no reply within 1.0s'}}
+    >>> fleet.broadcast('stop', group='cell_a')
+    {'192.168.1.11': {'stop': True, 'error': None}}
+
+    Args:
+        hosts (list): robot IP addresses.
+        port (int): Dashboard Server port.
+        queries (tuple): protocol.COMMANDS names sent by poll().
+        timeout (float): per-robot deadline in seconds for one poll or broadcast.
+        connect_timeout (float): deadline in seconds for (re)connecting a robot, the reply
+            deadline starts once it is connected.
+        reconnect_interval (float): minimum time between connection attempts to a failed robot.
+        groups (dict): named lists of hosts for broadcast().
+    """
+
+    def __init__(self, hosts: Iterable[str], port: int = 29999, queries: Sequence[str] = DEFAULT_QUERIES,
+                 timeout: float = 1.0, connect_timeout: float = 1.0, reconnect_interval: float = 5.0,
+                 groups: Optional[Dict[str, List[str]]] = None):
+        for name in queries:
+            if name not in protocol.COMMANDS:
+                raise ValueError(f"Unknown Dashboard command '{name}'")
+        self.channels = {host: _Channel(host, port) for host in hosts}
+        self.queries = tuple(queries)
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.reconnect_interval = reconnect_interval
+        self.groups = dict(groups or {})
+        self._selector = selectors.DefaultSelector()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        for channel in self.channels.values():
+            self._close(channel)
+        self._selector.close()
+
+    def health(self) -> Dict[str, Dict[str, object]]:
+        """Connection state and reconnect count per robot."""
+        return {host: {'state': channel.state, 'reconnects': max(channel.connects - 1, 0)}
+                for host, channel in self.channels.items()}
+
+    def poll(self, queries: Optional[Sequence[str]] = None, hosts: Optional[Iterable[str]] = None) -> Dict[str, dict]:
+        """Send the query set to all (or the given) robots in parallel and return the table."""
+        queries = self.queries if queries is None else tuple(queries)
+        return self._run(self._select_hosts(hosts), [(name, protocol.encode(name)) for name in queries])
+
+    def broadcast(self, command: str, *args, group: Optional[str] = None, hosts: Optional[Iterable[str]] = None) -> Dict[str, dict]:
+        """Send one command (e.g. 'stop', 'pause') to a group of robots and return the result per robot.
+
+        Args:
+            command (str): protocol.COMMANDS name.
+            args: command arguments, e.g. the program name for 'load_program'.
+            group (str): name of a group given to the constructor.
+            hosts (list): explicit hosts, defaults to the whole fleet.
+        """
+        if command not in protocol.COMMANDS:
+            raise ValueError(f"Unknown Dashboard command '{command}'")
+        if group is not None:
+            if hosts is not None:
+                raise ValueError("Pass either group or hosts, not both")
+            hosts = self.groups[group]
+        return self._run(self._select_hosts(hosts), [(command, protocol.encode(command, *args))])
+
+    def _select_hosts(self, hosts):
+        if hosts is None:
+            return list(self.channels)
+        hosts = list(hosts)
+        unknown = [host for host in hosts if host not in self.channels]
+        if unknown:
+            raise KeyError(f"Not part of the fleet: {unknown}")
+        return hosts
+
+    def _run(self, hosts: List[str], commands) -> Dict[str, dict]:
+        now = time.monotonic()
+        active = []
+        for host in hosts:
+            channel = self.channels[host]
+            channel.reset()
+            channel.deadline = now + self.timeout
+            if channel.state == 'closed':
+                if now < channel.retry_at:
+                    channel.error = 'unreachable, retrying in {:.1f}s'.format(channel.retry_at - now)
+                    continue
+                if not self._open(channel):
+                    continue
+                channel.deadline = now + self.connect_timeout
+            for name, payload in commands:
+                channel.pending.append(name)
+                channel.tx += payload
+            self._update(channel)
+            active.append(channel)
+
+        while active:
+            now = time.monotonic()
+            for channel in [channel for channel in active if channel.deadline <= now]:
+                if channel.state == 'ready':
+                    self._fail(channel, 'no reply within {}s'.format(self.timeout), retry_in=0.0)
+                else:
+                    self._fail(channel, 'not connected within {}s'.format(self.connect_timeout))
+            active = [channel for channel in active if channel.pending]
+            if not active:
+                break
+            for key, events in self._selector.select(min(channel.deadline for channel in active) - now):
+                channel = key.data
+                try:
+                    if events & selectors.EVENT_WRITE:
+                        self._on_writable(channel)
+                    if events & selectors.EVENT_READ and channel.sock is not None:
+                        self._on_readable(channel)
+                except OSError as e:
+                    self._fail(channel, str(e))
+            active = [channel for channel in active if channel.pending]
+
+        table = {}
+        for host in hosts:
+            channel = self.channels[host]
+            table[host] = dict(channel.results, error=channel.error)
+        return table
+
+    def _open(self, channel: _Channel) -> bool:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setblocking(False)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        result = sock.connect_ex((channel.host, channel.port))
+        if result not in (0, errno.EINPROGRESS, errno.EWOULDBLOCK):
+            sock.close()
+            channel.error = os.strerror(result)
+            channel.retry_at = time.monotonic() + self.reconnect_interval
+            return False
+        channel.sock = sock
+        channel.state = 'connecting'
+        channel.connects += 1
+        channel.rx = channel.tx = b''
+        self._selector.register(sock, selectors.EVENT_WRITE, channel)
+        return True
+
+    def _close(self, channel: _Channel):
+        if channel.sock is not None:
+            try:
+                self._selector.unregister(channel.sock)
+            except (KeyError, ValueError):
+                pass
+            channel.sock.close()
+        channel.sock = None
+        channel.state = 'closed'
+        channel.pending.clear()
+        channel.rx = channel.tx = b''
+
+    def _fail(self, channel: _Channel, error: str, retry_in: Optional[float] = None):
+        logging.warning(f"Dashboard {channel.host}:{channel.port}: {error}")
+        channel.error = error
+        # Unanswered commands would shift every later reply, so the connection is dropped.
+        self._close(channel)
+        channel.retry_at = time.monotonic() + (self.reconnect_interval if retry_in is None else retry_in)
+
+    def _update(self, channel: _Channel):
+        self._selector.modify(channel.sock, channel.events(), channel)
+
+    def _on_writable(self, channel: _Channel):
+        if channel.state == 'connecting':
+            error = channel.sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+            if error:
+                raise OSError(error, os.strerror(error))
+            channel.state = 'greeting'
+        elif channel.tx:
+            sent = channel.sock.send(channel.tx)
+            channel.tx = channel.tx[sent:]
+        self._update(channel)
+
+    def _on_readable(self, channel: _Channel):
+        data = channel.sock.recv(4096)
+        if not data:
+            raise OSError('connection closed by the robot')
+        channel.rx += data
+        if channel.state == 'greeting':
+            if b'\n' not in channel.rx:
+                return
+            _, channel.rx = channel.rx.split(b'\n', 1)
+            channel.state = 'ready'
+            channel.deadline = time.monotonic() + self.timeout
+            self._update(channel)
+        while b'\n' in channel.rx and channel.pending:
+            line, channel.rx = channel.rx.split(b'\n', 1)
+            name = channel.pending.popleft()
+            channel.results[name] = protocol.parse(name, line + b'\n')
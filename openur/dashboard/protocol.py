@@ -0,0 +1,149 @@
+"""Dashboard Server command strings and reply parsers.
+
+Everything here is pure (no sockets, no logging), so the same table can be used by the
+blocking, the asyncio and the fleet clients.
+"""
+
+__author__ = "Beck Isakov"
+__copyright__ = "Beck isakov"
+__contact__ = "https://github.com/Jp-Beck"
+__license__ = "GPL v3"
+__version__ = "0.2.0"
+__maintainer__ = "Beck Isakov"
+__email__ = "jp-beck@outlook.com"
+__status__ = "Development"
+
+from typing import Any, Callable, Dict, Tuple
+
+FAILED = 'failed to execute'
+
+ROBOT_MODES = ('no_controller', 'disconnected', 'confirm_safety', 'booting', 'power_off',
+               'power_on', 'idle', 'backdrive', 'running')
+
+
+def _text(reply: bytes) -> str:
+    return reply.decode('utf-8', 'replace').strip()
+
+
+def replies(*table: Tuple[str, Any], default: Any = None) -> Callable[[bytes], Any]:
+    """Build a parser that maps the first matching (lower case) reply prefix to a value.
+
+    Example:
+    >>> parse = replies(('powering on', True), (FAILED, False))
+    >>> parse(b'Powering on\\n')
+    True
+    """
+    def parse(reply: bytes):
+        text = _text(reply).lower()
+        for prefix, value in table:
+            if text.startswith(prefix):
+                return value
+        return default
+    return parse
+
+
+def text_after(prefix: str = '', failed: Any = None) -> Callable[[bytes], Any]:
+    """Build a parser that returns the reply text with an optional prefix removed."""
+    def parse(reply: bytes):
+        text = _text(reply)
+        if text.lower().startswith(FAILED):
+            return failed
+        if prefix and text.lower().startswith(prefix):
+            text = text[len(prefix):].lstrip(' :')
+        return text
+    return parse
+
+
+def parse_robotmode(reply: bytes):
+    """b'Robotmode: RUNNING\\n' -> 'running'"""
+    text = _text(reply).lower()
+    if text.startswith('robotmode:'):
+        mode = text.split(':', 1)[1].strip()
+        if mode in ROBOT_MODES:
+            return mode
+    return None
+
+
+def parse_safety_status(reply: bytes):
+    """b'Safetystatus: PROTECTIVE_STOP\\n' -> 'PROTECTIVE_STOP'"""
+    text = _text(reply)
+    if text.lower().startswith('safetystatus:'):
+        return text.split(':', 1)[1].strip().upper()
+    if text.lower().startswith(FAILED):
+        return False
+    return None
+
+
+def parse_program_state(reply: bytes):
+    """b'PLAYING prog.urp\\n' -> 'playing'"""
+    text = _text(reply).lower()
+    for state in ('stopped', 'playing', 'paused', 'no program running', 'program running'):
+        if text.startswith(state):
+            return state
+    return None
+
+
+def parse_loaded_program(reply: bytes):
+    """b'Loaded program: /programs/prog.urp\\n' -> '/programs/prog.urp'"""
+    text = _text(reply)
+    if text.lower().startswith('loaded program:'):
+        return text.split(':', 1)[1].strip()
+    if text.lower().startswith(FAILED):
+        return False
+    return None
+
+
+# name: (command template, reply parser)
+COMMANDS: Dict[str, Tuple[str, Callable[[bytes], Any]]] = {
+    'is_in_remote': ('is in remote control', replies(('true', True), ('false', False))),
+    'load_program': ('load {}', replies(('loading program', True), default=False)),
+    'play': ('play', replies(('starting program', True), (FAILED, False))),
+    'stop': ('stop', replies(('stopped', True), ('no program', False), (FAILED, False))),
+    'pause': ('pause', replies(('pausing program', True), (FAILED, False))),
+    'quit': ('quit', replies(('disconnected', True))),
+    'shutdown': ('shutdown', replies(('shutting down', True), default=False)),
+    'running': ('running', replies(('program running: true', True), ('program running: false', False))),
+    'robotmode': ('robotmode', parse_robotmode),
+    'get_loaded_program': ('get loaded program', parse_loaded_program),
+    'popup': ('popup {}', replies(('showing popup', True), ('popup executed', True))),
+    'close_popup': ('close popup', replies(('closing popup', True), ('popup closed', True))),
+    'add_to_log': ('addToLog {}', replies(('added log message', True), ('no log message to add', False))),
+    'is_program_saved': ('isProgramSaved', replies(('true', True), ('false', False))),
+    'program_state': ('programState', parse_program_state),
+    'polyscope_version': ('polyscopeVersion', text_after('polyscope version', failed=False)),
+    'marketing_version': ('marketingVersion', text_after('marketing version', failed=False)),
+    'set_operational_mode': ('set operational mode {}', replies(('setting operational mode', True), ('failed setting operational mode', False))),
+    'get_operational_mode': ('get operational mode', replies(('manual', 'manual'), ('automatic', 'automatic'), ('none', 'none'))),
+    'clear_operational_mode': ('clear operational mode', replies(('operational mode is no longer controlled', True), (FAILED, False))),
+    'power_on': ('power on', replies(('powering on', True), (FAILED, False))),
+    'power_off': ('power off', replies(('powering off', True), (FAILED, False))),
+    'brake_release': ('brake release', replies(('brake releasing', True), (FAILED, False))),
+    'safety_status': ('safetystatus', parse_safety_status),
+    'unlock_protective_stop': ('unlock protective stop', replies(('protective stop releas', True), (FAILED, False),
+                                                                 ('cannot unlock protective stop', False),
+                                                                 ('can not unlock protective stop', False))),
+    'close_safety_popup': ('close safety popup', replies(('closing safety popup', True), (FAILED, False))),
+    'load_installation': ('load installation {}', replies(('loading installation', True), ('failed to load installation', False),
+                                                          ('file not found', False))),
+    'restart_safety': ('restart safety', replies(('restarting safety', True), ('true', True), ('false', False))),
+    'get_serial_number': ('get serial number', text_after()),
+    'get_robot_model': ('get robot model', text_after()),
+    'generate_flight_report': ('generate flight report {}', replies(('flight report generated with id', True), (FAILED, None), default=False)),
+    'generate_support_file': ('generate support file {}', replies(('completed successfully', True), ('error', None), default=False)),
+}
+
+
+def encode(name: str, *args) -> bytes:
+    """Return the newline terminated command for a COMMANDS entry.
+
+    Example:
+    >>> encode('load_program', 'prog.urp')
+    b'load prog.urp\\n'
+    """
+    template = COMMANDS[name][0]
+    return (template.format(*args) + '\n').encode('utf-8')
+
+
+def parse(name: str, reply: bytes):
+    """Parse a reply line of a COMMANDS entry."""
+    return COMMANDS[name][1](reply)
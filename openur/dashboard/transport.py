@@ -0,0 +1,78 @@
+__author__ = "Beck Isakov"
+__copyright__ = "Beck isakov"
+__contact__ = "https://github.com/Jp-Beck"
+__license__ = "GPL v3"
+__version__ = "0.2.0"
+__maintainer__ = "Beck Isakov"
+__email__ = "jp-beck@outlook.com"
+__status__ = "Development"
+
+from concurrent.futures import Future
+from typing import Callable, Iterable, List, Optional, Union
+import socket
+
+from openur.connections.line_transport import LineTransport
+
+
+class DashboardTransport(LineTransport):
+    """Persistent connection to the Dashboard Server with response framing.
+
+    The Dashboard Server answers every command with exactly one line, in the order the
+    commands were received. A single reader thread splits the incoming bytes on b"\\n"
+    and resolves the oldest pending future with each line, so several commands can be
+    written at once and their replies collected as they arrive.
+
+    Replies are the raw reply line including the trailing b"\\n".
+
+    Example:
+    >>> transport = DashboardTransport('192.168.1.11')
+    >>> transport.open()
+    >>> mode, safety, state = transport.pipeline(['robotmode', 'safetystatus', 'programState'])
+    >>> mode.result(timeout=1)
+    b'Robotmode: RUNNING\\n'
+    """
+
+    def __init__(self, host: str, port: int = 29999, connect_timeout: float = 5.0):
+        super().__init__(host, port, 'Dashboard')
+        self.connect_timeout = connect_timeout
+        self.greeting = None
+
+    def open(self):
+        """Connect, consume the greeting line and start the reader thread."""
+        sock = socket.create_connection((self.host, self.port), timeout=self.connect_timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        buffer = b''
+        while b'\n' not in buffer:
+            chunk = sock.recv(1024)
+            if not chunk:
+                sock.close()
+                raise ConnectionError('Dashboard Server closed the connection during the greeting')
+            buffer += chunk
+        self.greeting, buffer = buffer.split(b'\n', 1)
+        self._attach(sock, buffer)
+
+    def request(self, command: Union[str, bytes], callback: Optional[Callable[[bytes], Callable]] = None) -> Future:
+        """Send one command and return a future that resolves to its reply line."""
+        return self.pipeline([command], callback)[0]
+
+    def pipeline(self, commands: Iterable[Union[str, bytes]],
+                 callback: Optional[Callable[[bytes], Callable]] = None) -> List[Future]:
+        """Send several commands in one write and return one future per command, in order.
+
+        ``callback(line)`` is called with each encoded command line and returns a done-callback
+        for its future. It is attached before the write, so it runs on the reader thread in
+        reply order.
+        """
+        payload = b''.join(self._encode(command) for command in commands)
+        lines = payload.splitlines(keepends=True)
+        futures = [Future() for _ in lines]
+        if callback is not None:
+            for line, future in zip(lines, futures):
+                future.add_done_callback(callback(line))
+        return self._send(payload, futures)
+
+    @staticmethod
+    def _encode(command: Union[str, bytes]) -> bytes:
+        if isinstance(command, str):
+            command = command.encode('utf-8')
+        return command if command.endswith(b'\n') else command + b'\n'
@@ -1,4 +1,29 @@
 # __author__ = "Beck Isakov, Martin Huus Bjerge"
 # __copyright__ = "Copyright 2023, Beck Isakov, Japan"
 # __license__ = "GPL v3"
-from .kinematic import *
\ No newline at end of file
+import importlib
+
+# Submodules are imported on first access (PEP 562), so importing openur.kinematics costs
+# nothing until a function is used. The names of kinematic (Forwardkin_manip, Invkine_manip,
+# ...) are still available from the package; the symbolic and URDF functions import sympy
+# and ikpy only when they are called.
+_SUBMODULES = ('analytic_ik', 'dynamics', 'forward_kinematics', 'ik_cache', 'kinematic', 'manipulation', 'pose',
+               'robot_model', 'rotation')
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return importlib.import_module(f'{__name__}.{name}')
+    kinematic = importlib.import_module(f'{__name__}.kinematic')
+    if name == '__all__':
+        return [key for key in vars(kinematic) if not key.startswith('_')]
+    try:
+        value = getattr(kinematic, name)
+    except AttributeError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_SUBMODULES))
@@ -0,0 +1,186 @@
+__author__ = "Beck Isakov"
+__copyright__ = "Beck isakov"
+__contact__ = "https://github.com/Jp-Beck"
+__license__ = "GPL v3"
+__version__ = "0.2.0"
+__maintainer__ = "Beck Isakov"
+__email__ = "jp-beck@outlook.com"
+__status__ = "Development"
+
+from typing import Optional, Sequence, Union
+
+import numpy as np
+
+from .robot_model import ALPHA, JOINT_LIMITS, UR_DH, RobotModel, dh_transform, get_model
+from .rotation import axis_angle_to_matrix
+
+pi = np.pi
+
+_SINGULAR = 1e-10
+
+
+def dh_parameters(rob: Union[str, RobotModel] = 'ur10'):
+    """Return (a, alpha, d) of a robot model, e.g. 'ur5', 'ur10e' or a RobotModel."""
+    model = get_model(rob)
+    return model.a, model.alpha, model.d
+
+
+def inverse_transform(T: np.ndarray) -> np.ndarray:
+    """Inverse of rigid transforms (..., 4, 4) without a general matrix inverse."""
+    R = np.swapaxes(T[..., :3, :3], -1, -2)
+    Tinv = np.zeros_like(T)
+    Tinv[..., :3, :3] = R
+    Tinv[..., :3, 3] = -np.einsum('...ij,...j->...i', R, T[..., :3, 3])
+    Tinv[..., 3, 3] = 1.0
+    return Tinv
+
+
+def pose_to_transform(poses) -> np.ndarray:
+    """UR poses [x, y, z, rx, ry, rz] (axis-angle), shape (..., 6), to transforms (..., 4, 4)."""
+    poses = np.asarray(poses, dtype=float)
+    T = np.zeros(poses.shape[:-1] + (4, 4))
+    T[..., :3, :3] = axis_angle_to_matrix(poses[..., 3:])
+    T[..., :3, 3] = poses[..., :3]
+    T[..., 3, 3] = 1.0
+    return T
+
+
+def forward(q, rob: Union[str, RobotModel] = 'ur10', tcp: Optional[Sequence[float]] = None) -> np.ndarray:
+    """Flange (or TCP) transforms for joint vectors of shape (..., 6): (..., 4, 4)."""
+    a, alpha, d = dh_parameters(rob)
+    links = dh_transform(np.asarray(q, dtype=float), a, alpha, d)
+    T = links[..., 0, :, :]
+    for i in range(1, 6):
+        T = T @ links[..., i, :, :]
+    if tcp is not None:
+        T = T @ pose_to_transform(tcp)
+    return T
+
+
+def wrap_to_pi(q) -> np.ndarray:
+    """Wrap angles to [-pi, pi)."""
+    return (np.asarray(q) + pi) % (2 * pi) - pi
+
+
+def inverse(poses, rob: Union[str, RobotModel] = 'ur10', tcp: Optional[Sequence[float]] = None, q_near=None,
+            limits: Optional[np.ndarray] = None) -> np.ndarray:
+    """All 8 closed-form inverse kinematics solutions for every pose.
+
+    Solutions are ordered by shoulder (joint 1), wrist (joint 5) and elbow (joint 3)
+    branch: index = 4 * shoulder + 2 * wrist + elbow. Unreachable branches and branches
+    outside ``limits`` are NaN. Angles are wrapped to [-pi, pi), or to the 2*pi turn
+    closest to ``q_near`` when it is given. In a wrist singularity (joint 5 = 0) joint 6
+    is taken from ``q_near`` (0 without it) and joint 4 absorbs the rest of the rotation.
+
+    Example:
+    >>> solutions = inverse([[0.5, -0.3, 0.4, 0, 3.14, 0]], rob='ur5e')
+    >>> solutions.shape
+    (1, 8, 6)
+    >>> np.allclose(forward(solutions[0, 0], 'ur5e'), pose_to_transform([0.5, -0.3, 0.4, 0, 3.14, 0]))
+    True
+
+    Args:
+        poses: (N, 6) UR poses or (N, 4, 4) transforms, a single pose is also accepted.
+        rob: robot model name (see UR_DH) or RobotModel.
+        tcp: TCP offset pose, the poses are then TCP poses instead of flange poses.
+        q_near: (6,) or (N, 6) joint positions the solutions are unwrapped towards.
+        limits: (2, 6) lower and upper joint limits, defaults to the limits of the model.
+
+    Returns:
+        (N, 8, 6) array of joint solutions.
+    """
+    model = get_model(rob)
+    a, alpha, d = model.a, model.alpha, model.d
+    limits = model.joint_limits if limits is None else limits
+    d1, a2, a3, d4, d5, d6 = d[0], a[1], a[2], d[3], d[4], d[5]
+    T = np.asarray(poses, dtype=float)
+    T = pose_to_transform(T) if T.shape[-1] == 6 else T.copy()
+    T = T.reshape(-1, 4, 4)
+    if tcp is not None:
+        T = T @ inverse_transform(pose_to_transform(tcp))
+    N = len(T)
+    near = None if q_near is None else np.broadcast_to(np.asarray(q_near, dtype=float), (N, 6))
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # Joint 1 (shoulder left/right), from the wrist 2 position p5 = p - d6 * z6.
+        p = T[:, :3, 3]
+        p5 = p - d6 * T[:, :3, 2]
+        phi = np.arccos(d4 / np.hypot(p5[:, 0], p5[:, 1]))
+        psi = np.arctan2(p5[:, 1], p5[:, 0])
+        q1 = psi[:, None] + np.stack([phi, -phi], axis=1) + pi / 2          # (N, 2)
+        s1, c1 = np.sin(q1), np.cos(q1)
+
+        # Joint 5 (wrist up/down)
+        c5 = (p[:, None, 0] * s1 - p[:, None, 1] * c1 - d4) / d6
+        q5 = np.stack([np.arccos(c5), -np.arccos(c5)], axis=2)             # (N, 2, 2)
+        s5 = np.sin(q5)
+
+        # Joint 6 from the base x and y axes seen from the flange.
+        R = T[:, :3, :3]
+        y6 = -R[:, None, 0, 1] * s1 + R[:, None, 1, 1] * c1
+        x6 = R[:, None, 0, 0] * s1 - R[:, None, 1, 0] * c1
+        singular = np.abs(s5) < _SINGULAR
+        safe_s5 = np.where(singular, 1.0, s5)
+        q6 = np.arctan2(y6[..., None] / safe_s5, x6[..., None] / safe_s5)
+        if near is not None:
+            q6 = np.where(singular, near[:, None, None, 5], q6)
+        else:
+            q6 = np.where(singular, 0.0, q6)
+
+        # Joints 2-4 form a planar arm: solve it in frame 1 from T14 = T01^-1 T T46^-1.
+        q1b = np.broadcast_to(q1[:, :, None], q5.shape)
+        T01 = dh_transform(q1b, a[0], alpha[0], d1)
+        T46 = dh_transform(q5, a[4], alpha[4], d5) @ dh_transform(q6, a[5], alpha[5], d6)
+        T14 = inverse_transform(T01) @ T[:, None, None] @ inverse_transform(T46)
+        # In frame 1: x = a2 cos(q2) + a3 cos(q2 + q3), y = a2 sin(q2) + a3 sin(q2 + q3)
+        x, y = T14[..., 0, 3], T14[..., 1, 3]
+        c3 = (x ** 2 + y ** 2 - a2 ** 2 - a3 ** 2) / (2 * a2 * a3)
+        q3 = np.stack([np.arccos(c3), -np.arccos(c3)], axis=3)            # (N, 2, 2, 2)
+        q2 = np.arctan2(y, x)[..., None] - np.arctan2(a3 * np.sin(q3), a2 + a3 * np.cos(q3))
+        T13 = dh_transform(q2, a[1], alpha[1], d[1]) @ dh_transform(q3, a[2], alpha[2], d[2])
+        T34 = inverse_transform(T13) @ T14[..., None, :, :]
+        q4 = np.arctan2(T34[..., 1, 0], T34[..., 0, 0])
+
+    shape = q3.shape
+    solutions = np.stack([np.broadcast_to(q1[:, :, None, None], shape),
+                          np.broadcast_to(q2, shape),
+                          q3,
+                          np.broadcast_to(q4, shape),
+                          np.broadcast_to(q5[..., None], shape),
+                          np.broadcast_to(q6[..., None], shape)], axis=-1).reshape(N, 8, 6)
+    return unwrap(solutions, q_near=near, limits=limits)
+
+
+def unwrap(solutions, q_near=None, limits: Optional[np.ndarray] = None) -> np.ndarray:
+    """Wrap (N, K, 6) solutions to [-pi, pi) or to the turn closest to q_near, NaN outside the limits."""
+    limits = JOINT_LIMITS if limits is None else np.asarray(limits, dtype=float)
+    solutions = wrap_to_pi(solutions)
+    if q_near is not None:
+        near = np.asarray(q_near, dtype=float)
+        near = near[:, None, :] if near.ndim == 2 else near
+        solutions = solutions + 2 * pi * np.round((near - solutions) / (2 * pi))
+    # Move a solution that ended up just outside a limit by one turn, if that fits.
+    solutions = np.where(solutions > limits[1], solutions - 2 * pi, solutions)
+    solutions = np.where(solutions < limits[0], solutions + 2 * pi, solutions)
+    outside = np.any((solutions < limits[0]) | (solutions > limits[1]), axis=-1)
+    solutions[outside] = np.nan
+    return solutions
+
+
+def closest_solution(poses, q_near, rob: Union[str, RobotModel] = 'ur10', tcp: Optional[Sequence[float]] = None,
+                     limits: Optional[np.ndarray] = None) -> np.ndarray:
+    """The solution closest to ``q_near`` (max joint distance) for every pose: (N, 6), NaN rows if unreachable.
+
+    Example:
+    >>> q = closest_solution(path_poses, q_near=rtde.actual_q(), rob='ur10e')
+    """
+    poses = np.asarray(poses, dtype=float)
+    count = len(poses.reshape(-1, 6)) if poses.shape[-1] == 6 else len(poses.reshape(-1, 4, 4))
+    near = np.broadcast_to(np.asarray(q_near, dtype=float), (count, 6))
+    solutions = inverse(poses, rob, tcp=tcp, q_near=near, limits=limits)
+    distance = np.max(np.abs(solutions - near[:, None, :]), axis=-1)
+    distance = np.where(np.isnan(distance), np.inf, distance)
+    best = np.argmin(distance, axis=1)
+    result = solutions[np.arange(len(solutions)), best]
+    result[np.isinf(distance[np.arange(len(solutions)), best])] = np.nan
+    return result
@@ -0,0 +1,305 @@
+__author__ = "Beck Isakov"
+__copyright__ = "Beck isakov"
+__contact__ = "https://github.com/Jp-Beck"
+__license__ = "GPL v3"
+__version__ = "0.2.0"
+__maintainer__ = "Beck Isakov"
+__email__ = "jp-beck@outlook.com"
+__status__ = "Development"
+
+from typing import Optional, Sequence
+
+import numpy as np
+
+from .manipulation import AdjointBatch, MatrixExp6Batch
+
+GRAVITY = np.array([0.0, 0.0, -9.81])
+
+
+def ur5_parameters():
+    """Link frames, spatial inertias and screw axes of the UR5 (Lynch & Park, Modern Robotics).
+
+    Returns (M_rels, Glist, Slist): the 7 relative home transforms M_{i-1,i} of the link
+    centre-of-mass frames (the last one is the end-effector frame), the 6 spatial inertia
+    matrices [I 0; 0 m*1] and the space screw axes. The base frame of this model is turned
+    compared to the controller base frame.
+    """
+    M_rels = np.array([
+        [[1, 0, 0, 0], [0, 1, 0, 0], [0, 0, 1, 0.089159], [0, 0, 0, 1]],
+        [[0, 0, 1, 0.28], [0, 1, 0, 0.13585], [-1, 0, 0, 0], [0, 0, 0, 1]],
+        [[1, 0, 0, 0], [0, 1, 0, -0.1197], [0, 0, 1, 0.395], [0, 0, 0, 1]],
+        [[0, 0, 1, 0], [0, 1, 0, 0], [-1, 0, 0, 0.14225], [0, 0, 0, 1]],
+        [[1, 0, 0, 0], [0, 1, 0, 0.093], [0, 0, 1, 0], [0, 0, 0, 1]],
+        [[1, 0, 0, 0], [0, 1, 0, 0], [0, 0, 1, 0.09465], [0, 0, 0, 1]],
+        [[1, 0, 0, 0], [0, 0, 1, 0.0823], [0, -1, 0, 0], [0, 0, 0, 1]],
+    ], dtype=float)
+    inertias = [(0.010267495893, 0.010267495893, 0.00666, 3.7),
+                (0.22689067591, 0.22689067591, 0.0151074, 8.393),
+                (0.049443313556, 0.049443313556, 0.004095, 2.275),
+                (0.111172755531, 0.111172755531, 0.21942, 1.219),
+                (0.111172755531, 0.111172755531, 0.21942, 1.219),
+                (0.0171364731454, 0.0171364731454, 0.033822, 0.1879)]
+    Glist = np.array([np.diag([ixx, iyy, izz, m, m, m]) for ixx, iyy, izz, m in inertias])
+    Slist = np.array([[0, 0, 1, 0, 0, 0],
+                      [0, 1, 0, -0.089159, 0, 0],
+                      [0, 1, 0, -0.089159, 0, 0.425],
+                      [0, 1, 0, -0.089159, 0, 0.81725],
+                      [0, 0, -1, -0.10915, 0.81725, 0],
+                      [0, 1, 0, 0.005491, 0, 0.81725]], dtype=float)
+    return M_rels, Glist, Slist
+
+
+# Rated joint torques (Nm) of the UR5, base to wrist 3.
+UR5_TORQUE_LIMITS = np.array([150.0, 150.0, 150.0, 28.0, 28.0, 28.0])
+
+
+def _inverse(T):
+    R = np.swapaxes(T[..., :3, :3], -1, -2)
+    Tinv = np.zeros_like(T)
+    Tinv[..., :3, :3] = R
+    Tinv[..., :3, 3] = -np.einsum('...ij,...j->...i', R, T[..., :3, 3])
+    Tinv[..., 3, 3] = 1.0
+    return Tinv
+
+
+def _ad_apply(T, V):
+    """[Ad_T] V for transforms (..., 4, 4) and twists (..., 6)."""
+    R, p = T[..., :3, :3], T[..., :3, 3]
+    w = np.einsum('...ij,...j->...i', R, V[..., :3])
+    v = np.cross(p, w) + np.einsum('...ij,...j->...i', R, V[..., 3:])
+    return np.concatenate([w, v], axis=-1)
+
+
+def _ad_matrix(V):
+    """[ad_V] (6, 6) of a twist, the matrix of the Lie bracket [ad_V] A."""
+    w, v = np.asarray(V[:3], dtype=float), np.asarray(V[3:], dtype=float)
+    W = np.array([[0, -w[2], w[1]], [w[2], 0, -w[0]], [-w[1], w[0], 0]])
+    U = np.array([[0, -v[2], v[1]], [v[2], 0, -v[0]], [-v[1], v[0], 0]])
+    return np.block([[W, np.zeros((3, 3))], [U, W]])
+
+
+def _lie_bracket_transpose(V, F):
+    """[ad_V]^T F for twists and wrenches (N, 6), with one cross product call."""
+    w, v = V[:, :3], V[:, 3:]
+    c = np.cross(np.stack([w, v, w], axis=1), F[:, [0, 1, 2, 3, 4, 5, 3, 4, 5]].reshape(-1, 3, 3))
+    return -np.concatenate([c[:, 0] + c[:, 1], c[:, 2]], axis=-1)
+
+
+class Dynamics:
+    """Rigid-body dynamics of a serial arm, batched over (N, n) joint states.
+
+    The link screw axes A_i, the inverse home transforms and the spatial inertias are
+    computed once. inverse_dynamics() runs the recursive Newton-Euler algorithm (RNEA) for
+    all N states at once, every joint step being a handful of array operations on (N, 6)
+    twists and wrenches. mass_matrix() uses the composite-rigid-body algorithm (CRBA),
+    which needs one backward pass instead of one RNEA per column. Gravity, Coriolis and
+    end-effector terms are RNEA passes with the other inputs set to zero, so the torques
+    along a whole trajectory take a few vectorized passes.
+
+    Conventions follow Modern Robotics: twists and wrenches are [angular, linear], Glist
+    holds 6x6 spatial inertias in the link frames, Slist the space screw axes.
+
+    Example:
+    >>> dyn = Dynamics.ur5()
+    >>> q, qd, qdd = JointTrajectoryBatch(q_start, q_end, 10, 5001, 'quintic')
+    >>> tau = dyn.inverse_dynamics(q, qd, qdd)     # (5001, 6)
+    >>> dyn.within_torque_limits(tau, UR5_TORQUE_LIMITS).all()
+    True
+    >>> dyn.mass_matrix(q).shape, dyn.gravity(q).shape, dyn.coriolis(q, qd).shape
+    ((5001, 6, 6), (5001, 6), (5001, 6))
+
+    Args:
+        M_rels: n (or n+1, with the end-effector frame last) relative home transforms M_{i-1,i}.
+        Glist: n spatial inertia matrices (6x6) of the links.
+        Slist: n space screw axes, one per row.
+        g: gravity vector in the base frame.
+    """
+
+    def __init__(self, M_rels, Glist, Slist, g: Sequence[float] = GRAVITY):
+        M_rels = np.asarray(M_rels, dtype=float)
+        self.Glist = np.asarray(Glist, dtype=float)
+        self.Slist = np.asarray(Slist, dtype=float)
+        self.n = len(self.Slist)
+        if len(self.Glist) != self.n or len(M_rels) not in (self.n, self.n + 1):
+            raise ValueError('M_rels, Glist and Slist do not describe the same number of joints')
+        self.g = np.asarray(g, dtype=float)
+        self.M_rels = M_rels
+        # Transform from the end-effector frame to the last link frame, identity without one.
+        self.M_tip = M_rels[self.n] if len(M_rels) > self.n else np.eye(4)
+        self._M_rels_inv = _inverse(M_rels[:self.n])
+        self._tip_inv = _inverse(self.M_tip)
+        Mlist = np.empty((self.n, 4, 4))
+        Mlist[0] = M_rels[0]
+        for i in range(1, self.n):
+            Mlist[i] = Mlist[i - 1] @ M_rels[i]
+        # Screw axis of joint i expressed in link frame i: A_i = [Ad_(M_i^-1)] S_i.
+        self.Alist = _ad_apply(_inverse(Mlist), self.Slist)
+        # V @ _bracket_T[i] = [ad_V] A_i = -[ad_(A_i)] V, linear in V with a constant matrix.
+        self._bracket_T = np.array([-_ad_matrix(A).T for A in self.Alist])
+        self._Ad_tip = AdjointBatch(self._tip_inv)
+
+    @classmethod
+    def ur5(cls, g: Sequence[float] = GRAVITY) -> 'Dynamics':
+        """Dynamics of the UR5 with the parameters of ur5_parameters()."""
+        return cls(*ur5_parameters(), g=g)
+
+    def _adjoints(self, q):
+        """[Ad_T] of T_{i,i-1} = exp(-[A_i] q_i) M_{i-1,i}^-1 for every joint: (N, n, 6, 6)."""
+        return AdjointBatch(MatrixExp6Batch(-self.Alist, q) @ self._M_rels_inv)
+
+    def _states(self, q, *arrays):
+        q = np.atleast_2d(np.asarray(q, dtype=float))
+        if q.shape[-1] != self.n:
+            raise ValueError(f"Expected joint vectors with {self.n} values")
+        out = [q]
+        for array in arrays:
+            out.append(np.zeros_like(q) if array is None else np.broadcast_to(np.asarray(array, dtype=float), q.shape))
+        return out
+
+    def _rnea(self, Ad, qd, qdd, g, Ftip):
+        N = len(Ad)
+        g = self.g if g is None else np.asarray(g, dtype=float)
+        Aqd = qd[:, :, None] * self.Alist
+        Aqdd = qdd[:, :, None] * self.Alist
+
+        V = np.empty((N, self.n, 6))
+        Vdot = np.empty((N, self.n, 6))
+        V_prev = np.zeros((N, 6, 1))
+        Vdot_prev = np.zeros((N, 6, 1))
+        Vdot_prev[:, 3:, 0] = -g
+        for i in range(self.n):
+            V_prev = Ad[:, i] @ V_prev + Aqd[:, i, :, None]
+            V[:, i] = V_prev[..., 0]
+            Vdot[:, i] = (Ad[:, i] @ Vdot_prev)[..., 0] + (V[:, i] @ self._bracket_T[i]) * qd[:, i, None] + Aqdd[:, i]
+            Vdot_prev = Vdot[:, i, :, None]
+
+        F = np.zeros((N, 6, 1))
+        if Ftip is not None:
+            F[..., 0] = Ftip
+        Ad_next = self._Ad_tip
+        tau = np.empty((N, self.n))
+        for i in range(self.n - 1, -1, -1):
+            G = self.Glist[i]
+            F = np.swapaxes(Ad_next, -1, -2) @ F
+            F[..., 0] += Vdot[:, i] @ G - _lie_bracket_transpose(V[:, i], V[:, i] @ G)
+            tau[:, i] = F[..., 0] @ self.Alist[i]
+            Ad_next = Ad[:, i]
+        return tau
+
+    def _crba(self, Ad):
+        N = len(Ad)
+        AdT = np.swapaxes(Ad, -1, -2)
+        M = np.empty((N, self.n, self.n))
+        Ic = self.Glist[self.n - 1]
+        for i in range(self.n - 1, -1, -1):
+            if i < self.n - 1:
+                # Composite inertia: I_i = G_i + Ad(T_{i+1,i})^T I_{i+1} Ad(T_{i+1,i})
+                Ic = self.Glist[i] + AdT[:, i + 1] @ Ic @ Ad[:, i + 1]
+            F = Ic @ self.Alist[i]
+            M[:, i, i] = F @ self.Alist[i]
+            for j in range(i - 1, -1, -1):
+                F = (AdT[:, j + 1] @ F[..., None])[..., 0]
+                M[:, j, i] = M[:, i, j] = F @ self.Alist[j]
+        return M
+
+    def inverse_dynamics(self, q, qd=None, qdd=None, g: Optional[Sequence[float]] = None, Ftip=None) -> np.ndarray:
+        """Joint torques (N, n) for the states (N, n) with RNEA; a single state gives (n,).
+
+        Args:
+            q, qd, qdd: joint positions, velocities and accelerations, (n,) or (N, n). Missing are zero.
+            g: gravity vector, the engine gravity by default.
+            Ftip: wrench (6,) or (N, 6) applied by the end-effector, in the end-effector frame.
+        """
+        single = np.ndim(q) == 1
+        q, qd, qdd = self._states(q, qd, qdd)
+        tau = self._rnea(self._adjoints(q), qd, qdd, g, Ftip)
+        return tau[0] if single else tau
+
+    def mass_matrix(self, q) -> np.ndarray:
+        """Joint-space mass matrices (N, n, n) with CRBA; a single state gives (n, n)."""
+        single = np.ndim(q) == 1
+        (q,) = self._states(q)
+        M = self._crba(self._adjoints(q))
+        return M[0] if single else M
+
+    def gravity(self, q, g: Optional[Sequence[float]] = None) -> np.ndarray:
+        """Gravity torques (N, n)."""
+        return self.inverse_dynamics(q, None, None, g=g)
+
+    def coriolis(self, q, qd) -> np.ndarray:
+        """Coriolis and centripetal torques c(q, qd) (N, n)."""
+        return self.inverse_dynamics(q, qd, None, g=np.zeros(3))
+
+    def end_effector_forces(self, q, Ftip) -> np.ndarray:
+        """Joint torques (N, n) that balance the end-effector wrench Ftip."""
+        return self.inverse_dynamics(q, None, None, g=np.zeros(3), Ftip=Ftip)
+
+    def forward_dynamics(self, q, qd, tau, g: Optional[Sequence[float]] = None, Ftip=None) -> np.ndarray:
+        """Joint accelerations (N, n) from torques: M(q)^-1 (tau - RNEA(q, qd, 0))."""
+        single = np.ndim(q) == 1
+        q, qd, tau = self._states(q, qd, tau)
+        Ad = self._adjoints(q)
+        rhs = tau - self._rnea(Ad, qd, np.zeros_like(q), g, Ftip)
+        qdd = np.linalg.solve(self._crba(Ad), rhs[..., None])[..., 0]
+        return qdd[0] if single else qdd
+
+    def simulate(self, q0, qd0, tau, dt: float, method: str = 'rk4', g: Optional[Sequence[float]] = None,
+                 Ftip=None):
+        """Integrate the forward dynamics with fixed steps under a torque history.
+
+        q0 and qd0 are one initial state (n,) or a batch (B, n) of initial conditions
+        (Monte-Carlo runs), all integrated together. tau holds one torque vector per step,
+        (steps, n) for every initial condition or (steps, B, n); Ftip, if given, broadcasts
+        the same way with 6 values. The outputs are allocated once and filled step by step.
+        Every dynamics evaluation computes the link transforms once and shares them between
+        the bias torques (RNEA) and the mass matrix (CRBA).
+
+        Methods:
+            'rk4': classic 4th order Runge-Kutta, four dynamics evaluations per step.
+            'semi_implicit': semi-implicit Euler, qd is updated first and the new qd moves q.
+                One evaluation per step and more stable than explicit Euler.
+            'euler': explicit Euler, as EulerStep.
+
+        Returns:
+            (q, qd) of shape (steps + 1, n), or (steps + 1, B, n) for a batch; index 0 is the
+            initial state.
+        """
+        if method not in ('rk4', 'semi_implicit', 'euler'):
+            raise ValueError(f"Unknown integration method '{method}'")
+        batched = np.ndim(q0) == 2
+        q0, qd0 = self._states(q0, qd0)
+        steps, B = len(tau), len(q0)
+        tau = np.asarray(tau, dtype=float)
+        tau = np.broadcast_to(tau[:, None] if tau.ndim == 2 else tau, (steps, B, self.n))
+        if Ftip is not None:
+            Ftip = np.asarray(Ftip, dtype=float)
+            Ftip = np.broadcast_to(Ftip[:, None] if Ftip.ndim == 2 else Ftip, (steps, B, 6))
+
+        q = np.empty((steps + 1, B, self.n))
+        qd = np.empty((steps + 1, B, self.n))
+        q[0], qd[0] = q0, qd0
+        for k in range(steps):
+            F = None if Ftip is None else Ftip[k]
+            x, v = q[k], qd[k]
+            if method == 'rk4':
+                a1 = self.forward_dynamics(x, v, tau[k], g, F)
+                v2 = v + 0.5 * dt * a1
+                a2 = self.forward_dynamics(x + 0.5 * dt * v, v2, tau[k], g, F)
+                v3 = v + 0.5 * dt * a2
+                a3 = self.forward_dynamics(x + 0.5 * dt * v2, v3, tau[k], g, F)
+                v4 = v + dt * a3
+                a4 = self.forward_dynamics(x + dt * v3, v4, tau[k], g, F)
+                q[k + 1] = x + dt / 6.0 * (v + 2.0 * v2 + 2.0 * v3 + v4)
+                qd[k + 1] = v + dt / 6.0 * (a1 + 2.0 * a2 + 2.0 * a3 + a4)
+            else:
+                qd[k + 1] = v + dt * self.forward_dynamics(x, v, tau[k], g, F)
+                q[k + 1] = x + dt * (qd[k + 1] if method == 'semi_implicit' else v)
+        if not batched:
+            return q[:, 0], qd[:, 0]
+        return q, qd
+
+    @staticmethod
+    def within_torque_limits(tau, limits) -> np.ndarray:
+        """True for every torque vector (..., n) with |tau| <= limits on all joints."""
+        return np.all(np.abs(tau) <= np.asarray(limits, dtype=float), axis=-1)
+
@@ -0,0 +1,146 @@
+__author__ = "Beck Isakov"
+__copyright__ = "Beck isakov"
+__contact__ = "https://github.com/Jp-Beck"
+__license__ = "GPL v3"
+__version__ = "0.2.0"
+__maintainer__ = "Beck Isakov"
+__email__ = "jp-beck@outlook.com"
+__status__ = "Development"
+
+from functools import lru_cache
+from typing import Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .analytic_ik import pose_to_transform
+from .robot_model import RobotModel, get_model
+from .rotation import matrix_to_axis_angle
+
+
+
+def screw_axes(rob: Union[str, RobotModel] = 'ur10') -> Tuple[np.ndarray, np.ndarray]:
+    """Home configuration M (4, 4) and space screw axes Slist (6, 6), one [w, v] row per joint.
+
+    Built once per model from its DH parameters (see RobotModel), so M equals the flange
+    pose the controller reports at zero joint angles.
+
+    Example:
+    >>> M, Slist = screw_axes('ur5')
+    >>> np.round(Slist[1], 6)
+    array([ 0.      , -1.      ,  0.      ,  0.089159, -0.      , -0.      ])
+    """
+    model = get_model(rob)
+    return model.M, model.Slist
+
+
+def transform_to_pose(T) -> np.ndarray:
+    """Transforms (..., 4, 4) to UR poses [x, y, z, rx, ry, rz] (..., 6), rotation vector angle in [0, pi]."""
+    T = np.asarray(T, dtype=float)
+    return np.concatenate([T[..., :3, 3], matrix_to_axis_angle(T[..., :3, :3])], axis=-1)
+
+
+class ForwardKinematics:
+    """Batched product-of-exponentials forward kinematics of one UR model.
+
+    The screw axes, their so(3) matrices and squares and the home configuration (with the
+    TCP offset folded in) are computed once. ``transforms()`` then evaluates the six joint
+    exponentials of all configurations with the closed-form Rodrigues formulas in a few
+    array operations and chains them with batched matrix products. Results are not rounded.
+
+    Example:
+    >>> fk = ForwardKinematics('ur10e', tcp=[0, 0, 0.15, 0, 0, 0])
+    >>> fk.transforms(q).shape      # q: (N, 6)
+    (N, 4, 4)
+    >>> fk.poses([0, -1.57, 1.57, 0, 1.57, 0])
+    array([-0.8386, -0.1744,  0.6735,  1.2096, -1.2086, -1.2086])
+
+    Args:
+        rob: robot model name, e.g. 'ur5' or 'ur10e', or a RobotModel.
+        tcp: TCP offset pose [x, y, z, rx, ry, rz], the flange is used without it.
+    """
+
+    def __init__(self, rob: Union[str, RobotModel] = 'ur10', tcp: Optional[Sequence[float]] = None):
+        self.model = get_model(rob)
+        self.rob = self.model.name
+        M, Slist = self.model.M, self.model.Slist
+        self.Slist = Slist
+        self.M = M if tcp is None else M @ pose_to_transform(tcp)
+        self.tcp = None if tcp is None else np.asarray(tcp, dtype=float)
+        w, v = Slist[:, :3], Slist[:, 3:]
+        K = np.zeros((6, 3, 3))
+        K[:, 0, 1], K[:, 0, 2] = -w[:, 2], w[:, 1]
+        K[:, 1, 0], K[:, 1, 2] = w[:, 2], -w[:, 0]
+        K[:, 2, 0], K[:, 2, 1] = -w[:, 1], w[:, 0]
+        self._K = K
+        self._K2 = K @ K
+        self._v = v
+        self._Kv = np.einsum('jab,jb->ja', K, v)
+        self._K2v = np.einsum('jab,jb->ja', self._K2, v)
+
+    def joint_exponentials(self, q) -> np.ndarray:
+        """exp([S_i] q_i) of every joint, (N, 6, 4, 4) for q of shape (N, 6)."""
+        q = np.asarray(q, dtype=float)
+        s, c = np.sin(q), 1.0 - np.cos(q)
+        E = np.zeros(q.shape + (4, 4))
+        E[..., :3, :3] = (np.eye(3) + s[..., None, None] * self._K + c[..., None, None] * self._K2)
+        # p = (I q + (1 - cos q) K + (q - sin q) K^2) v; all UR joints are revolute.
+        E[..., :3, 3] = (q[..., None] * self._v + c[..., None] * self._Kv + (q - s)[..., None] * self._K2v)
+        E[..., 3, 3] = 1.0
+        return E
+
+    def transforms(self, q) -> np.ndarray:
+        """TCP (or flange) transforms for joint vectors of shape (..., 6): (..., 4, 4)."""
+        E = self.joint_exponentials(q)
+        T = E[..., 0, :, :]
+        for i in range(1, 6):
+            T = T @ E[..., i, :, :]
+        return T @ self.M
+
+    def frames(self, q) -> np.ndarray:
+        """Cumulative products exp([S_1] q_1) ... exp([S_i] q_i) for i = 0..6: (..., 7, 4, 4).
+
+        Entry 0 is the identity and entry 6 times M is the TCP transform.
+        """
+        E = self.joint_exponentials(q)
+        frames = np.empty(E.shape[:-3] + (7, 4, 4))
+        frames[..., 0, :, :] = np.eye(4)
+        for i in range(6):
+            frames[..., i + 1, :, :] = frames[..., i, :, :] @ E[..., i, :, :]
+        return frames
+
+    def poses(self, q) -> np.ndarray:
+        """TCP (or flange) poses [x, y, z, rx, ry, rz] for joint vectors of shape (..., 6): (..., 6)."""
+        return transform_to_pose(self.transforms(q))
+
+    __call__ = transforms
+
+
+@lru_cache(maxsize=32)
+def _engine(model: RobotModel, tcp: Optional[Tuple[float, ...]]) -> ForwardKinematics:
+    return ForwardKinematics(model, tcp)
+
+
+def get_forward_kinematics(rob: Union[str, RobotModel] = 'ur10',
+                           tcp: Optional[Sequence[float]] = None) -> ForwardKinematics:
+    """Cached ForwardKinematics of a model and TCP offset, so the constants are built only once."""
+    return _engine(get_model(rob), None if tcp is None else tuple(float(x) for x in tcp))
+
+
+def forward_kinematics(q, rob: Union[str, RobotModel] = 'ur10', tcp: Optional[Sequence[float]] = None,
+                       as_pose: bool = False) -> np.ndarray:
+    """Forward kinematics of one (6,) or many (N, 6) joint vectors.
+
+    Example:
+    >>> forward_kinematics(np.zeros((1000, 6)), 'ur5').shape
+    (1000, 4, 4)
+    >>> forward_kinematics([0, -1.57, 1.57, 0, 1.57, 0], 'ur5', as_pose=True)
+    array([-0.4749, -0.1092,  0.4195,  1.2096, -1.2086, -1.2086])
+
+    Args:
+        q: joint positions, (6,) or (N, 6).
+        rob: robot model name or RobotModel.
+        tcp: TCP offset pose.
+        as_pose (bool): return (N, 6) poses instead of (N, 4, 4) transforms.
+    """
+    engine = get_forward_kinematics(rob, tcp)
+    return engine.poses(q) if as_pose else engine.transforms(q)
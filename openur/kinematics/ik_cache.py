@@ -0,0 +1,224 @@
+__author__ = "Beck Isakov"
+__copyright__ = "Beck isakov"
+__contact__ = "https://github.com/Jp-Beck"
+__license__ = "GPL v3"
+__version__ = "0.2.0"
+__maintainer__ = "Beck Isakov"
+__email__ = "jp-beck@outlook.com"
+__status__ = "Development"
+
+from collections import OrderedDict, namedtuple
+from typing import Optional, Sequence, Union
+import itertools
+import json
+import os
+import threading
+
+import numpy as np
+
+from .analytic_ik import inverse, pose_to_transform
+from .manipulation import FKinFixed, IKinFixed, MatrixLog6, TransInv
+from .robot_model import RobotModel, get_model
+
+IKCacheInfo = namedtuple('IKCacheInfo', ['hits', 'misses', 'seeded', 'failures', 'maxsize', 'currsize'])
+
+_NEIGHBOURS = np.array(list(itertools.product((-1, 0, 1), repeat=3)))
+
+
+def solve_numerical(pose, seed, rob: Union[str, RobotModel] = 'ur10', tcp: Optional[Sequence[float]] = None,
+                    wthresh: float = 0.001, vthresh: float = 0.0001):
+    """Newton-Raphson inverse kinematics of one pose from the seed, as Invkine_manip without the printout.
+
+    Returns (joints, converged): the last iterate, moved to the 2*pi turn closest to the seed,
+    and whether it reaches the pose within the thresholds.
+    """
+    model = get_model(rob)
+    T_sd = pose_to_transform(pose)
+    if tcp is not None:
+        T_sd = T_sd @ np.linalg.inv(pose_to_transform(tcp))
+    seed = np.asarray(seed, dtype=float)
+    q = IKinFixed(model.Slist, model.M, T_sd, seed, wthresh, vthresh)[-1]
+    # IKinFixed stops after 100 iterations whether it converged or not.
+    Vb = MatrixLog6(TransInv(FKinFixed(model.M, model.Slist, q)).dot(T_sd))[:, 0]
+    converged = np.linalg.norm(Vb[:3]) <= wthresh and np.linalg.norm(Vb[3:]) <= vthresh
+    return q - 2 * np.pi * np.round((q - seed) / (2 * np.pi)), bool(converged)
+
+
+class IKCache:
+    """Warm-start cache for repeated and nearby inverse kinematics targets.
+
+    Solutions are stored under the pose quantized to ``position_resolution`` (m) and
+    ``rotation_resolution`` (rad), together with the robot model, the TCP offset and the
+    configuration preference, and evicted least recently used beyond ``maxsize``. A repeated
+    target returns the stored joints without solving; the error of a hit is bounded by the
+    resolution. On a miss the Newton-Raphson solver is seeded from the nearest cached
+    solution of the same group, found through a spatial hash of the positions with cells of
+    ``neighbour_radius``; without a neighbour the seed is the closed-form solution of the
+    preferred configuration, or the given seed.
+
+    Example:
+    >>> cache = IKCache(maxsize=10000, path='ik_cache.json')
+    >>> q = cache.solve([0.5, -0.3, 0.4, 0, 3.14, 0], seed=rtde.actual_q(), rob='ur10')
+    >>> q = cache.solve([0.5, -0.3, 0.4, 0, 3.14, 0], seed=rtde.actual_q(), rob='ur10')   # hit
+    >>> cache.cache_info()
+    IKCacheInfo(hits=1, misses=1, seeded=0, failures=0, maxsize=10000, currsize=1)
+    >>> cache.save()
+
+    Args:
+        maxsize (int): number of cached solutions.
+        position_resolution, rotation_resolution (float): quantization of the pose key.
+        neighbour_radius (float): cell size (m) of the spatial hash used for warm starts.
+        rotation_weight (float): metres per radian when ranking neighbours.
+        path (str): JSON file the cache is loaded from (if it exists) and saved to.
+    """
+
+    def __init__(self, maxsize: int = 4096, position_resolution: float = 1e-4, rotation_resolution: float = 1e-3,
+                 neighbour_radius: float = 0.05, rotation_weight: float = 0.1, path: Optional[str] = None):
+        self.maxsize = maxsize
+        self.position_resolution = position_resolution
+        self.rotation_resolution = rotation_resolution
+        self.neighbour_radius = neighbour_radius
+        self.rotation_weight = rotation_weight
+        self.path = path
+        self._entries = OrderedDict()   # key -> (pose, joints)
+        self._cells = {}                # (group, cell) -> set of keys
+        self._lock = threading.Lock()
+        self._hits = self._misses = self._seeded = self._failures = 0
+        if path is not None and os.path.exists(path):
+            self.load(path)
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _group(rob, tcp, configuration):
+        name = get_model(rob).name
+        tcp = tuple(np.round(np.zeros(6) if tcp is None else np.asarray(tcp, dtype=float), 6).tolist())
+        return name, tcp, configuration
+
+    def _key(self, group, pose):
+        pose = np.asarray(pose, dtype=float)
+        cells = np.concatenate([np.round(pose[:3] / self.position_resolution),
+                                np.round(pose[3:] / self.rotation_resolution)])
+        return group, tuple(cells.astype(np.int64).tolist())
+
+    def _cell(self, pose):
+        return tuple(np.floor(np.asarray(pose[:3]) / self.neighbour_radius).astype(np.int64).tolist())
+
+    @staticmethod
+    def _unwrap(joints, seed):
+        # Hits and fresh solves are both moved to the 2*pi turn closest to the caller's seed.
+        if seed is None:
+            return joints.copy()
+        return joints - 2 * np.pi * np.round((joints - np.asarray(seed, dtype=float)) / (2 * np.pi))
+
+    def _store(self, key, pose, joints):
+        group = key[0]
+        if key in self._entries:
+            self._entries.move_to_end(key)
+        else:
+            self._cells.setdefault((group, self._cell(pose)), set()).add(key)
+        self._entries[key] = (pose, joints)
+        while len(self._entries) > self.maxsize:
+            old_key, (old_pose, _) = self._entries.popitem(last=False)
+            bucket = self._cells[(old_key[0], self._cell(old_pose))]
+            bucket.discard(old_key)
+            if not bucket:
+                del self._cells[(old_key[0], self._cell(old_pose))]
+
+    def nearest(self, pose, rob: Union[str, RobotModel] = 'ur10', tcp: Optional[Sequence[float]] = None,
+                configuration: Optional[int] = None):
+        """Joints of the closest cached pose within one hash cell in every direction, or None."""
+        group = self._group(rob, tcp, configuration)
+        pose = np.asarray(pose, dtype=float)
+        cell = np.array(self._cell(pose))
+        with self._lock:
+            candidates = [self._entries[key] for offset in _NEIGHBOURS
+                          for key in self._cells.get((group, tuple((cell + offset).tolist())), ())]
+        if not candidates:
+            return None
+        poses = np.array([p for p, _ in candidates])
+        R = pose_to_transform(poses)[:, :3, :3]
+        R_target = pose_to_transform(pose)[:3, :3]
+        cos = (np.einsum('nij,ij->n', R, R_target) - 1) / 2
+        distance = (np.linalg.norm(poses[:, :3] - pose[:3], axis=1)
+                    + self.rotation_weight * np.arccos(np.clip(cos, -1.0, 1.0)))
+        return candidates[int(np.argmin(distance))][1].copy()
+
+    def solve(self, pose, seed: Optional[Sequence[float]] = None, rob: Union[str, RobotModel] = 'ur10',
+              tcp: Optional[Sequence[float]] = None, configuration: Optional[int] = None) -> np.ndarray:
+        """Joint positions (6,) reaching the pose, from the cache or from a warm-started solve.
+
+        Args:
+            pose: target UR pose [x, y, z, rx, ry, rz] of the TCP.
+            seed: joint positions used as the start without a cached neighbour, zeros by default.
+            rob: robot model name or RobotModel.
+            tcp: TCP offset pose.
+            configuration: preferred closed-form branch (4 * shoulder + 2 * wrist + elbow, see
+                analytic_ik.inverse); solutions of different preferences are cached separately.
+        """
+        group = self._group(rob, tcp, configuration)
+        pose = np.asarray(pose, dtype=float)
+        key = self._key(group, pose)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return self._unwrap(entry[1], seed)
+            self._misses += 1
+
+        start = self.nearest(pose, rob, tcp, configuration)
+        if start is not None:
+            with self._lock:
+                self._seeded += 1
+        elif configuration is not None:
+            branch = inverse(pose, rob, tcp=tcp, q_near=seed)[0, configuration]
+            start = branch if not np.isnan(branch).any() else None
+        if start is None:
+            start = np.zeros(6) if seed is None else np.asarray(seed, dtype=float)
+
+        joints, converged = solve_numerical(pose, start, rob, tcp)
+        with self._lock:
+            if converged:
+                self._store(key, pose, joints)
+            else:
+                self._failures += 1
+        return self._unwrap(joints, seed)
+
+    def cache_info(self) -> IKCacheInfo:
+        """Hit, miss, warm-start and failed-solve counts, as functools.lru_cache reports them."""
+        with self._lock:
+            return IKCacheInfo(self._hits, self._misses, self._seeded, self._failures, self.maxsize,
+                               len(self._entries))
+
+    def clear(self):
+        """Drop all entries and reset the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self._cells.clear()
+            self._hits = self._misses = self._seeded = self._failures = 0
+
+    def save(self, path: Optional[str] = None):
+        """Write the entries, least recently used first, to a JSON file."""
+        path = path or self.path
+        if path is None:
+            raise ValueError('No path to save the IK cache to')
+        with self._lock:
+            entries = [{'rob': group[0], 'tcp': list(group[1]), 'configuration': group[2],
+                        'pose': pose.tolist(), 'joints': joints.tolist()}
+                       for (group, _), (pose, joints) in self._entries.items()]
+        with open(path, 'w') as f:
+            json.dump({'position_resolution': self.position_resolution,
+                       'rotation_resolution': self.rotation_resolution, 'entries': entries}, f)
+
+    def load(self, path: Optional[str] = None):
+        """Add the entries of a file written by save(); keys are rebuilt with this cache's resolution."""
+        path = path or self.path
+        with open(path) as f:
+            data = json.load(f)
+        with self._lock:
+            for entry in data['entries']:
+                group = (entry['rob'], tuple(entry['tcp']), entry['configuration'])
+                pose = np.array(entry['pose'], dtype=float)
+                self._store(self._key(group, pose), pose, np.array(entry['joints'], dtype=float))
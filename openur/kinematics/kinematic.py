@@ -25,35 +25,35 @@ __author__ = "Martin Huus Bjerge"
 __copyright__ = "Copyright 2017, Rope Robotics ApS, Denmark"
 __license__ = "MIT License"
 
-import ikpy  as ik
 import numpy as np
-import sympy as sp
-import math
-import scipy
-from scipy import linalg
 from .manipulation import *
+from .forward_kinematics import get_forward_kinematics
+from .pose import rotate_vectors
+from .rotation import axis_angle_to_matrix, matrix_to_axis_angle
+from .robot_model import get_model
 
 pi = np.pi
-# Disable the logging stream from ikpy
-ik.logs.manager.removeHandler(ik.logs.stream_handler)
+
 
 def Forwardkin_manip(joints,rob='ur10'):    
     '''
-    This function solves forward kinematics, it returns pose vector
+    This function solves forward kinematics, it returns pose vector rounded to 4 decimals.
+    Use forward_kinematics.forward_kinematics() for unrounded and batched results.
     '''
-    M,Slist = Robot_parameter_screw_axes(rob)
-    thetalist = joints
-    fk = FKinFixed(M, Slist, thetalist)
-    return np.round(Tran_Mat2Pose(Tran_Mat=fk),4)
+    return np.round(get_forward_kinematics(rob).poses(joints),4)
     
-def Invkine_manip(target_pos,init_joint_pos=[0,0,0, 0,0,0],rob='ur10',tcpOffset=[0,0,0, 0,0,0]):
+def Invkine_manip(target_pos,init_joint_pos=[0,0,0, 0,0,0],rob='ur10',tcpOffset=[0,0,0, 0,0,0],cache=None):
     '''
     A numerical inverse kinematics routine based on Newton-Raphson method.
     Takes a list of fixed screw axes (Slist) expressed in end-effector body frame, the end-effector zero
     configuration (M), the desired end-effector configuration (T_sd), an initial guess of joint angles
     (thetalist_init), and small positive scalar thresholds (wthresh, vthresh) controlling how close the
     final solution thetas must be to the desired thetas.
+    With an ik_cache.IKCache as cache, repeated targets are answered from the cache and new targets
+    are solved from the nearest cached solution instead of init_joint_pos (without the printout).
     '''
+    if cache is not None:
+        return list(cache.solve(target_pos, init_joint_pos, rob=rob, tcp=tcpOffset))
     M,Slist = Robot_parameter_screw_axes(rob)
     wthresh =0.001
     vthresh = 0.0001
@@ -148,94 +148,32 @@ def rotate_tcp(gradient_vec=[0,0,0]):
 def Robot_parameter_screw_axes(rob='ur10'):
     '''
     This function defines robot with fixed screw axes(used in manipulation.py)
-    rob='ur5'  : ur5
-    rob='ur10' : ur10
-    https://www.universal-robots.com/how-tos-and-faqs/faq/ur-faq/actual-center-of-mass-for-robot-17264/ 
-    '''
-    if str(rob).lower()=='ur5':
-        M_ur5 = [[1,0,0,-.81725],[0,0,-1,-.19145],[0,1,0,-.0055],[0,0,0,1]]
-        S1_ur5 = [0,0,1,0,0,0]
-        S2_ur5 = [0,-1,0,.089159,0,0]
-        S3_ur5 = [0,-1,0,.089159,0,.425]
-        S4_ur5 = [0,-1,0,.089159,0,.81725]
-        S5_ur5 = [0,0,-1,.10915,-.81725,0]  
-        S6_ur5 = [0,-1,0,-.0055,0,.81725]
-        Slist_ur5 = [S1_ur5,S2_ur5,S3_ur5,S4_ur5,S5_ur5,S6_ur5]
-        return M_ur5,Slist_ur5
-    elif str(rob).lower()=='ur10':
-        M_ur10 = [[1,0,0,-1.1843],[0,0,-1,-0.2561],[0,1,0,0.0116],[0,0,0,1]]
-        S1_ur10 = [0,0,1,0,0,0]
-        S2_ur10 = [0,-1,0,.1273,0,0]
-        S3_ur10 = [0,-1,0,.1273,0,.612]
-        S4_ur10 = [0,-1,0,.1273,0,1.1843]
-        S5_ur10 = [0,0,-1,.16394,-1.1843,0]  
-        S6_ur10 = [0,-1,0,0.01165,0,1.1843]
-        Slist_ur10 = [S1_ur10,S2_ur10,S3_ur10,S4_ur10,S5_ur10,S6_ur10]
-        return M_ur10,Slist_ur10
-    else:
-        print('Wrong robot selected')
-        return False
+    rob: model name ('ur3', 'ur5', 'ur10', 'ur3e', 'ur5e', 'ur10e', 'ur16e') or a RobotModel
+    Returns the home configuration M (4x4) and the screw axes Slist (6x6), built once per
+    model from its DH parameters (see robot_model.get_model).
+    '''
+    model = get_model(rob)
+    return model.M, model.Slist
     
 def Robot_DH_Numerical(rob='ur10',joint=[0,0,0,0,0,0]):
     '''
     This function returns the DH parameter of a robot
-    rob='ur5'  : ur5
-    rob='ur10' : ur10 
+    rob: model name or RobotModel
     joint: the robot joint vectors
     '''
-    j = joint
-    if str(rob).lower()=='ur5':
-        dh_ur=np.matrix([
-                        [0, pi/2, 0.089159,j[0]],
-                        [-0.425,0,0,j[1]],
-                        [-0.39225,0,0,j[2]],
-                        [0, pi/2, 0.10915,j[3]],
-                        [0, -pi/2, 0.09465,j[4]],
-                        [0, 0, 0.0823,j[5]]])
-        return dh_ur
-    elif str(rob).lower()=='ur10':
-        dh_ur=np.matrix([
-                        [0, pi/2, 0.1273,j[0]],
-                        [-0.612 ,0,0,j[1]],
-                        [-0.5723 ,0,0,j[2]],
-                        [0, pi/2, 0.163941 ,j[3]],
-                        [0, -pi/2, 0.1157 ,j[4]],
-                        [0, 0, 0.0922,j[5]]])
-        return dh_ur
-    else:
-        print('Wrong robot selected')
-        return         
+    return np.matrix(get_model(rob).dh_table(joint))
     
     
 def Robot_DH_Symbol(rob='ur10' ):
     '''
     This function returns the DH parameter of a robot
-    rob='ur5'  : ur5
-    rob='ur10' : ur10 
+    rob: model name or RobotModel
     '''
+    import sympy as sp
     # set up our joint angle symbols (6th angle doesn't affect any kinematics)
     q = [sp.Symbol('q%i'%ii) for ii in range(6)]
-    if str(rob).lower()=='ur5': 
-        dh_ur=np.matrix([
-                        [0, pi/2, 0.089159,q[0]],
-                        [-0.425,0,0,q[1]],
-                        [-0.39225,0,0,q[2]],
-                        [0, pi/2, 0.10915,q[3]],
-                        [0, -pi/2, 0.09465,q[4]],
-                        [0, 0, 0.0823,q[5]]])
-        return dh_ur
-    elif str(rob).lower()=='ur10':
-        dh_ur=np.matrix([
-                        [0, pi/2, 0.1273,q[0]],
-                        [-0.612 ,0,0,q[1]],
-                        [-0.5723 ,0,0,q[2]],
-                        [0, pi/2, 0.163941 ,q[3]],
-                        [0, -pi/2, 0.1157 ,q[4]],
-                        [0, 0, 0.0922,q[5]]])
-        return dh_ur
-    else:
-        print('Wrong robot selected')
-        return         
+    model = get_model(rob)
+    return np.matrix([[model.a[ii], model.alpha[ii], model.d[ii], q[ii]] for ii in range(6)])
 
 def TransMatrix_DH_Symbol(rob='ur10' ,joint_num=6):
     '''
@@ -244,6 +182,7 @@ def TransMatrix_DH_Symbol(rob='ur10' ,joint_num=6):
     rob='ur10' : ur10 
     joint_num: the transform matrix for joint_num (from 1 to 6) 
     '''
+    import sympy as sp
     T=[]
     # set up our joint angle symbols (6th angle doesn't affect any kinematics)
     q = [sp.Symbol('q%i'%ii) for ii in range(joint_num)]
@@ -306,6 +245,7 @@ def Jacobian_Symbol(rob='ur10' ,joint_num=6):
     This function returns a 6*6 symbolic jacobian matrix 
     Tx: transfermation matrix
     '''
+    import sympy as sp
     # set up our joint angle symbols (6th angle doesn't affect any kinematics) 
     q = [sp.Symbol('q%i'%ii) for ii in range(joint_num)] 
 
@@ -335,42 +275,24 @@ def Jacobian_Numerical(rob='ur10' ,joint=[0,0,0,0,0,0]):
     '''
     This function returns the numerical result of Jacobian
     joint: joint vector
-    J is from Jacobian_Symbol
-    '''
-    q0=joint[0]
-    q1=joint[1]
-    q2=joint[2]
-    q3=joint[3]
-    q4=joint[4]
-    q5=joint[5]
-    if str(rob).lower()=='ur5':
-        J = np.matrix([[0.0823*np.sin(q0)*np.sin(q4)*np.cos(q1 + q2 + q3)  - 0.09465*np.sin(q0)*np.sin(q1 + q2 + q3) + 0.425*np.sin(q0)*np.cos(q1) + 0.39225*np.sin(q0)*np.cos(q1 + q2)  + 0.0823*np.cos(q0)*np.cos(q4) + 0.10915*np.cos(q0),  0.0823*np.sin(q0)*np.cos(q4) + 0.10915*np.sin(q0) - 0.0823*np.sin(q4)*np.cos(q0)*np.cos(q1 + q2 + q3)  + 0.09465*np.sin(q1 + q2 + q3)*np.cos(q0) - 0.425*np.cos(q0)*np.cos(q1) - 0.39225*np.cos(q0)*np.cos(q1 + q2), 0, 0, 0, 1], 
-                       [ 0.425*np.sin(q1)*np.cos(q0) + 0.0823*np.sin(q4)*np.sin(q1 + q2 + q3)*np.cos(q0) + 0.39225*np.sin(q1 + q2)*np.cos(q0)  + 0.09465*np.cos(q0)*np.cos(q1 + q2 + q3), 0.425*np.sin(q0)*np.sin(q1) + 0.0823*np.sin(q0)*np.sin(q4)*np.sin(q1 + q2 + q3) + 0.39225*np.sin(q0)*np.sin(q1 + q2)  + 0.09465*np.sin(q0)*np.cos(q1 + q2 + q3) , -0.0823*np.sin(q4)*np.cos(q1 + q2 + q3)  + 0.09465*np.sin(q1 + q2 + q3) - 0.425*np.cos(q1) - 0.39225*np.cos(q1 + q2), 1, 0, 0], 
-                       [ 0.0823*np.sin(q4)*np.sin(q1 + q2 + q3)*np.cos(q0) + 0.39225*np.sin(q1 + q2)*np.cos(q0)  + 0.09465*np.cos(q0)*np.cos(q1 + q2 + q3), 0.0823*np.sin(q0)*np.sin(q4)*np.sin(q1 + q2 + q3) + 0.39225*np.sin(q0)*np.sin(q1 + q2)  + 0.09465*np.sin(q0)*np.cos(q1 + q2 + q3) , -0.0823*np.sin(q4)*np.cos(q1 + q2 + q3)  + 0.09465*np.sin(q1 + q2 + q3) - 0.39225*np.cos(q1 + q2), 1, 0, 0], 
-                       [(0.0823*np.sin(q4)*np.sin(q1 + q2 + q3)  + 0.09465*np.cos(q1 + q2 + q3))*np.cos(q0), (0.0823*np.sin(q4)*np.sin(q1 + q2 + q3) + 0.09465*np.cos(q1 + q2 + q3))*np.sin(q0), -0.0823*np.sin(q4)*np.cos(q1 + q2 + q3) + 0.09465*np.sin(q1 + q2 + q3), 1, 0, 0], 
-                       [-0.0823*(1.0*np.sin(q0) )*np.sin(q4) - 0.0823*np.cos(q0)*np.cos(q4)*np.cos(q1 + q2 + q3), 0.0823*( 1.0*np.cos(q0))*np.sin(q4) - 0.0823*np.sin(q0)*np.cos(q4)*np.cos(q1 + q2 + q3),  - 0.0823*np.sin(q1 + q2 + q3)*np.cos(q4), 0, 0, 1], 
-                       [0, 0, 0, 1, 0, 0]])
-    elif str(rob).lower()=='ur10':
-        J = np.matrix([[0.0922*np.sin(q0)*np.sin(q4)*np.cos(q1 + q2 + q3)  - 0.1157*np.sin(q0)*np.sin(q1 + q2 + q3) + 0.612*np.sin(q0)*np.cos(q1) + 0.5723*np.sin(q0)*np.cos(q1 + q2)  + 0.0922*np.cos(q0)*np.cos(q4) + 0.163941*np.cos(q0),  0.0922*np.sin(q0)*np.cos(q4) + 0.163941*np.sin(q0) - 0.0922*np.sin(q4)*np.cos(q0)*np.cos(q1 + q2 + q3)  + 0.1157*np.sin(q1 + q2 + q3)*np.cos(q0) - 0.612*np.cos(q0)*np.cos(q1) - 0.5723*np.cos(q0)*np.cos(q1 + q2), 0, 0, 0, 1], 
-                       [ 0.612*np.sin(q1)*np.cos(q0) + 0.0922*np.sin(q4)*np.sin(q1 + q2 + q3)*np.cos(q0) + 0.5723*np.sin(q1 + q2)*np.cos(q0)  + 0.1157*np.cos(q0)*np.cos(q1 + q2 + q3), 0.612*np.sin(q0)*np.sin(q1) + 0.0922*np.sin(q0)*np.sin(q4)*np.sin(q1 + q2 + q3) + 0.5723*np.sin(q0)*np.sin(q1 + q2)  + 0.1157*np.sin(q0)*np.cos(q1 + q2 + q3) , -0.0922*np.sin(q4)*np.cos(q1 + q2 + q3)  + 0.1157*np.sin(q1 + q2 + q3) - 0.612*np.cos(q1) - 0.5723*np.cos(q1 + q2), 1, 0, 0], 
-                       [ 0.0922*np.sin(q4)*np.sin(q1 + q2 + q3)*np.cos(q0) + 0.5723*np.sin(q1 + q2)*np.cos(q0) + 0.1157*np.cos(q0)*np.cos(q1 + q2 + q3), 0.0922*np.sin(q0)*np.sin(q4)*np.sin(q1 + q2 + q3) + 0.5723*np.sin(q0)*np.sin(q1 + q2)  + 0.1157*np.sin(q0)*np.cos(q1 + q2 + q3) , -0.0922*np.sin(q4)*np.cos(q1 + q2 + q3)  + 0.1157*np.sin(q1 + q2 + q3) - 0.5723*np.cos(q1 + q2), 1, 0, 0], 
-                       [(0.0922*np.sin(q4)*np.sin(q1 + q2 + q3)  + 0.1157*np.cos(q1 + q2 + q3))*np.cos(q0), (0.0922*np.sin(q4)*np.sin(q1 + q2 + q3)  + 0.1157*np.cos(q1 + q2 + q3))*np.sin(q0), -0.0922*np.sin(q4)*np.cos(q1 + q2 + q3)  + 0.1157*np.sin(q1 + q2 + q3), 1, 0, 0], 
-                       [-0.0922*(1.0*np.sin(q0) )*np.sin(q4) - 0.0922*np.cos(q0)*np.cos(q4)*np.cos(q1 + q2 + q3), 0.0922*( 1.0*np.cos(q0))*np.sin(q4) - 0.0922*np.sin(q0)*np.cos(q4)*np.cos(q1 + q2 + q3),  - 0.0922*np.sin(q1 + q2 + q3)*np.cos(q4), 0, 0, 1], 
-                       [0, 0, 0, 1, 0, 0]])
-    return J
+    Row ii is [dx, dy, dz]/dq[ii] of the flange followed by the constant orientation part
+    of Jacobian_Symbol, evaluated from the space Jacobian of the model.
+    '''
+    model = get_model(rob)
+    T = get_forward_kinematics(model).transforms(joint)
+    Js = FixedJacobianBatch(model.Slist, joint)
+    # linear velocity of the flange point p for each joint: v + w x p
+    linear = Js[3:].T + np.cross(Js[:3].T, T[:3,3])
+    J_orientation = [[0, 0, 1], [1, 0, 0], [1, 0, 0], [1, 0, 0], [0, 0, 1], [1, 0, 0]]
+    return np.matrix(np.hstack([linear, J_orientation]))
 
                     
 def RotatMatr2AxisAng(Matrix):
     '''
     Convert the rotation matrix to axis angle
     '''
-    R = Matrix
-    theta = np.arccos(0.5*(R[0,0]+R[1,1]+R[2,2]-1))  
-    e1 = (R[2,1]-R[1,2])/(2*np.sin(theta))
-    e2 = (R[0,2]-R[2,0])/(2*np.sin(theta))
-    e3 = (R[1,0]-R[0,1])/(2*np.sin(theta))    
-    axis_ang = np.array([theta*e1,theta*e2,theta*e3])    
-    return axis_ang
+    # Stable at 0 and pi, see rotation.matrix_to_axis_angle
+    return matrix_to_axis_angle(np.asarray(Matrix)[:3,:3])
     
 
 def AxisAng2RotaMatri(angle_vec):
@@ -379,27 +301,7 @@ def AxisAng2RotaMatri(angle_vec):
     AxisAng2Matrix(angle_vec)
     angle_vec need to be a 3D Axis angle  
     '''
-    theta = math.sqrt(angle_vec[0]**2+angle_vec[1]**2+angle_vec[2]**2)
-    if theta==0.:
-        return np.identity(3, dtype=float)
-    
-    cs = np.cos(theta)
-    si = np.sin(theta)
-    e1 = angle_vec[0]/theta
-    e2 = angle_vec[1]/theta
-    e3 = angle_vec[2]/theta
-            
-    R=np.zeros((3,3))
-    R[0,0] = (1-cs)*e1**2+cs
-    R[0,1] = (1-cs)*e1*e2-e3*si
-    R[0,2] = (1-cs)*e1*e3+e2*si
-    R[1,0] = (1-cs)*e1*e2+e3*si
-    R[1,1] = (1-cs)*e2**2+cs
-    R[1,2] = (1-cs)*e2*e3-e1*si
-    R[2,0] = (1-cs)*e1*e3-e2*si
-    R[2,1] = (1-cs)*e2*e3+e1*si
-    R[2,2] = (1-cs)*e3**2+cs  
-    return R
+    return axis_angle_to_matrix(np.asarray(angle_vec, dtype=float)[:3])
 
 
 def Rotat2TransMarix(Rota_Matrix,pose):
@@ -440,21 +342,22 @@ def cmpleate_rotation_matrix(start_vector):
     
     a = np.matrix(start_vector)
     a = a/ np.linalg.norm(a)   
-    U, s, Vh = linalg.svd(a, full_matrices=True)
+    U, s, Vh = np.linalg.svd(a, full_matrices=True)
 
     Vh[0] = a # to ensure that the virst vector is not -a
     Vh[2] = np.cross(a,Vh[1]) 
     Vh = np.transpose(Vh)
     return np.array(Vh)
    
-def Inverse_kin(target_pos,init_joint_pos=[0,0,0,0,0,0],tcpOffset=[0,0,0, 0,0,0]):
+def Inverse_kin(target_pos,init_joint_pos=[0,0,0,0,0,0],tcpOffset=[0,0,0, 0,0,0],rob='ur5'):
     '''
     Find the inverse kinematics
     target_pos = the target pos vector
     init_joint_pos (optional) = the initial joint vector
+    rob (optional) = model with a URDF file, its chain is parsed once and cached
     '''
-    # Define a robot from URDF file
-    my_chain = ik.chain.Chain.from_urdf_file('URDF/UR5.URDF')        
+    # Robot defined from its URDF file
+    my_chain = get_model(rob).chain
     #Convert pos to transfer matrix
     #Mar = Pose2Tran_Mat(target_pos)
 
@@ -483,12 +386,12 @@ def Inverse_kin(target_pos,init_joint_pos=[0,0,0,0,0,0],tcpOffset=[0,0,0, 0,0,0]
     
     return ikin[1:]
     
-def Forward_kin(joint):
+def Forward_kin(joint,rob='ur5'):
     '''
     Find the forward kinematics 
     '''
-    # Define a robot from URDF file
-    my_chain = ik.chain.Chain.from_urdf_file('URDF/UR5.URDF')
+    # Robot defined from its URDF file
+    my_chain = get_model(rob).chain
     # add a [0] in joint anlges, due to the defination of URDF
     joint_new = np.zeros([7])
     joint_new[1:] = joint[:]
@@ -507,14 +410,7 @@ def Vektor_from_Base_to_TCP(vectorBase,axisangle):
     vectorBase (np.array, 3*1): the vector to be rotated
     axisangle (np.array, 3*1): the axis angle between the base and the tcp
     """
-    # calculating the rotation angle by finding the length of the axis angle
-    angle=axisangle[0]*axisangle[0]+axisangle[1]*axisangle[1]+axisangle[2]*axisangle[2]
-    angle=np.sqrt(angle)
-    # Defining the unit rotation angle
-    eRot=axisangle/angle
-    # calculation of the tcp vector using Rodrigues' rotation formula
-    vectorBase = np.array(vectorBase)
-    vectorTCP= np.cos(angle)*vectorBase+np.sin(angle)*np.cross(eRot,vectorBase)+(1-np.cos(angle))*np.dot(eRot,vectorBase)*eRot
-    return vectorTCP
+    # Rodrigues' rotation formula, see pose.rotate_vectors for (N, 3) batches
+    return rotate_vectors(axisangle, vectorBase)
     
     
\ No newline at end of file
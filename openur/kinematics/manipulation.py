@@ -1,5 +1,8 @@
 import math
-from numpy import *
+from numpy import (allclose, array, asarray, concatenate, cos, cross, dot, einsum, eye, hstack, identity, isscalar,
+                   linalg, linspace, matmul, random, sin, vstack, zeros)
+
+from .rotation import axis_angle_to_matrix, matrix_to_axis_angle
 
 ### HELPER FUNCTIONS ###
 def randomVec(x):
@@ -167,10 +170,7 @@ def MatrixExp3(r):
     r = asarray(r)
     assert len(r) == 3, 'Not a 3-vector'
 
-    w_unit, theta = AxisAng3(r)
-    w_so3mat = VecToso3(w_unit)
-
-    R = identity(3) + math.sin(theta)*w_so3mat + (1-math.cos(theta))*dot(w_so3mat, w_so3mat)
+    R = axis_angle_to_matrix(r.flatten())
     assert is_rot_matrix(R), 'Did not produce a valid rotation matrix'
     return R
 
@@ -189,26 +189,8 @@ def MatrixLog3(R):
     R = asarray(R)
     assert is_rot_matrix(R), 'Not a valid rotation matrix'
 
-    if is_identity_matrix(R):
-        return zeros((3,1))
-
-    if trace(R) > -1.001 and trace(R) < -0.999:
-        theta = math.pi
-        c = max(diag(R))
-        if c == R[2,2]:
-            w_unit = array([[R[0,2]],[R[1,2]],[1+c]])*1/((2*(1+c))**0.5)
-            return w_unit*theta
-        elif c == R[1,1]:
-            w_unit = array([[R[0,1]],[1+c],[R[2,1]]])*1/((2*(1+c))**0.5)
-            return w_unit*theta
-        elif c == R[0,0]:
-            w_unit = array([[1+c],[R[1,0]],[R[2,0]]])*1/((2*(1+c))**0.5)
-            return w_unit*theta
-
-    theta = math.acos((trace(R)-1)/2)
-    w_so3mat = (R - R.T)/(2*math.sin(theta))
-    w_unit = normalize(so3ToVec(w_so3mat))
-    return w_unit*theta
+    # Exact near 0 and pi, see rotation.matrix_to_axis_angle
+    return matrix_to_axis_angle(R).reshape(3,1)
 
 
 def RpToTrans(R,p):
@@ -499,27 +481,13 @@ def MatrixLog6(T):
 
     R, p = TransToRp(T)
 
-    if is_identity_matrix(R):
-        w_unit = zeros((3,1))
-        vTheta = p
-        STheta = vstack((w_unit, p))
-        return STheta
-
-    if trace(R) > -1.001 and trace(R) < -0.999:
-        theta = math.pi
-        wTheta = MatrixLog3(R)
-        w_unit = wTheta/theta
-        w_so3mat = VecToso3(w_unit)
-        Ginv = identity(3)/theta - w_so3mat/2 + (1/theta - 1/(math.tan(theta/2)*2))*dot(w_so3mat,w_so3mat)
-        v_unit = dot(Ginv, p)
-        vTheta = v_unit*theta
-        STheta = vstack((wTheta, vTheta))
-        return STheta
-
-    theta = math.acos((trace(R)-1)/2)
-    w_so3mat = (R - R.T)/(2*math.sin(theta))
-    Ginv = identity(3)/theta - w_so3mat/2 + (1/theta - 1/(math.tan(theta/2)*2))*dot(w_so3mat,w_so3mat)
     wTheta = MatrixLog3(R)
+    theta = linalg.norm(wTheta)
+    if theta < 1e-12:
+        return vstack((zeros((3,1)), p))
+
+    w_so3mat = VecToso3(wTheta/theta)
+    Ginv = identity(3)/theta - w_so3mat/2 + (1/theta - 1/(math.tan(theta/2)*2))*dot(w_so3mat,w_so3mat)
     v_unit = dot(Ginv, p)
     vTheta = v_unit*theta
     STheta = vstack((wTheta, vTheta)) 
@@ -626,19 +594,7 @@ def FixedJacobian(Slist,thetalist):
               [  0.00000000e+00,   1.11022302e-16,  -5.00000000e+00],
               [  0.00000000e+00,   0.00000000e+00,  -1.00000000e-01]])
         '''
-    N = len(thetalist)
-    J = zeros((6,N))
-    Slist = asarray(Slist).T
-
-    J[:,0] = Slist[:,0]
-    for k in range(1,N):
-        c = MatrixExp6(Slist[:,0]*thetalist[0])
-        for i in range(k-1):        
-            nex = MatrixExp6(Slist[:,i+1]*thetalist[i+1])
-            c = dot(c, nex)
-        J[:,k] = dot(Adjoint(c), Slist[:,k])
-
-    return J
+    return FixedJacobianBatch(Slist, thetalist)
 
 
 def BodyJacobian(Blist,thetalist):
@@ -660,21 +616,130 @@ def BodyJacobian(Blist,thetalist):
               [ -6.12323400e-16,  -1.00000000e+00,   0.00000000e+00],
               [  0.00000000e+00,   0.00000000e+00,   1.00000000e-01]])
     '''
-    N = len(thetalist)
-    J = zeros((6,N))
-    Blist = asarray(Blist).T
+    return BodyJacobianBatch(Blist, thetalist)
 
-    J[:,N-1] = Blist[:,N-1]
-    for k in range(N-1):
-        c = MatrixExp6(-Blist[:,k+1]*thetalist[k+1])
-        for i in range(k+2, len(thetalist)):        
-            nex = MatrixExp6(-Blist[:,i]*thetalist[i])
-            c = dot(nex, c)
-        J[:,k] = dot(Adjoint(c), Blist[:,k])
 
+def AdjointBatch(T):
+    '''
+    Batched Adjoint: takes transformation matrices of shape (..., 4, 4) and returns their 6x6
+    adjoint representations, shape (..., 6, 6).
+    Example:
+
+    T = [[0.707,-0.707,0,5],[0.707,0.707,0,-4],[0,0,1,9],[0,0,0,1]]
+    allclose(AdjointBatch([T, T])[1], Adjoint(T))
+    >> True
+    '''
+    T = asarray(T, dtype=float)
+    R = T[..., :3, :3]
+    adT = zeros(T.shape[:-2] + (6, 6))
+    adT[..., :3, :3] = R
+    adT[..., 3:, 3:] = R
+    adT[..., 3:, :3] = matmul(_so3Batch(T[..., :3, 3]), R)
+    return adT
+
+
+def MatrixExp6Batch(Slist, thetas):
+    '''
+    Batched joint exponentials: takes n normalized screw axes (Slist, n x 6) and joint
+    coordinates of shape (..., n), and returns exp([S_i]*theta_i) for every joint, shape
+    (..., n, 4, 4). Revolute axes use the Rodrigues formulas, prismatic axes (w = 0) a
+    translation along v.
+    Example:
+
+    S = [[0,0,1,0,-3,2]]
+    allclose(MatrixExp6Batch(S, [[1.0]])[0, 0], MatrixExp6([0,0,1,0,-3,2]))
+    >> True
+    '''
+    Slist = asarray(Slist, dtype=float).reshape(-1, 6)
+    thetas = asarray(thetas, dtype=float)
+    w, v = Slist[:, :3], Slist[:, 3:]
+    K = _so3Batch(w)
+    K2 = matmul(K, K)
+    s, c = sin(thetas), 1 - cos(thetas)
+    s, c = s[..., None, None], c[..., None, None]
+    T = zeros(thetas.shape + (4, 4))
+    T[..., :3, :3] = eye(3) + s*K + c*K2
+    G = thetas[..., None, None]*eye(3) + c*K + (thetas[..., None, None] - s)*K2
+    T[..., :3, 3] = einsum('...ij,...j->...i', G, v)
+    T[..., 3, 3] = 1
+    return T
+
+
+def FixedJacobianBatch(Slist, thetas):
+    '''
+    Space Jacobian of one (n,) or many (..., n) joint configurations, shape (6, n) or (..., 6, n).
+    Same result as FixedJacobian, but the product exp([S_1]theta_1)...exp([S_k-1]theta_k-1) is
+    extended by one joint per column instead of recomputed from the first joint, so a
+    configuration takes n exponentials and the whole batch is evaluated at once.
+    Example:
+
+    thetas = random.uniform(-pi, pi, (10000, 6))
+    FixedJacobianBatch(Slist, thetas).shape
+    >> (10000, 6, 6)
+    '''
+    Slist = asarray(Slist, dtype=float)
+    thetas = asarray(thetas, dtype=float)
+    exps = MatrixExp6Batch(Slist, thetas)
+    n = len(Slist)
+    J = zeros(thetas.shape[:-1] + (6, n))
+    J[..., :, 0] = Slist[0]
+    c = exps[..., 0, :, :]
+    for k in range(1, n):
+        J[..., :, k] = _AdjointApply(c, Slist[k])
+        if k < n - 1:
+            c = matmul(c, exps[..., k, :, :])
+    return J
+
+
+def BodyJacobianBatch(Blist, thetas):
+    '''
+    Body Jacobian of one (n,) or many (..., n) joint configurations, shape (6, n) or (..., 6, n).
+    Same result as BodyJacobian; the product exp(-[B_n]theta_n)...exp(-[B_k+1]theta_k+1) is
+    extended by one joint per column, walking from the last joint to the first.
+    Example:
+
+    B1 = [0,0,-1,2,0,0]
+    B2 = [0,0,0,0,1,0]
+    B3 = [0,0,1,0,0,0.1]
+    BodyJacobianBatch([B1, B2, B3], [[math.pi/2, 3, math.pi]]*2).shape
+    >> (2, 6, 3)
+    '''
+    Blist = asarray(Blist, dtype=float)
+    thetas = asarray(thetas, dtype=float)
+    exps = MatrixExp6Batch(-Blist, thetas)
+    n = len(Blist)
+    J = zeros(thetas.shape[:-1] + (6, n))
+    J[..., :, n-1] = Blist[n-1]
+    c = exps[..., n-1, :, :]
+    for k in range(n-2, -1, -1):
+        J[..., :, k] = _AdjointApply(c, Blist[k])
+        if k > 0:
+            c = matmul(c, exps[..., k, :, :])
     return J
 
 
+def _so3Batch(w):
+    '''
+    Skew-symmetric matrices of 3-vectors of shape (..., 3): (..., 3, 3).
+    '''
+    w = asarray(w, dtype=float)
+    K = zeros(w.shape[:-1] + (3, 3))
+    K[..., 0, 1], K[..., 0, 2] = -w[..., 2], w[..., 1]
+    K[..., 1, 0], K[..., 1, 2] = w[..., 2], -w[..., 0]
+    K[..., 2, 0], K[..., 2, 1] = -w[..., 1], w[..., 0]
+    return K
+
+
+def _AdjointApply(T, S):
+    '''
+    [Ad_T] S for transforms of shape (..., 4, 4) without building the 6x6 matrices: (..., 6).
+    '''
+    R, p = T[..., :3, :3], T[..., :3, 3]
+    w = einsum('...ij,j->...i', R, S[:3])
+    v = cross(p, w) + einsum('...ij,j->...i', R, S[3:])
+    return concatenate([w, v], axis=-1)
+
+
 def IKinBody(Blist, M, T_sd, thetalist_init, wthresh, vthresh):
     '''
     A numerical inverse kinematics routine based on Newton-Raphson method.
@@ -860,23 +925,7 @@ def JointTrajectory(thetas_start, thetas_end, T, N, method='cubic'):
     assert isinstance(N, int), 'N must be an integer'
     assert method == 'cubic' or method == 'quintic', 'Incorrect time-scaling method argument'
 
-    trajectory = asarray(thetas_start)
-
-    if method == 'cubic':
-        for i in range(1,N):
-            t = i*float(T)/(N-1)
-            s = CubicTimeScaling(T,t)
-            thetas_s = asarray(thetas_start)*(1-s) + asarray(thetas_end)*s
-            trajectory = vstack((trajectory, thetas_s))
-        return trajectory
-
-    elif method == 'quintic':
-        for i in range(1,N):
-            t = i*float(T)/(N-1)
-            s = QuinticTimeScaling(T,t)
-            thetas_s = asarray(thetas_start)*(1-s) + asarray(thetas_end)*s
-            trajectory = vstack((trajectory, thetas_s))
-        return trajectory
+    return JointTrajectoryBatch(thetas_start, thetas_end, T, N, method)[0]
 
 
 def ScrewTrajectory(X_start, X_end, T, N, method='cubic'):
@@ -922,23 +971,7 @@ def ScrewTrajectory(X_start, X_end, T, N, method='cubic'):
     assert isinstance(N, int), 'N must be an integer'
     assert method == 'cubic' or method == 'quintic', 'Incorrect time-scaling method argument'
 
-    trajectory = X_start
-
-    if method == 'cubic':
-        for i in range(1,N):
-            t = i*float(T)/(N-1)
-            s = CubicTimeScaling(T,t)
-            X_s = X_start.dot(MatrixExp6(MatrixLog6(TransInv(X_start).dot(X_end))*s))
-            trajectory = vstack((trajectory, X_s))
-        return trajectory
-
-    elif method == 'quintic':
-        for i in range(1,N):
-            t = i*float(T)/(N-1)
-            s = QuinticTimeScaling(T,t)
-            X_s = X_start.dot(MatrixExp6(MatrixLog6(TransInv(X_start).dot(X_end))*s))
-            trajectory = vstack((trajectory, X_s))
-        return trajectory
+    return ScrewTrajectoryBatch(X_start, X_end, T, N, method)[0].reshape(4*N, 4)
 
 
 def CartesianTrajectory(X_start, X_end, T, N, method='cubic'):
@@ -985,27 +1018,134 @@ def CartesianTrajectory(X_start, X_end, T, N, method='cubic'):
     assert isinstance(N, int), 'N must be an integer'
     assert method == 'cubic' or method == 'quintic', 'Incorrect time-scaling method argument'
 
-    trajectory = X_start
+    return CartesianTrajectoryBatch(X_start, X_end, T, N, method)[0].reshape(4*N, 4)
+
+
+def TimeScalingBatch(T, t, method='cubic'):
+    '''
+    Vectorized CubicTimeScaling/QuinticTimeScaling: takes the total travel time T and an array of
+    times 0 <= t <= T and returns the path parameter s and its first and second time derivatives
+    sdot and sdotdot, each with the shape of t.
+    Example:
 
+    s, sdot, sdotdot = TimeScalingBatch(10, [0, 7, 10], 'quintic')
+    s
+    >> array([ 0.     ,  0.83692,  1.     ])
+    '''
+    t = asarray(t, dtype=float)
+    assert all((t >= 0) & (t <= T)), 'Invalid t'
+    assert method == 'cubic' or method == 'quintic', 'Incorrect time-scaling method argument'
+
+    tau = t/T
     if method == 'cubic':
-        for i in range(1,N):
-            t = i*float(T)/(N-1)
-            s = CubicTimeScaling(T,t)
-            p_s = (1-s)*p_start + s*p_end
-            R_s = R_start.dot(MatrixExp3(MatrixLog3(RotInv(R_start).dot(R_end))*s))
-            X_s = RpToTrans(R_s, p_s)
-            trajectory = vstack((trajectory, X_s))
-        return trajectory
-
-    elif method == 'quintic':
-        for i in range(1,N):
-            t = i*float(T)/(N-1)
-            s = QuinticTimeScaling(T,t)
-            p_s = (1-s)*p_start + s*p_end
-            R_s = R_start.dot(MatrixExp3(MatrixLog3(RotInv(R_start).dot(R_end))*s))
-            X_s = RpToTrans(R_s, p_s)
-            trajectory = vstack((trajectory, X_s))
-        return trajectory
+        s = 3*tau**2 - 2*tau**3
+        sdot = (6*tau - 6*tau**2)/T
+        sdotdot = (6 - 12*tau)/T**2
+    else:
+        s = 10*tau**3 - 15*tau**4 + 6*tau**5
+        sdot = (30*tau**2 - 60*tau**3 + 30*tau**4)/T
+        sdotdot = (60*tau - 180*tau**2 + 120*tau**3)/T**2
+    return s, sdot, sdotdot
+
+
+def _TrajectoryTimes(T, N, method):
+    assert N >= 2, 'N must be >= 2'
+    assert isinstance(N, int), 'N must be an integer'
+    return TimeScalingBatch(T, linspace(0, T, N), method)
+
+
+def JointTrajectoryBatch(thetas_start, thetas_end, T, N, method='cubic'):
+    '''
+    Vectorized JointTrajectory: evaluates the time scaling for all N instants at once and returns
+    the joint positions, velocities and accelerations, each an N x n matrix.
+    Example:
+
+    thetas, thetadots, thetadotdots = JointTrajectoryBatch([0.1]*6, [pi/2]*6, 10, 5001, 'quintic')
+    thetas.shape
+    >> (5001, 6)
+    '''
+    thetas_start = asarray(thetas_start, dtype=float)
+    thetas_end = asarray(thetas_end, dtype=float)
+    assert thetas_start.shape == thetas_end.shape, 'Incompatible thetas'
+
+    s, sdot, sdotdot = _TrajectoryTimes(T, N, method)
+    delta = thetas_end - thetas_start
+    thetas = thetas_start + s[:, None]*delta
+    return thetas, sdot[:, None]*delta, sdotdot[:, None]*delta
+
+
+def ScrewTrajectoryBatch(X_start, X_end, T, N, method='cubic'):
+    '''
+    Vectorized ScrewTrajectory: the screw log(X_start^-1 X_end) is computed once and all N
+    configurations are evaluated with one batched exponential. Returns the configurations
+    (N x 4 x 4) and the velocities and accelerations (N x 6) in the fixed frame, each row
+    [angular velocity, linear velocity of the frame origin].
+    Example:
+
+    X, V, A = ScrewTrajectoryBatch(X_start, X_end, 2, 1001, 'quintic')
+    X.shape, V.shape
+    >> ((1001, 4, 4), (1001, 6))
+    '''
+    X_start = asarray(X_start, dtype=float)
+    X_end = asarray(X_end, dtype=float)
+    TransToRp(X_start) #Just to ensure X_start is valid
+    TransToRp(X_end)   #Just to ensure X_end is valid
+
+    s, sdot, sdotdot = _TrajectoryTimes(T, N, method)
+    STheta = MatrixLog6(dot(TransInv(X_start), X_end)).flatten()
+    if linalg.norm(STheta) == 0:
+        X = zeros((N, 4, 4)) + X_start
+        return X, zeros((N, 6)), zeros((N, 6))
+
+    S, theta = AxisAng6(STheta)
+    S = S.flatten()
+    X = matmul(X_start, MatrixExp6Batch(S, (s*theta)[:, None])[:, 0])
+
+    # The body screw does not change along the motion, so the fixed-frame twist is
+    # [Ad_X_start] S theta scaled by sdot.
+    Vs = dot(AdjointBatch(X_start), S*theta)
+    w, v = Vs[:3], Vs[3:]
+    p = X[:, :3, 3]
+    pdot_unit = v + cross(w, p)
+    V = concatenate([sdot[:, None]*w, sdot[:, None]*pdot_unit], axis=1)
+    pdotdot = sdotdot[:, None]*pdot_unit + sdot[:, None]**2*cross(w, pdot_unit)
+    A = concatenate([sdotdot[:, None]*w, pdotdot], axis=1)
+    return X, V, A
+
+
+def CartesianTrajectoryBatch(X_start, X_end, T, N, method='cubic'):
+    '''
+    Vectorized CartesianTrajectory: the origin moves on a straight line and the rotation is
+    interpolated with SLERP about the constant axis of R_start^T R_end. Returns the
+    configurations (N x 4 x 4) and the velocities and accelerations (N x 6) in the fixed
+    frame, each row [angular velocity, linear velocity of the frame origin].
+    Example:
+
+    X, V, A = CartesianTrajectoryBatch(X_start, X_end, 10, 5001, 'cubic')
+    V[:, 3:]     # the straight-line velocity profile
+    '''
+    X_start = asarray(X_start, dtype=float)
+    X_end = asarray(X_end, dtype=float)
+    R_start, p_start = TransToRp(X_start)
+    R_end, p_end = TransToRp(X_end)
+
+    s, sdot, sdotdot = _TrajectoryTimes(T, N, method)
+    delta_p = (p_end - p_start).flatten()
+    r = MatrixLog3(dot(RotInv(R_start), R_end)).flatten()
+    theta = linalg.norm(r)
+    w_unit = r/theta if theta > 0 else zeros(3)
+    K = _so3Batch(w_unit)
+    angle = (s*theta)[:, None, None]
+
+    X = zeros((N, 4, 4))
+    X[:, :3, :3] = matmul(R_start, eye(3) + sin(angle)*K + (1 - cos(angle))*matmul(K, K))
+    X[:, :3, 3] = p_start.flatten() + s[:, None]*delta_p
+    X[:, 3, 3] = 1
+
+    w = dot(R_start, r)
+    V = concatenate([sdot[:, None]*w, sdot[:, None]*delta_p], axis=1)
+    A = concatenate([sdotdot[:, None]*w, sdotdot[:, None]*delta_p], axis=1)
+    return X, V, A
 
 
 ### end of HW4 functions #############################
@@ -1072,101 +1212,35 @@ def InverseDynamics(thetas, thetadots, thetadotdots, g, Ftip, M_rels, Glist, Sli
     Ftip = [0.,0.,0.,0.,0.,0.]
     '''
     assert len(thetas) == len(thetadots) == len(thetadotdots), 'Joint inputs mismatch'
-    Slist = asarray(Slist)
-    N = len(thetas) # no. of links
-    Ftip = asarray(Ftip)
-
-    # initialize iterables
-    Mlist = [0]*N
-    T_rels = [0]*N
-    Vlist = [0]*N
-    Vdotlist = [0]*N
-    Alist = [0]*N
-    Flist = [0]*N
-    Taulist = [0]*N
-
-    
-    Mlist[0] = M_rels[0]
-    for i in range(1, N):
-        Mlist[i] = Mlist[i-1].dot(M_rels[i])
-
-
-    for i in range(N):
-        Alist[i] = Adjoint(TransInv(Mlist[i])).dot(Slist[i])
-
-
-    for i in range(N):
-        T_rels[i] = M_rels[i].dot(MatrixExp6(Alist[i]*thetas[i]))
-
-
-    V0 = zeros((6,1))
-    Vlist[0] = V0
-
-    Vdot0 = -asarray([0,0,0]+g)
-    Vdotlist[0] = Vdot0
-
-    F_ip1 = asarray(Ftip).reshape(6,1)
+    return _Dynamics(M_rels, Glist, Slist).inverse_dynamics(thetas, thetadots, thetadotdots, g, Ftip)
 
-    # forward iterations
-    for i in range(1, N):
-        # print i
-        T_i_im1 = TransInv(T_rels[i]) #### should it be i-1???
 
-        Vlist[i] = Adjoint(T_i_im1).dot(Vlist[i-1]) + (Alist[i]*thetadots[i]).reshape(6,1)
-
-        Vdotlist[i] = Adjoint(T_i_im1).dot(Vdotlist[i-1]) + LieBracket(Vlist[i], Alist[i])*thetadots[i] + Alist[i]*thetadotdots[i]
-
-
-    # print T_rels
-    # print Vlist
-    # print Vdotlist
-    # print Alist
-
-    # backward iterations
-    for i in range(N-1,-1,-1):
-        T_ip1_i = TransInv(T_rels[i])
-        Flist[i] = (Adjoint(T_ip1_i).T).dot(F_ip1) + (Glist[i].dot(Vdotlist[i])).reshape(6,1) - TruthBracket(Vlist[i], Glist[i].dot(Vlist[i]))
-        Taulist[i] = (Flist[i].T).dot(Alist[i])
-
-    return asarray(Taulist).flatten()
+def _Dynamics(M_rels, Glist, Slist):
+    '''
+    Rigid-body dynamics engine (RNEA/CRBA) of the HW5 functions, see openur.kinematics.dynamics.
+    '''
+    from .dynamics import Dynamics
+    return Dynamics(M_rels, Glist, Slist)
 
 
 def InertiaMatrix(thetas, M_rels, Glist, Slist):
-    Slist = asarray(Slist)
-    N = len(thetas) # no. of links
-
-    M = zeros((N,N))
-
-    for i in range(N):
-        thetadotdots = [0]*N
-        thetadotdots[i] = 1
-        M[:, i] = InverseDynamics(thetas, [0]*6, thetadotdots, [0]*3, [0]*6, M_rels, Glist, Slist)
-
-    return M
+    return _Dynamics(M_rels, Glist, Slist).mass_matrix(thetas)
 
 
 def CoriolisForces(thetas, thetadots, M_rels, Glist, Slist):
-    C = InverseDynamics(thetas, thetadots, [0]*6, [0]*3, [0]*6, M_rels, Glist, Slist)
-    return C
+    return _Dynamics(M_rels, Glist, Slist).coriolis(thetas, thetadots)
 
 
 def GravityForces(thetas, g, M_rels, Glist, Slist):
-    Gvec = InverseDynamics(thetas, [0]*6, [0]*6, g, [0]*6, M_rels, Glist, Slist)
-    return Gvec
+    return _Dynamics(M_rels, Glist, Slist).gravity(thetas, g)
 
 
 def EndEffectorForces(Ftip, thetas, M_rels, Glist, Slist):
-    return InverseDynamics(thetas, [0]*6, [0]*6, [0]*3, Ftip, M_rels, Glist, Slist)
+    return _Dynamics(M_rels, Glist, Slist).end_effector_forces(thetas, Ftip)
 
 
 def ForwardDynamics(thetas, thetadots, taus, g, Ftip, M_rels, Glist, Slist):
-    M = InertiaMatrix(thetas, M_rels, Glist, Slist)
-    C = CoriolisForces(thetas, thetadots, M_rels, Glist, Slist)
-    Gvec = GravityForces(thetas, g, M_rels, Glist, Slist)
-    eeF = EndEffectorForces(Ftip, thetas, M_rels, Glist, Slist)
-
-    thetadotdots = (linalg.pinv(M)).dot(taus - C - Gvec - eeF)
-    return thetadotdots
+    return _Dynamics(M_rels, Glist, Slist).forward_dynamics(thetas, thetadots, taus, g, Ftip)
 
 
 def EulerStep(thetas_t, thetadots_t, thetadotdots_t, delt):
@@ -1181,32 +1255,13 @@ def EulerStep(thetas_t, thetadots_t, thetadotdots_t, delt):
 
 
 def InverseDynamicsTrajectory(thetas_traj, thetadots_traj, thetadotdots_traj, Ftip_traj, g, M_rels, Glist, Slist):
-    Np1 = len(thetas_traj)
-    # N = Np1-1
-    idtraj = []
-    for i in range(Np1):
-        taus = InverseDynamics(thetas_traj[i], thetadots_traj[i], thetadotdots_traj[i], g, Ftip_traj[i], M_rels, Glist, Slist)
-        idtraj.append(taus)
-
-    return asarray(idtraj)
-
-
-def ForwardDynamicsTrajectory(thetas_init, thetadots_init, tau_hist, delt, g, Ftip_traj, M_rels, Glist, Slist):   
-    Np1 = len(tau_hist)
-    thetas_traj = asarray(thetas_init)
-    thetadots_traj = asarray(thetadots_init)
-
-    for i in range(Np1):
-        thetadotdots_init = ForwardDynamics(thetas_init, thetadots_init, tau_hist[i], g, Ftip_traj[i], M_rels, Glist, Slist)
-        thetas_next, thetadots_next = EulerStep(thetas_init, thetadots_init, thetadotdots_init, delt)
-        # append new state
-        thetas_traj = hstack((thetas_traj, thetas_next))
-        thetadots_traj = hstack((thetadots_traj, thetadots_next))
-        # update initial conditions
-        thetas_init = thetas_next
-        thetadots_init = thetadots_next
-
-    return thetas_traj.reshape(Np1+1, len(thetas_init)), thetadots_traj.reshape(Np1+1, len(thetas_init))
+    # One RNEA pass over the whole (N, 6) trajectory
+    return _Dynamics(M_rels, Glist, Slist).inverse_dynamics(thetas_traj, thetadots_traj, thetadotdots_traj, g, Ftip_traj)
+
+
+def ForwardDynamicsTrajectory(thetas_init, thetadots_init, tau_hist, delt, g, Ftip_traj, M_rels, Glist, Slist, method='euler'):
+    # method: 'euler' (explicit, as EulerStep), 'semi_implicit' or 'rk4', see Dynamics.simulate
+    return _Dynamics(M_rels, Glist, Slist).simulate(thetas_init, thetadots_init, tau_hist, delt, method, g, Ftip_traj)
 
 
 ### end of HW5 functions #############################
\ No newline at end of file
@@ -0,0 +1,103 @@
+__author__ = "Beck Isakov"
+__copyright__ = "Beck isakov"
+__contact__ = "https://github.com/Jp-Beck"
+__license__ = "GPL v3"
+__version__ = "0.2.0"
+__maintainer__ = "Beck Isakov"
+__email__ = "jp-beck@outlook.com"
+__status__ = "Development"
+
+import numpy as np
+
+from .analytic_ik import pose_to_transform
+from .forward_kinematics import transform_to_pose
+from .rotation import axis_angle_to_matrix, matrix_to_axis_angle
+
+# Pose algebra of URScript (pose_add, pose_sub, pose_inv, pose_trans, pose_dist,
+# interpolate_pose) on arrays of UR poses [x, y, z, rx, ry, rz]. Every function accepts a
+# single pose (6,) or a batch (N, 6) and broadcasts like NumPy, so a pose can be combined
+# with a batch and a batch with a batch of the same length in one call.
+
+
+def _compose(P, R):
+    return np.concatenate([P, matrix_to_axis_angle(R)], axis=-1)
+
+
+def pose_add(p_1, p_2) -> np.ndarray:
+    """Sum of the positions and product of the rotations: p_3.P = p_1.P + p_2.P, p_3.R = p_1.R * p_2.R.
+
+    Example:
+    >>> pose_add([0.2, 0.5, 0.1, 1.57, 0, 0], [0.2, 0.5, 0.6, 1.57, 0, 0])
+    array([0.4 , 1.  , 0.7 , 3.14, 0.  , 0.  ])
+    """
+    p_1, p_2 = np.asarray(p_1, dtype=float), np.asarray(p_2, dtype=float)
+    R = axis_angle_to_matrix(p_1[..., 3:]) @ axis_angle_to_matrix(p_2[..., 3:])
+    return _compose(p_1[..., :3] + p_2[..., :3], R)
+
+
+def pose_sub(p_from, p_to) -> np.ndarray:
+    """Difference of the positions and the rotation p_from.R * inv(p_to.R), the inverse of pose_add."""
+    p_from, p_to = np.asarray(p_from, dtype=float), np.asarray(p_to, dtype=float)
+    R = axis_angle_to_matrix(p_from[..., 3:]) @ np.swapaxes(axis_angle_to_matrix(p_to[..., 3:]), -1, -2)
+    return _compose(p_from[..., :3] - p_to[..., :3], R)
+
+
+def pose_inv(p_from) -> np.ndarray:
+    """Inverse of the poses: the pose of the base in the frame of each pose."""
+    p_from = np.asarray(p_from, dtype=float)
+    Rt = np.swapaxes(axis_angle_to_matrix(p_from[..., 3:]), -1, -2)
+    return _compose(-(Rt @ p_from[..., :3, None])[..., 0], Rt)
+
+
+def pose_trans(p_from, p_from_to) -> np.ndarray:
+    """Pose transformation: p_from_to expressed in the frame p_from, T_from * T_from_to.
+
+    Example:
+    >>> tcp_poses = pose_trans(base_to_part, part_to_tcp)      # (N, 6) with (6,) or (N, 6)
+    """
+    return transform_to_pose(pose_to_transform(p_from) @ pose_to_transform(p_from_to))
+
+
+def pose_dist(p_from, p_to) -> np.ndarray:
+    """Distance between the positions of the poses, without the rotations (m)."""
+    p_from, p_to = np.asarray(p_from, dtype=float), np.asarray(p_to, dtype=float)
+    return np.linalg.norm(p_from[..., :3] - p_to[..., :3], axis=-1)
+
+
+def interpolate_pose(p_from, p_to, alpha) -> np.ndarray:
+    """Linear interpolation of the position and of the rotation (about a fixed axis) between two poses.
+
+    alpha is 0 at p_from and 1 at p_to and broadcasts against the poses, so one pair of poses
+    and an (N,) alpha gives N poses along the path.
+
+    Example:
+    >>> path = interpolate_pose(start, goal, np.linspace(0, 1, 100))     # (100, 6)
+    """
+    p_from, p_to = np.asarray(p_from, dtype=float), np.asarray(p_to, dtype=float)
+    alpha = np.asarray(alpha, dtype=float)[..., None]
+    R_from = axis_angle_to_matrix(p_from[..., 3:])
+    step = matrix_to_axis_angle(np.swapaxes(R_from, -1, -2) @ axis_angle_to_matrix(p_to[..., 3:]))
+    P = p_from[..., :3] + alpha * (p_to[..., :3] - p_from[..., :3])
+    return _compose(P, R_from @ axis_angle_to_matrix(alpha * step))
+
+
+def transform_points(poses, points, inverse: bool = False) -> np.ndarray:
+    """Map points (..., 3) from the frame of the poses to the base frame (R p + t), or back with inverse=True.
+
+    Example:
+    >>> cloud_base = transform_points(camera_pose, cloud_camera)     # (N, 3) point cloud
+    >>> cloud_tool = transform_points(tcp_pose, cloud_base, inverse=True)
+    """
+    poses, points = np.asarray(poses, dtype=float), np.asarray(points, dtype=float)
+    R = axis_angle_to_matrix(poses[..., 3:])
+    if inverse:
+        return ((points - poses[..., :3])[..., None, :] @ R)[..., 0, :]
+    return (R @ points[..., None])[..., 0] + poses[..., :3]
+
+
+def rotate_vectors(axis_angle, vectors) -> np.ndarray:
+    """Rotate vectors (..., 3) by axis-angle rotations (..., 3), Rodrigues' formula for whole batches.
+
+    This is Vektor_from_Base_to_TCP for arrays; use -axis_angle for the inverse rotation.
+    """
+    return (axis_angle_to_matrix(axis_angle) @ np.asarray(vectors, dtype=float)[..., None])[..., 0]
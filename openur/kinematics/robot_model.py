@@ -0,0 +1,197 @@
+__author__ = "Beck Isakov"
+__copyright__ = "Beck isakov"
+__contact__ = "https://github.com/Jp-Beck"
+__license__ = "GPL v3"
+__version__ = "0.2.0"
+__maintainer__ = "Beck Isakov"
+__email__ = "jp-beck@outlook.com"
+__status__ = "Development"
+
+from typing import Dict, List, Optional, Sequence, Union
+import threading
+
+import numpy as np
+
+pi = np.pi
+
+# Denavit-Hartenberg parameters published by Universal Robots (metres, radians).
+# https://www.universal-robots.com/articles/ur/application-installation/dh-parameters-for-calculations-of-kinematics-and-dynamics/
+ALPHA = np.array([pi / 2, 0, 0, pi / 2, -pi / 2, 0])
+UR_DH: Dict[str, Dict[str, np.ndarray]] = {
+    'ur3': {'d': np.array([0.1519, 0, 0, 0.11235, 0.08535, 0.0819]),
+            'a': np.array([0, -0.24365, -0.21325, 0, 0, 0])},
+    'ur5': {'d': np.array([0.089159, 0, 0, 0.10915, 0.09465, 0.0823]),
+            'a': np.array([0, -0.425, -0.39225, 0, 0, 0])},
+    'ur10': {'d': np.array([0.1273, 0, 0, 0.163941, 0.1157, 0.0922]),
+             'a': np.array([0, -0.612, -0.5723, 0, 0, 0])},
+    'ur3e': {'d': np.array([0.15185, 0, 0, 0.13105, 0.08535, 0.0921]),
+             'a': np.array([0, -0.24355, -0.2132, 0, 0, 0])},
+    'ur5e': {'d': np.array([0.1625, 0, 0, 0.1333, 0.0997, 0.0996]),
+             'a': np.array([0, -0.425, -0.3922, 0, 0, 0])},
+    'ur10e': {'d': np.array([0.1807, 0, 0, 0.17415, 0.11985, 0.11655]),
+              'a': np.array([0, -0.6127, -0.57155, 0, 0, 0])},
+    'ur16e': {'d': np.array([0.1807, 0, 0, 0.17415, 0.11985, 0.11655]),
+              'a': np.array([0, -0.4784, -0.36, 0, 0, 0])},
+}
+
+# All UR joints turn +-360 degrees, except the infinite wrist 3 of the CB3 UR3.
+JOINT_LIMITS = np.array([[-2 * pi] * 6, [2 * pi] * 6])
+_UR3_LIMITS = np.array([[-2 * pi] * 5 + [-np.inf], [2 * pi] * 5 + [np.inf]])
+
+# URDF files for the ikpy based functions, relative to the working directory.
+UR_URDF = {'ur5': 'URDF/UR5.URDF'}
+
+
+def dh_transform(theta, a, alpha, d) -> np.ndarray:
+    """Standard DH link transforms Rz(theta) Tz(d) Tx(a) Rx(alpha), broadcast over theta: (..., 4, 4)."""
+    theta = np.asarray(theta, dtype=float)
+    ct, st = np.cos(theta), np.sin(theta)
+    ca, sa = np.cos(alpha), np.sin(alpha)
+    T = np.zeros(theta.shape + (4, 4))
+    T[..., 0, 0] = ct
+    T[..., 0, 1] = -st * ca
+    T[..., 0, 2] = st * sa
+    T[..., 0, 3] = a * ct
+    T[..., 1, 0] = st
+    T[..., 1, 1] = ct * ca
+    T[..., 1, 2] = -ct * sa
+    T[..., 1, 3] = a * st
+    T[..., 2, 1] = sa
+    T[..., 2, 2] = ca
+    T[..., 2, 3] = d
+    T[..., 3, 3] = 1.0
+    return T
+
+
+def _ikpy():
+    """Import ikpy on first use, it is only needed for the URDF chains."""
+    import ikpy as ik
+    import ikpy.chain
+    # Disable the logging stream from ikpy
+    ik.logs.manager.removeHandler(ik.logs.stream_handler)
+    return ik
+
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    array.flags.writeable = False
+    return array
+
+
+class RobotModel:
+    """Kinematic constants of one 6-joint robot, computed once.
+
+    Holds the DH table, the home configuration M of the flange, the space and body screw
+    axes, the joint limits and, if a URDF file is given, the ikpy chain (loaded on first
+    use). Arrays are read-only so one model can be shared by every caller in the process;
+    use get_model() to get the shared instance of a UR model.
+
+    Example:
+    >>> model = get_model('ur5e')
+    >>> model.Slist.shape, model.joint_limits.shape
+    ((6, 6), (2, 6))
+    >>> custom = RobotModel('my_ur5', a=[0, -0.425, -0.392, 0, 0, 0], d=[0.163, 0, 0, 0.134, 0.1, 0.1])
+    >>> register_model(custom)
+
+    Args:
+        name (str): model name, the registry key.
+        a, d: DH link lengths and offsets (6 values each).
+        alpha: DH link twists, the UR twists by default.
+        joint_limits: (2, 6) lower and upper limits, +-2*pi by default.
+        urdf (str): URDF file for the ikpy chain.
+    """
+
+    def __init__(self, name: str, a: Sequence[float], d: Sequence[float], alpha: Optional[Sequence[float]] = None,
+                 joint_limits: Optional[np.ndarray] = None, urdf: Optional[str] = None):
+        self.name = str(name).lower()
+        self.a = _read_only(np.array(a, dtype=float))
+        self.d = _read_only(np.array(d, dtype=float))
+        self.alpha = _read_only(np.array(ALPHA if alpha is None else alpha, dtype=float))
+        if not (self.a.shape == self.d.shape == self.alpha.shape == (6,)):
+            raise ValueError('a, d and alpha must have 6 values')
+        limits = JOINT_LIMITS if joint_limits is None else joint_limits
+        self.joint_limits = _read_only(np.array(limits, dtype=float).reshape(2, 6))
+        self.urdf = urdf
+        self.M, self.Slist = self._screw_axes()
+        self.Blist = _read_only(self._body_axes())
+        self._chain = None
+        self._chain_lock = threading.Lock()
+
+    def __repr__(self):
+        return f"RobotModel({self.name!r})"
+
+    def _screw_axes(self):
+        T = np.eye(4)
+        Slist = np.zeros((6, 6))
+        for i in range(6):
+            # Joint i turns about z of DH frame i-1.
+            w, p = T[:3, 2], T[:3, 3]
+            Slist[i, :3] = w
+            Slist[i, 3:] = -np.cross(w, p)
+            T = T @ dh_transform(0.0, self.a[i], self.alpha[i], self.d[i])
+        return _read_only(T), _read_only(Slist)
+
+    def _body_axes(self):
+        # B_i = [Ad_M^-1] S_i
+        R, p = self.M[:3, :3].T, -self.M[:3, :3].T @ self.M[:3, 3]
+        w = self.Slist[:, :3] @ R.T
+        v = np.cross(p, w) + self.Slist[:, 3:] @ R.T
+        return np.hstack([w, v])
+
+    def dh_table(self, joints: Optional[Sequence[float]] = None) -> np.ndarray:
+        """DH table (6, 4) with the columns a, alpha, d, theta (theta = joints, or 0)."""
+        theta = np.zeros(6) if joints is None else np.asarray(joints, dtype=float)
+        return np.column_stack([self.a, self.alpha, self.d, theta])
+
+    def within_limits(self, q) -> np.ndarray:
+        """True for every joint vector (..., 6) inside the joint limits."""
+        q = np.asarray(q, dtype=float)
+        return np.all((q >= self.joint_limits[0]) & (q <= self.joint_limits[1]), axis=-1)
+
+    @property
+    def chain(self):
+        """The ikpy chain of the URDF file, parsed once on first use."""
+        if self._chain is None:
+            if self.urdf is None:
+                raise ValueError(f"Robot model '{self.name}' has no URDF file")
+            with self._chain_lock:
+                if self._chain is None:
+                    self._chain = _ikpy().chain.Chain.from_urdf_file(self.urdf)
+        return self._chain
+
+
+_MODELS: Dict[str, RobotModel] = {}
+_MODELS_LOCK = threading.Lock()
+
+
+def register_model(model: RobotModel, replace: bool = False) -> RobotModel:
+    """Add a model to the registry so get_model() and the kinematic functions accept its name."""
+    with _MODELS_LOCK:
+        if model.name in _MODELS and not replace:
+            raise ValueError(f"Robot model '{model.name}' is already registered")
+        _MODELS[model.name] = model
+    return model
+
+
+def get_model(rob: Union[str, RobotModel] = 'ur10') -> RobotModel:
+    """The shared RobotModel of a model name such as 'ur5' or 'ur10e'; a RobotModel is returned as is.
+
+    The UR models are built on first request and kept for the lifetime of the process.
+    """
+    if isinstance(rob, RobotModel):
+        return rob
+    name = str(rob).lower()
+    model = _MODELS.get(name)
+    if model is not None:
+        return model
+    if name not in UR_DH:
+        raise ValueError(f"Unknown robot model '{rob}', expected one of {available_models()}")
+    with _MODELS_LOCK:
+        if name not in _MODELS:
+            _MODELS[name] = RobotModel(name, UR_DH[name]['a'], UR_DH[name]['d'],
+                                       joint_limits=_UR3_LIMITS if name == 'ur3' else None, urdf=UR_URDF.get(name))
+        return _MODELS[name]
+
+
+def available_models() -> List[str]:
+    """Names of the built-in and registered models."""
+    return sorted(set(UR_DH) | set(_MODELS))
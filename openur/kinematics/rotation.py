@@ -0,0 +1,144 @@
+__author__ = "Beck Isakov"
+__copyright__ = "Beck isakov"
+__contact__ = "https://github.com/Jp-Beck"
+__license__ = "GPL v3"
+__version__ = "0.2.0"
+__maintainer__ = "Beck Isakov"
+__email__ = "jp-beck@outlook.com"
+__status__ = "Development"
+
+import numpy as np
+
+# Conversions between rotation vectors (axis * angle, the rotation part of a UR pose),
+# rotation matrices, unit quaternions [w, x, y, z] and roll-pitch-yaw angles, for arrays of
+# any leading shape (..., 3), (..., 3, 3) and (..., 4). They avoid divisions by sin(theta)
+# and arccos of the trace: the small angle limits come from np.sinc, matrices go through
+# the quaternion of the largest diagonal term (Shepperd's method), and angles from arctan2,
+# so rotations at 0 and pi convert as accurately as any other.
+
+
+def _skew(w):
+    K = np.zeros(w.shape[:-1] + (3, 3))
+    K[..., 0, 1], K[..., 0, 2] = -w[..., 2], w[..., 1]
+    K[..., 1, 0], K[..., 1, 2] = w[..., 2], -w[..., 0]
+    K[..., 2, 0], K[..., 2, 1] = -w[..., 1], w[..., 0]
+    return K
+
+
+def axis_angle_to_matrix(rvec) -> np.ndarray:
+    """Rotation vectors (..., 3) to rotation matrices (..., 3, 3), Rodrigues' formula.
+
+    Example:
+    >>> axis_angle_to_matrix([[0, 0, np.pi / 2], [0, 0, 0]]).round(3)
+    array([[[ 0., -1.,  0.],
+            [ 1.,  0.,  0.],
+            [ 0.,  0.,  1.]],
+    <BLANKLINE>
+           [[ 1.,  0.,  0.],
+            [ 0.,  1.,  0.],
+            [ 0.,  0.,  1.]]])
+    """
+    rvec = np.asarray(rvec, dtype=float)
+    theta = np.linalg.norm(rvec, axis=-1)[..., None, None]
+    K = _skew(rvec)
+    # R = I + sin(t)/t K + (1 - cos(t))/t^2 K^2, with sinc for the limits at t = 0
+    return (np.eye(3) + np.sinc(theta / np.pi) * K
+            + 0.5 * np.sinc(theta / (2 * np.pi)) ** 2 * (K @ K))
+
+
+def axis_angle_to_quaternion(rvec) -> np.ndarray:
+    """Rotation vectors (..., 3) to unit quaternions [w, x, y, z] (..., 4)."""
+    rvec = np.asarray(rvec, dtype=float)
+    theta = np.linalg.norm(rvec, axis=-1, keepdims=True)
+    # sin(t/2)/t = sinc(t/(2 pi))/2
+    return np.concatenate([np.cos(theta / 2), rvec * (0.5 * np.sinc(theta / (2 * np.pi)))], axis=-1)
+
+
+def quaternion_to_axis_angle(quat) -> np.ndarray:
+    """Quaternions [w, x, y, z] (..., 4) to rotation vectors (..., 3) with the angle in [0, pi]."""
+    quat = np.asarray(quat, dtype=float)
+    quat = quat / np.linalg.norm(quat, axis=-1, keepdims=True)
+    quat = np.where(quat[..., :1] < 0, -quat, quat)
+    w, v = quat[..., 0], quat[..., 1:]
+    s = np.linalg.norm(v, axis=-1)
+    theta = 2 * np.arctan2(s, w)
+    # theta / s tends to 2 / w for small rotations.
+    scale = np.where(s > 1e-12, theta / np.where(s > 1e-12, s, 1.0), 2.0 / np.maximum(w, 1e-12))
+    return v * scale[..., None]
+
+
+def matrix_to_quaternion(R) -> np.ndarray:
+    """Rotation matrices (..., 3, 3) to unit quaternions [w, x, y, z] (..., 4) with w >= 0."""
+    R = np.asarray(R, dtype=float)
+    r00, r01, r02 = R[..., 0, 0], R[..., 0, 1], R[..., 0, 2]
+    r10, r11, r12 = R[..., 1, 0], R[..., 1, 1], R[..., 1, 2]
+    r20, r21, r22 = R[..., 2, 0], R[..., 2, 1], R[..., 2, 2]
+    # Rows of 4 q q^T; the row of the largest diagonal term is the best conditioned.
+    Q = np.stack([
+        np.stack([1 + r00 + r11 + r22, r21 - r12, r02 - r20, r10 - r01], axis=-1),
+        np.stack([r21 - r12, 1 + r00 - r11 - r22, r01 + r10, r02 + r20], axis=-1),
+        np.stack([r02 - r20, r01 + r10, 1 - r00 + r11 - r22, r12 + r21], axis=-1),
+        np.stack([r10 - r01, r02 + r20, r12 + r21, 1 - r00 - r11 + r22], axis=-1),
+    ], axis=-2)
+    best = np.argmax(np.diagonal(Q, axis1=-2, axis2=-1), axis=-1)
+    quat = np.take_along_axis(Q, best[..., None, None], axis=-2)[..., 0, :]
+    quat = quat / np.linalg.norm(quat, axis=-1, keepdims=True)
+    return np.where(quat[..., :1] < 0, -quat, quat)
+
+
+def quaternion_to_matrix(quat) -> np.ndarray:
+    """Quaternions [w, x, y, z] (..., 4), normalized first, to rotation matrices (..., 3, 3)."""
+    quat = np.asarray(quat, dtype=float)
+    w, x, y, z = np.moveaxis(quat / np.linalg.norm(quat, axis=-1, keepdims=True), -1, 0)
+    return np.stack([
+        np.stack([1 - 2 * (y * y + z * z), 2 * (x * y - w * z), 2 * (x * z + w * y)], axis=-1),
+        np.stack([2 * (x * y + w * z), 1 - 2 * (x * x + z * z), 2 * (y * z - w * x)], axis=-1),
+        np.stack([2 * (x * z - w * y), 2 * (y * z + w * x), 1 - 2 * (x * x + y * y)], axis=-1),
+    ], axis=-2)
+
+
+def matrix_to_axis_angle(R) -> np.ndarray:
+    """Rotation matrices (..., 3, 3) to rotation vectors (..., 3) with the angle in [0, pi].
+
+    Example:
+    >>> matrix_to_axis_angle(axis_angle_to_matrix([np.pi - 1e-12, 0, 0]))
+    array([3.14159265, 0.        , 0.        ])
+    """
+    return quaternion_to_axis_angle(matrix_to_quaternion(R))
+
+
+def rpy_to_matrix(rpy) -> np.ndarray:
+    """Roll-pitch-yaw angles (..., 3) to rotation matrices Rz(yaw) Ry(pitch) Rx(roll) (..., 3, 3), as URScript."""
+    rpy = np.asarray(rpy, dtype=float)
+    cr, cp, cy = np.moveaxis(np.cos(rpy), -1, 0)
+    sr, sp, sy = np.moveaxis(np.sin(rpy), -1, 0)
+    return np.stack([
+        np.stack([cy * cp, cy * sp * sr - sy * cr, cy * sp * cr + sy * sr], axis=-1),
+        np.stack([sy * cp, sy * sp * sr + cy * cr, sy * sp * cr - cy * sr], axis=-1),
+        np.stack([-sp, cp * sr, cp * cr], axis=-1),
+    ], axis=-2)
+
+
+def matrix_to_rpy(R) -> np.ndarray:
+    """Rotation matrices (..., 3, 3) to roll-pitch-yaw angles (..., 3), pitch in [-pi/2, pi/2].
+
+    At pitch = +-pi/2 only roll - yaw (or roll + yaw) is defined; yaw is then set to 0.
+    """
+    R = np.asarray(R, dtype=float)
+    cos_pitch = np.hypot(R[..., 0, 0], R[..., 1, 0])
+    pitch = np.arctan2(-R[..., 2, 0], cos_pitch)
+    lock = cos_pitch < 1e-9
+    roll = np.where(lock, np.arctan2(-R[..., 2, 0] * R[..., 0, 1], R[..., 1, 1]),
+                    np.arctan2(R[..., 2, 1], R[..., 2, 2]))
+    yaw = np.where(lock, 0.0, np.arctan2(R[..., 1, 0], R[..., 0, 0]))
+    return np.stack([roll, pitch, yaw], axis=-1)
+
+
+def rpy2rotvec(rpy) -> np.ndarray:
+    """URScript rpy2rotvec for arrays: roll-pitch-yaw (..., 3) to rotation vectors (..., 3)."""
+    return matrix_to_axis_angle(rpy_to_matrix(rpy))
+
+
+def rotvec2rpy(rvec) -> np.ndarray:
+    """URScript rotvec2rpy for arrays: rotation vectors (..., 3) to roll-pitch-yaw (..., 3)."""
+    return matrix_to_rpy(axis_angle_to_matrix(rvec))
@@ -0,0 +1,142 @@
+__author__ = "Beck Isakov"
+__copyright__ = "Beck isakov"
+__contact__ = "https://github.com/Jp-Beck"
+__license__ = "GPL v3"
+__version__ = "0.2.0"
+__maintainer__ = "Beck Isakov"
+__email__ = "jp-beck@outlook.com"
+__status__ = "Development"
+
+from collections import deque
+from typing import Dict, Union
+import logging
+import threading
+import time
+
+
+class InputWriter:
+    """Coalesce RTDE input updates from many threads into one package per controller cycle.
+
+    Producers call stage() which only appends to a deque (no lock is taken). A single
+    writer thread drains the staged fields at most once per cycle, keeps the newest value
+    of every field and sends all of them in one input package.
+
+    Example:
+    >>> writer = InputWriter(rtde_commands, frequency=125)
+    >>> writer.start()
+    >>> writer.stage(input_double_register_0=1.0, input_int_register_0=2)
+    >>> writer.stats()
+    """
+
+    def __init__(self, rtde, frequency: float = 125):
+        self._rtde = rtde
+        self.period = 1.0 / frequency
+        self._staged = deque()
+        self._wakeup = threading.Event()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._stop = threading.Event()
+        self._thread = None
+
+        # Counters, only updated by the writer thread
+        self.staged_writes = 0
+        self.coalesced_writes = 0
+        self.packets_sent = 0
+        self.send_errors = 0
+        self.last_send_latency = None
+        self.max_send_latency = 0.0
+        self.total_send_latency = 0.0
+
+    def start(self):
+        if self.is_running():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='rtde-input-writer', daemon=True)
+        self._thread.start()
+        logging.info('RTDE input writer started ({:.0f} Hz)'.format(1.0 / self.period))
+
+    def stop(self, timeout: float = 1.0):
+        """Stop the writer thread after sending whatever is still staged."""
+        if not self.is_running():
+            return
+        self._stop.set()
+        self._wakeup.set()
+        self._thread.join(timeout)
+        self._thread = None
+        logging.info('RTDE input writer stopped')
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def stage(self, **fields: Union[int, float, bool]):
+        """Stage input fields for the next package. Never blocks."""
+        for item in fields.items():
+            self._staged.append(item)
+        self._idle.clear()
+        self._wakeup.set()
+
+    def flush(self, timeout: float = 1.0) -> bool:
+        """Wait until everything staged so far has been sent."""
+        self._wakeup.set()
+        return self._idle.wait(timeout)
+
+    def stats(self) -> Dict[str, Union[int, float, None]]:
+        return {
+            'staged_writes': self.staged_writes,
+            'coalesced_writes': self.coalesced_writes,
+            'packets_sent': self.packets_sent,
+            'send_errors': self.send_errors,
+            'last_send_latency': self.last_send_latency,
+            'max_send_latency': self.max_send_latency,
+            'mean_send_latency': self.total_send_latency / self.packets_sent if self.packets_sent else None,
+        }
+
+    def _drain(self) -> Dict[str, Union[int, float, bool]]:
+        fields = {}
+        count = 0
+        while True:
+            try:
+                name, value = self._staged.popleft()
+            except IndexError:
+                break
+            fields[name] = value
+            count += 1
+        self.staged_writes += count
+        self.coalesced_writes += count - len(fields)
+        return fields
+
+    def _send(self, fields):
+        start = time.perf_counter()
+        try:
+            success = self._rtde.send_inputs(fields)
+        except Exception as e:
+            logging.error(f"RTDE input writer failed to send {list(fields)}: {e}")
+            success = False
+        latency = time.perf_counter() - start
+        if success:
+            self.packets_sent += 1
+            self.last_send_latency = latency
+            self.total_send_latency += latency
+            self.max_send_latency = max(self.max_send_latency, latency)
+        else:
+            self.send_errors += 1
+
+    def _run(self):
+        next_flush = time.monotonic()
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            stopping = self._stop.is_set()
+            delay = next_flush - time.monotonic()
+            if delay > 0 and not stopping:
+                time.sleep(delay)
+            fields = self._drain()
+            if fields:
+                self._send(fields)
+                next_flush = time.monotonic() + self.period
+            if not self._staged:
+                self._idle.set()
+            else:
+                self._wakeup.set()
+            if stopping:
+                break
@@ -0,0 +1,98 @@
+__author__ = "Beck Isakov"
+__copyright__ = "Beck isakov"
+__contact__ = "https://github.com/Jp-Beck"
+__license__ = "GPL v3"
+__version__ = "0.2.0"
+__maintainer__ = "Beck Isakov"
+__email__ = "jp-beck@outlook.com"
+__status__ = "Development"
+
+from typing import Callable, Optional
+import logging
+import threading
+
+
+class OutputReader:
+    """Single owner of the RTDE output stream of one connection.
+
+    The reader thread is the only caller of the socket receive while it runs. Every data
+    package updates ``latest_data`` and the register banks and is passed to the listeners
+    (e.g. ProgramTracker.update); fetch_data(), the register banks and the status helpers
+    then wait for the next package from the reader instead of reading the socket
+    themselves.
+
+    Example:
+    >>> reader = rtde_commands.start_output_reader()
+    >>> reader.add_listener(lambda data: print(data.timestamp))
+    >>> rtde_commands.actual_q()    # served from the reader's next package
+    """
+
+    def __init__(self, rtde):
+        self._rtde = rtde
+        self._listeners = []
+        self._new_data = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+
+        # Counters, only updated by the reader thread
+        self.packages = 0
+        self.receive_errors = 0
+
+    def start(self):
+        if self.is_running():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='rtde-output-reader', daemon=True)
+        self._thread.start()
+        logging.info('RTDE output reader started')
+
+    def stop(self, timeout: float = 1.0):
+        if not self.is_running():
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+        with self._new_data:
+            self._new_data.notify_all()
+        logging.info('RTDE output reader stopped')
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def add_listener(self, callback: Callable):
+        """Call callback(data) from the reader thread for every data package."""
+        if callback not in self._listeners:
+            self._listeners = self._listeners + [callback]
+
+    def remove_listener(self, callback: Callable):
+        self._listeners = [listener for listener in self._listeners if listener != callback]
+
+    def wait_next(self, timeout: Optional[float] = 1.0):
+        """Wait for the next data package received by the reader. Returns None on timeout or stop."""
+        with self._new_data:
+            packages = self.packages
+            if not self._new_data.wait_for(lambda: self.packages != packages or self._stop.is_set(), timeout):
+                return None
+            return self._rtde.latest_data if self.packages != packages else None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                data = self._rtde.receive_package()
+            except Exception as e:
+                self.receive_errors += 1
+                logging.error(f"RTDE output reader could not receive data: {e}")
+                self._stop.wait(0.1)
+                continue
+            if data is None:
+                continue
+            self._rtde.outputs.update(data)
+            self._rtde.inputs.update(data)
+            for listener in self._listeners:
+                try:
+                    listener(data)
+                except Exception as e:
+                    logging.error(f"RTDE output listener {listener} failed: {e}")
+            with self._new_data:
+                self.packages += 1
+                self._new_data.notify_all()
@@ -0,0 +1,229 @@
+__author__ = "Beck Isakov"
+__copyright__ = "Beck isakov"
+__contact__ = "https://github.com/Jp-Beck"
+__license__ = "GPL v3"
+__version__ = "0.2.0"
+__maintainer__ = "Beck Isakov"
+__email__ = "jp-beck@outlook.com"
+__status__ = "Development"
+
+from concurrent.futures import Future
+from typing import Optional
+import logging
+import threading
+import time
+
+PROGRAM_RUNNING_BIT = 1 << 1        # robot_status_bits
+STOPPED_DUE_TO_SAFETY_BIT = 1 << 10  # safety_status_bits
+
+# Output recipe fields the tracker needs besides the bit registers.
+STATUS_FIELDS = (('robot_status_bits', 'UINT32'), ('safety_status_bits', 'UINT32'))
+
+# Final states of a ProgramRun
+FINISHED = 'finished'
+ERROR = 'error'
+SAFETY_STOP = 'safety_stop'
+NOT_STARTED = 'not_started'
+ABORTED = 'aborted'
+
+
+class ProgramRun(Future):
+    """Future of one program sent to the controller, resolved with its final state.
+
+    The result is one of 'finished', 'error' (stopped before writing the finished
+    register), 'safety_stop', 'not_started' (no start edge within the start timeout) or
+    'aborted' (replaced by another program or aborted by the caller).
+
+    Example:
+    >>> run = rtc.send_program('movej([0, -1.57, 1.57, 0, 0, 0])')
+    >>> run.wait_started(2.0)
+    True
+    >>> run.result(timeout=30)
+    'finished'
+    >>> run.start_latency, run.run_time
+    (0.0172, 4.2081)
+    """
+
+    def __init__(self, name: str = '', start_timeout: float = 5.0):
+        super().__init__()
+        self.name = name
+        self.start_timeout = start_timeout
+        self.submitted_at = time.monotonic()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._started = threading.Event()
+        # Set when the start register was already high at submission, e.g. after an aborted program.
+        self._dirty = False
+        self._stopped_packages = 0
+
+    def __repr__(self):
+        state = self.result() if self.done() else ('running' if self.started_at is not None else 'pending')
+        return f"ProgramRun({self.name!r}, {state})"
+
+    @property
+    def start_latency(self) -> Optional[float]:
+        """Seconds from submission until the start register was seen."""
+        if self.started_at is None:
+            return None
+        return self.started_at - self.submitted_at
+
+    @property
+    def run_time(self) -> Optional[float]:
+        """Seconds from the start edge until the program finished or stopped."""
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+    def wait_started(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the start edge. Returns False on timeout or if the program never started."""
+        self._started.wait(timeout)
+        return self.started_at is not None
+
+    def _start(self, now: float):
+        self.started_at = now
+        self._started.set()
+
+    def _finish(self, state: str, now: float):
+        self.finished_at = now
+        self._started.set()
+        self.set_result(state)
+
+
+class ProgramTracker:
+    """Resolve ProgramRun futures from register and status-bit edges of one RTDE stream.
+
+    Programs sent with RealTimeClient.send_program() write the start register when they
+    begin and the finished register as their last statement. Every data package of the
+    stream is fed to update(), which only compares it against the previous one:
+
+    - start register rising (finished register low): the program started,
+    - finished register rising: the program finished,
+    - stopped_due_to_safety set: safety stop,
+    - program_running low for ``stop_packages`` packages without the finished register: error.
+
+    start() registers update() as a listener of the connection's output reader, which is
+    the single owner of the RTDE receive; update() can also be fed directly by whoever
+    owns the stream. No extra RTDE receive is made per check.
+
+    Example:
+    >>> tracker = ProgramTracker(rtde_commands)
+    >>> tracker.add_recipe_fields()  # before rtde_commands.connect()
+    >>> rtde_commands.connect()
+    >>> tracker.start()
+    >>> run = tracker.track('pick')
+    >>> run.result(timeout=10)
+    'finished'
+
+    Args:
+        rtde (RTDECommands): connection providing the data packages.
+        start_bit (int): output bit register written when the program starts.
+        finish_bit (int): output bit register written when the program finishes.
+        start_timeout (float): default seconds to wait for the start edge.
+        stop_packages (int): packages with program_running low before a started program
+            that did not finish counts as stopped with an error.
+    """
+
+    def __init__(self, rtde, start_bit: int = 0, finish_bit: int = 1, start_timeout: float = 5.0,
+                 stop_packages: int = 3):
+        if not (0 <= start_bit < 32 and 0 <= finish_bit < 32):
+            raise ValueError('start_bit and finish_bit must be output bit registers 0-31')
+        self._rtde = rtde
+        self.start_bit = start_bit
+        self.finish_bit = finish_bit
+        self.start_timeout = start_timeout
+        self.stop_packages = stop_packages
+        self.current: Optional[ProgramRun] = None
+        self.packages = 0
+        self.started = False
+        self.finished = False
+        self.program_running = False
+        self.safety_stopped = False
+        self._lock = threading.Lock()
+        self._reader = None
+
+    def add_recipe_fields(self):
+        """Add the bit registers and status bits to the output recipe, before connecting."""
+        self._rtde.add_register_fields('output', 'bit', 0, 32)
+        for name, data_type in STATUS_FIELDS:
+            if name not in self._rtde.output_names:
+                self._rtde.output_names.append(name)
+                self._rtde.output_types.append(data_type)
+
+    def start(self):
+        """Feed every package of the connection's output reader to update(), starting the reader."""
+        if self.is_running():
+            return
+        self._reader = self._rtde.start_output_reader()
+        self._reader.add_listener(self.update)
+
+    def stop(self):
+        """Stop receiving packages; the output reader keeps running for its other users."""
+        if self._reader is None:
+            return
+        self._reader.remove_listener(self.update)
+        self._reader = None
+
+    def is_running(self) -> bool:
+        return self._reader is not None and self._reader.is_running()
+
+    def track(self, name: str = '', start_timeout: Optional[float] = None) -> ProgramRun:
+        """Create the future of a program about to be sent. A program still tracked is aborted."""
+        run = ProgramRun(name, self.start_timeout if start_timeout is None else start_timeout)
+        with self._lock:
+            self._abort(time.monotonic())
+            run._dirty = self.started and not self.finished
+            self.current = run
+        return run
+
+    def abort(self):
+        """Resolve the tracked program as 'aborted', e.g. after stopping it."""
+        with self._lock:
+            self._abort(time.monotonic())
+
+    def _abort(self, now: float):
+        if self.current is not None and not self.current.done():
+            self.current._finish(ABORTED, now)
+
+    def update(self, data, now: Optional[float] = None):
+        """Process one RTDE data package."""
+        now = time.monotonic() if now is None else now
+        bits = data.output_bit_registers0_to_31
+        started = bool(bits >> self.start_bit & 1)
+        finished = bool(bits >> self.finish_bit & 1)
+        running = bool(data.robot_status_bits & PROGRAM_RUNNING_BIT)
+        safety_stopped = bool(data.safety_status_bits & STOPPED_DUE_TO_SAFETY_BIT)
+        with self._lock:
+            finish_edge = finished and not self.finished
+            run = self.current
+            if run is not None and not run.done():
+                if run.started_at is None:
+                    if finish_edge:
+                        # Started and finished between two packages.
+                        run._start(now)
+                    elif started and not finished and (not run._dirty or (running and not self.program_running)):
+                        run._start(now)
+                    elif now - run.submitted_at > run.start_timeout:
+                        logging.error(f"Program '{run.name}' did not start within {run.start_timeout}s")
+                        run._finish(NOT_STARTED, now)
+                if run.started_at is not None and not run.done():
+                    self._check_running(run, finish_edge, running, safety_stopped, now)
+            self.packages += 1
+            self.started = started
+            self.finished = finished
+            self.program_running = running
+            self.safety_stopped = safety_stopped
+
+    def _check_running(self, run: ProgramRun, finish_edge: bool, running: bool, safety_stopped: bool, now: float):
+        if finish_edge:
+            logging.info(f"Program '{run.name}' finished")
+            run._finish(FINISHED, now)
+        elif safety_stopped:
+            logging.error(f"Program '{run.name}' stopped due to safety")
+            run._finish(SAFETY_STOP, now)
+        elif not running:
+            run._stopped_packages += 1
+            if run._stopped_packages >= self.stop_packages:
+                logging.error(f"Program '{run.name}' stopped but did not finish")
+                run._finish(ERROR, now)
+        else:
+            run._stopped_packages = 0
@@ -0,0 +1,184 @@
+__author__ = "Beck Isakov"
+__copyright__ = "Beck isakov"
+__contact__ = "https://github.com/Jp-Beck"
+__license__ = "GPL v3"
+__version__ = "0.2.0"
+__maintainer__ = "Beck Isakov"
+__email__ = "jp-beck@outlook.com"
+__status__ = "Development"
+
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+# kind: (rtde type, numpy dtype, number of registers)
+REGISTER_KINDS = {
+    'int': ('INT32', np.int32, 48),
+    'double': ('DOUBLE', np.float64, 48),
+    'bit': ('BOOL', np.bool_, 128),
+}
+
+# Bit registers 0-63 are exchanged as two packed UINT32 words, 64-127 as single BOOL fields.
+PACKED_BIT_WORDS = (('bit_registers0_to_31', 0), ('bit_registers32_to_63', 32))
+
+
+def register_fields(direction: str, kind: str, start: int = 0, stop: Optional[int] = None) -> Tuple[List[str], List[str]]:
+    """Return the recipe field names and types covering registers [start, stop).
+
+    Example:
+    >>> register_fields('output', 'double', 0, 2)
+    (['output_double_register_0', 'output_double_register_1'], ['DOUBLE', 'DOUBLE'])
+    >>> register_fields('input', 'bit', 30, 66)
+    (['input_bit_registers0_to_31', 'input_bit_registers32_to_63', 'input_bit_register_64', 'input_bit_register_65'], ['UINT32', 'UINT32', 'BOOL', 'BOOL'])
+
+    Args:
+        direction (str): 'input' or 'output'.
+        kind (str): 'int', 'double' or 'bit'.
+        start (int): first register number.
+        stop (int): one past the last register number, defaults to the end of the bank.
+    """
+    if direction not in ('input', 'output'):
+        raise ValueError("direction must be 'input' or 'output'")
+    if kind not in REGISTER_KINDS:
+        raise ValueError("kind must be one of {}".format(list(REGISTER_KINDS)))
+    rtde_type, _, size = REGISTER_KINDS[kind]
+    stop = size if stop is None else stop
+    if not 0 <= start < stop <= size:
+        raise ValueError("register range must be within [0, {}]".format(size))
+
+    names, types = [], []
+    if kind == 'bit':
+        for word, offset in PACKED_BIT_WORDS:
+            if start < offset + 32 and stop > offset:
+                names.append(f'{direction}_{word}')
+                types.append('UINT32')
+        start = max(start, 64)
+    for x in range(start, stop):
+        names.append(f'{direction}_{kind}_register_{x}')
+        types.append(rtde_type)
+    return names, types
+
+
+class RegisterBank:
+    """All registers of one kind (int, double or bit) in one direction as a NumPy array.
+
+    The bank always spans the full register range, so it is indexed with the register
+    number itself, e.g. ``outputs.double[0:24]`` returns registers 0 to 23. Registers that
+    are not part of the output recipe keep their initial value (0, NaN or False).
+
+    Reading refreshes the bank from one RTDE data package and returns a view of
+    ``values``. Writing (input registers only) updates the matching fields of the input
+    recipe and sends them to the controller in a single package.
+    """
+
+    def __init__(self, rtde, direction: str, kind: str):
+        rtde_type, dtype, size = REGISTER_KINDS[kind]
+        self._rtde = rtde
+        self.direction = direction
+        self.kind = kind
+        self.values = np.full(size, np.nan) if kind == 'double' else np.zeros(size, dtype=dtype)
+        self._read_fields = self._subscribed(rtde.output_names)
+
+    def __repr__(self):
+        return f"RegisterBank({self.direction}.{self.kind}, {len(self._read_fields[0]) + len(self._read_fields[1])} fields)"
+
+    def __len__(self):
+        return len(self.values)
+
+    def _subscribed(self, recipe_names):
+        """Split the recipe names into (positions, names) of plain registers and (names, offsets) of packed words."""
+        positions, names = [], []
+        for x in range(len(self.values)):
+            name = f'{self.direction}_{self.kind}_register_{x}'
+            if name in recipe_names:
+                positions.append(x)
+                names.append(name)
+        words = []
+        if self.kind == 'bit':
+            words = [(f'{self.direction}_{word}', offset) for word, offset in PACKED_BIT_WORDS
+                     if f'{self.direction}_{word}' in recipe_names]
+        return (np.array(positions, dtype=int), names), words
+
+    def subscribed(self, x: int) -> bool:
+        """Whether register x is part of the output recipe, i.e. updated from the data packages."""
+        (positions, _), words = self._read_fields
+        if x in positions:
+            return True
+        return any(offset <= x < offset + 32 for _, offset in words)
+
+    def recipe_fields(self, start: int = 0, stop: Optional[int] = None) -> Tuple[List[str], List[str]]:
+        """Recipe names and types for a register range of this bank, see register_fields()."""
+        return register_fields(self.direction, self.kind, start, stop)
+
+    def update(self, data) -> np.ndarray:
+        """Copy the subscribed registers of an RTDE data package into ``values``."""
+        (positions, names), words = self._read_fields
+        if names:
+            self.values[positions] = [getattr(data, name) for name in names]
+        for word, offset in words:
+            self.values[offset:offset + 32] = (getattr(data, word) >> np.arange(32, dtype=np.uint64)) & 1
+        return self.values
+
+    def refresh(self) -> np.ndarray:
+        """Receive the latest data package and update the bank from it."""
+        data = self._rtde.receive_latest()
+        if data is not None:
+            self.update(data)
+        return self.values
+
+    def __getitem__(self, key):
+        return self.refresh()[key]
+
+    def __setitem__(self, key, value):
+        if self.direction != 'input':
+            raise TypeError('Output registers are read-only')
+        values = self.values.copy()
+        values[key] = value
+        changed = np.arange(len(values))[key]
+        self._write(np.atleast_1d(changed), values)
+
+    def write_uint64(self, value: int):
+        """Write bit registers 0-63 from a single 64 bit integer (bit n is register n)."""
+        if self.kind != 'bit' or self.direction != 'input':
+            raise TypeError('write_uint64 is only available for the input bit registers')
+        if not 0 <= value < 2**64:
+            raise ValueError('value must fit in an UINT64')
+        values = self.values.copy()
+        values[:64] = (np.uint64(value) >> np.arange(64, dtype=np.uint64)) & np.uint64(1)
+        self._write(np.arange(64), values)
+
+    def _write(self, changed: np.ndarray, values: np.ndarray):
+        setp_names = self._rtde.setp_names
+        fields = {}
+        for x in changed.tolist():
+            if self.kind == 'bit' and x < 64:
+                word, offset = PACKED_BIT_WORDS[x // 32]
+                name = f'{self.direction}_{word}'
+                bits = values[offset:offset + 32].astype(np.uint64)
+                fields[name] = int(np.sum(bits << np.arange(32, dtype=np.uint64)))
+            else:
+                name = f'{self.direction}_{self.kind}_register_{x}'
+                fields[name] = values[x].item()
+            if name not in setp_names:
+                raise KeyError(f"{name} is not part of the input recipe '{self._rtde.recipe_setp}'")
+        if self._rtde.write_inputs(fields):
+            self.values[:] = values
+
+
+class RegisterBanks:
+    """The int, double and bit register banks of one direction ('input' or 'output')."""
+
+    def __init__(self, rtde, direction: str):
+        self.direction = direction
+        self.int = RegisterBank(rtde, direction, 'int')
+        self.double = RegisterBank(rtde, direction, 'double')
+        self.bit = RegisterBank(rtde, direction, 'bit')
+
+    def __iter__(self):
+        return iter((self.int, self.double, self.bit))
+
+    def update(self, data):
+        """Update all banks from one RTDE data package."""
+        for bank in self:
+            bank.update(data)
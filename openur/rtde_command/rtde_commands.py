@@ -16,8 +16,12 @@ from contextlib import ExitStack
 
 
 
+from openur.connections.connection_manager import BackoffPolicy
 from openur.rtde import rtde
 from openur.rtde import rtde_config
+from openur.rtde_command.register_bank import RegisterBanks, register_fields
+from openur.rtde_command.input_writer import InputWriter
+from openur.rtde_command.output_reader import OutputReader
 
 
 
@@ -29,10 +33,6 @@ else:
     from xmlrpc.server import SimpleXMLRPCServer
 
 
-# Configure logging
-logging.basicConfig(level=logging.INFO,
-                    format='%(asctime)s - %(levelname)s - %(message)s')
-
 def retry(exceptions, tries=4, delay=3, backoff=2, logger=None):
     def deco_retry(f):
         @functools.wraps(f)
@@ -73,11 +73,18 @@ class RTDECommands:
         self.max_retries = max_retries
         self.exit_flag = threading.Event()
         self.lock = threading.Lock()
+        self.receive_lock = threading.Lock()
         self.con = None
+        self.input_writer = None
+        self.output_reader = None
+        self.connect_hook = None   # set by ConnectionManager.add_client()
 
         self.conf = rtde_config.ConfigFile(config_path)
         self.setp_names, self.setp_types = self.conf.get_recipe(recipe_setp)
         self.output_names, self.output_types = self.conf.get_recipe(recipe_out)  
+        self.latest_data = None
+        self.outputs = RegisterBanks(self, 'output')
+        self.inputs = RegisterBanks(self, 'input')
 
         self.data_dir: Dict[str, Optional[Union[int, float, str]]] = {
             'timestamp': None,
@@ -214,35 +221,34 @@ class RTDECommands:
         self.force_torque_sensor_values: Optional[Union[int, float]] = None  
 
 
-    @retry((Exception), tries=4, delay=3, backoff=2, logger=logging)
+    def connect_once(self):
+        """Make one connection attempt (connect, set up the recipes and start), raising on failure."""
+        with self.lock:
+            if self.con:
+                self.con.disconnect()
+            self.con = rtde.RTDE(self.ROBOT_HOST, self.ROBOT_PORT)
+            self.con.connect()
+            self.con.get_controller_version()
+
+            if not self.con.send_output_setup(self.output_names, self.output_types, frequency=125):
+                logging.error("Unable to configure output")
+                raise Exception("Unable to configure output")
+
+            self.setp = self.con.send_input_setup(self.setp_names, self.setp_types)
+
+            if not self.con.send_start():
+                logging.error("Unable to start the data synchronization")
+                raise Exception("Unable to start the data synchronization")
+        logging.info('RTDE Connection Established with {}:{}'.format(self.ROBOT_HOST, self.ROBOT_PORT))
+
     def connect(self):
-        retries = 0
-        while not self.exit_flag.is_set() and retries < self.max_retries:
-            try:
-                with self.lock:
-                    if self.con:
-                        self.con.disconnect()
-                    self.con = rtde.RTDE(self.ROBOT_HOST, self.ROBOT_PORT)
-                    self.con.connect()
-                    self.con.get_controller_version()
-
-                    if not self.con.send_output_setup(self.output_names, self.output_types, frequency=125):
-                        logging.error("Unable to configure output")
-                        raise Exception("Unable to configure output")
-
-                    self.setp = self.con.send_input_setup(self.setp_names, self.setp_types)
-                    
-                    if not self.con.send_start():
-                        logging.error("Unable to start the data synchronization")
-                        raise Exception("Unable to start the data synchronization")
-                logging.info('RTDE Connection Established with {}:{}'.format(self.ROBOT_HOST, self.ROBOT_PORT))
-                break 
-            except (Exception) as e:
-                logging.error(f"Error connecting to {self.ROBOT_HOST}:{self.ROBOT_PORT}: {e}")
-                retries += 1
-                time.sleep(5 ** retries)
+        if self.connect_hook is not None:
+            return self.connect_hook()
+        return BackoffPolicy(max_attempts=self.max_retries).run(self.connect_once, f'{self.ROBOT_HOST}:{self.ROBOT_PORT}', self.exit_flag)
     
     def close(self):
+        self.stop_input_writer()
+        self.stop_output_reader()
         try:
             if self.con:
                 self.con.disconnect()
@@ -267,16 +273,110 @@ class RTDECommands:
             self.con.disconnect()
 
     def receive_buffered(self,data_type):
-        self.con.receive_buffered(data_type)
+        with self.receive_lock:
+            return self.con.receive_buffered(data_type)
 
     def receive(self,data_type):
-        self.con.receive(data_type)
+        with self.receive_lock:
+            return self.con.receive(data_type)
     
     def setp_input(self, data):
         self.setp.send(data)
         self.con.send(self.setp)
         time.sleep(0.1)
 
+    def add_register_fields(self, direction: str, kind: str, start: int = 0, stop: Optional[int] = None):
+        """Add a register range to the output ('output') or input ('input') recipe before connecting.
+
+        Example:
+        >>> ur.add_register_fields('output', 'double', 0, 24)
+        >>> ur.connect()
+        >>> ur.outputs.double[0:24]
+
+        Args:
+            direction (str): 'output' adds output_<kind>_register_X fields to the output recipe,
+                'input' adds input_<kind>_register_X fields to the input recipe.
+            kind (str): 'int', 'double' or 'bit'.
+            start (int): first register number.
+            stop (int): one past the last register number.
+        """
+        names, types = register_fields(direction, kind, start, stop)
+        recipe_names, recipe_types = (self.output_names, self.output_types) if direction == 'output' else (self.setp_names, self.setp_types)
+        for name, data_type in zip(names, types):
+            if name not in recipe_names:
+                recipe_names.append(name)
+                recipe_types.append(data_type)
+        self.outputs = RegisterBanks(self, 'output')
+        self.inputs = RegisterBanks(self, 'input')
+
+    def receive_package(self):
+        """Read the latest data package from the socket and keep it as ``latest_data``.
+
+        Only one thread reads the socket at a time; while the output reader runs, it is the
+        only caller.
+        """
+        with self.receive_lock:
+            data = self.con.receive()
+        if data is not None:
+            self.latest_data = data
+        return data
+
+    def receive_latest(self, timeout: Optional[float] = 1.0):
+        """The next data package, from the output reader if it is running, otherwise from the socket."""
+        if self.output_reader is not None and self.output_reader.is_running():
+            return self.output_reader.wait_next(timeout)
+        return self.receive_package()
+
+    def start_output_reader(self) -> OutputReader:
+        """Receive the output stream on a single reader thread that feeds every other reader.
+
+        While the reader runs, fetch_data(), the register banks and the status helpers wait
+        for its next package, and listeners added with add_listener() get every package.
+        """
+        if self.output_reader is None:
+            self.output_reader = OutputReader(self)
+        self.output_reader.start()
+        return self.output_reader
+
+    def stop_output_reader(self):
+        if self.output_reader is not None:
+            self.output_reader.stop()
+
+    def start_input_writer(self, frequency: float = 125) -> InputWriter:
+        """Route input updates through a single writer thread that sends at most one package per cycle.
+
+        While the writer runs, set_control_inputs() and the input register banks only stage
+        their fields and return immediately. See InputWriter.stats() for the counters.
+        """
+        if self.input_writer is None:
+            self.input_writer = InputWriter(self, frequency)
+        self.input_writer.start()
+        return self.input_writer
+
+    def stop_input_writer(self):
+        if self.input_writer is not None:
+            self.input_writer.stop()
+
+    def write_inputs(self, fields: Dict[str, Union[int, float, bool]]) -> bool:
+        """Set several fields of the input recipe, staged on the input writer if it is running."""
+        if self.input_writer is not None and self.input_writer.is_running():
+            self.input_writer.stage(**fields)
+            return True
+        return self.send_inputs(fields)
+
+    def send_inputs(self, fields: Dict[str, Union[int, float, bool]]) -> bool:
+        """Set several fields of the input recipe and send them in one RTDE package."""
+        if not self.con:
+            logging.error("No connection to the robot. Please connect first.")
+            return False
+        with self.lock:
+            for name, value in fields.items():
+                setattr(self.setp, name, value)
+            success = self.con.send(self.setp)
+        if not success:
+            logging.error("Failed to send control inputs to the robot.")
+        return success
+
     def set_control_inputs(self, **kwargs):
         """Sets control inputs for the robot.
         Each keyword argument is treated as an input control variable. The method checks whether the input variable 
@@ -293,6 +393,14 @@ class RTDECommands:
             logging.error("No connection to the robot. Please connect first.")
             return
 
+        # With the input writer running, only stage the valid inputs; the writer merges and sends them
+        if self.input_writer is not None and self.input_writer.is_running():
+            valid = {key: value for key, value in kwargs.items() if key in self.setp_names}
+            for key in kwargs.keys() - valid.keys():
+                logging.error(f"Invalid control input key: {key}. Ignoring this input.")
+            self.input_writer.stage(**valid)
+            return True
+
         # Lock the thread while updating setp
         with self.lock:
             # Iterate over the keyword arguments
@@ -322,7 +430,7 @@ class RTDECommands:
         while self.Keep_running:
             try:
                 
-                data = self.con.receive()
+                data = self.receive_latest()
                 if data is not None:
                     print(data.actual_q())
                     time.sleep(1)  # changed to 0.5 to increase the responsiveness
@@ -372,7 +480,7 @@ class RTDECommands:
 
     def fetch_data(self, key: str, index: Optional[int] = None):
         try:
-            data = self.con.receive()
+            data = self.receive_latest()
             if data is not None:
                 if index is not None:
                     self.data_dir[f'{key}{index}'] = getattr(data, f'{key}{index}')
@@ -499,7 +607,7 @@ class RTDECommands:
         "emergency_stopped", "violation", "fault", "stopped_due_to_safety"
         ]
         try:
-            data = self.con.receive()
+            data = self.receive_latest()
 
             self.data_dir['safety_status_bits'] = data.safety_status_bits
             safety_status_bits = self.data_dir.get('safety_status_bits', 0)
@@ -545,7 +653,7 @@ class RTDECommands:
         safety_status_bits = self.data_dir['robot_status_bits']
         
         try:
-            data = self.con.receive()
+            data = self.receive_latest()
 
             self.data_dir['robot_status_bits'] = data.robot_status_bits
             safety_status_bits = self.data_dir.get('robot_status_bits', 0)
@@ -608,21 +716,12 @@ class RTDECommands:
     def tcp_force_scalar(self) -> Optional[float]:
         return self.fetch_data('tcp_force_scalar')
     
-    def output_bit_registers(self) -> Optional[bool]: # TODO: check this
-        data = self.con.receive()
-        self.data_dir['output_bit_registers0_to_31'] = data.output_bit_registers0_to_31
-        self.data_dir['output_bit_registers32_to_63'] = data.output_bit_registers32_to_63
-        result = [None]*64
-        for ii in range(64):
-            if ii<32 and self.data_dir['output_bit_registers0_to_31'] is not None:
-                result[ii] = 2**(ii)&self.data_dir['output_bit_registers0_to_31']==2**(ii)
-            elif ii>31 and self.data_dir['output_bit_registers32_to_63'] is not None:
-                result[ii] = 2**(ii-32)&self.data_dir['output_bit_registers32_to_63']==2**(ii-32)
-        return result
+    def output_bit_registers(self) -> Optional[List[bool]]:
+        return self._bit_registers(self.outputs.bit)
     
     def output_bit_registers0_to_31(self) -> Optional[bool]:
         try:
-            data = self.con.receive()
+            data = self.receive_latest()
             self.data_dir['output_bit_registers0_to_31'] = data.output_bit_registers0_to_31
             result = [None]*32
             for ii in range(32):
@@ -635,7 +734,7 @@ class RTDECommands:
     
     def output_bit_registers32_to_63(self) -> Optional[bool]:
         try:
-            data = self.con.receive()
+            data = self.receive_latest()
             self.data_dir['output_bit_registers32_to_63'] = data.output_bit_registers32_to_63
             result = [None]*32
             for ii in range(32):
@@ -648,20 +747,33 @@ class RTDECommands:
     
     def output_bit_register_x(self, x:int) -> Optional[bool]: # TODO: check this
         result = [None]*128
-        data = self.con.receive()
+        data = self.receive_latest()
         self.data_dir[f"output_bit_register_{x}"] = getattr(data, f'output_bit_register_{x}') 
         if x in range(64, 128) and self.data_dir[f"output_bit_register_{x}"] is not None:
             result[x] = 2**(x-64)&self.data_dir[f"output_bit_register_{x}"]==2**(x-64)
         return result
 
-    def output_int_register_x(self, x:int) -> Optional[int]: # TODO try to make this work
+    def output_int_register_x(self, x:int) -> Optional[int]:
         if x in range(0, 48):
-            return self.fetch_data(f"output_int_register_{x}")
+            return self._register_value(self.outputs.int, x)
 
-    def output_double_register_x(self, x:int) -> Optional[float]: # TODO try to make this work
+    def output_double_register_x(self, x:int) -> Optional[float]:
         if x in range(0, 48):
-            return self.fetch_data(f"output_double_register_{x}")
+            return self._register_value(self.outputs.double, x)
         
+    def _register_value(self, bank, x: int):
+        """Register x from its bank, or from fetch_data() (None and an error log) if it is not in the output recipe."""
+        if not bank.subscribed(x):
+            return self.fetch_data(f'{bank.direction}_{bank.kind}_register_{x}')
+        return bank[x].item()
+
+    def _bit_registers(self, bank) -> Optional[List[bool]]:
+        """Bit registers 0-63 of a bank, or None (and an error log) if either word is not in the output recipe."""
+        if not (bank.subscribed(0) and bank.subscribed(32)):
+            logging.error(f"Could not get {bank.direction}_bit_registers: registers 0-63 are not in the output recipe")
+            return None
+        return bank[0:64].tolist()
+
     def tool_output_mode(self) -> Optional[int]:
         return self.fetch_data('tool_output_mode')
     
@@ -884,14 +996,8 @@ class RTDECommands:
         else:
             raise KeyError('Index out of range')
     
-    def input_bit_registers(self) -> Optional[bool]:
-        result = [None]*64
-        for ii in range(64):
-            if ii<32 and self.data_dir['input_bit_registers0_to_31'] is not None:
-                result[ii] = 2**(ii)&self.data_dir['input_bit_registers0_to_31']==2**(ii)
-            elif ii>31 and self.data_dir['input_bit_registers32_to_63'] is not None:
-                result[ii] = 2**(ii-32)&self.data_dir['input_bit_registers32_to_63']==2**(ii-32)
-        return result
+    def input_bit_registers(self) -> Optional[List[bool]]:
+        return self._bit_registers(self.inputs.bit)
     
     def input_bit_registers_x(self, x:int) -> Optional[bool]: # (x = [64, 127])
         result = [None]*128
@@ -899,13 +1005,13 @@ class RTDECommands:
             result[x] = 2**(x-64)&self.dataDir[f"input_bit_registers_{x}"]==2**(x-64)
         return result
     
-    def input_int_register_x(self, x:int) -> Optional[int]: # TODO try to make this work
+    def input_int_register_x(self, x:int) -> Optional[int]:
         if x in range(0, 48):
-            return self.fetch_data(f"input_int_register_{x}")
+            return self._register_value(self.inputs.int, x)
     
-    def input_double_register_x(self, x:int) -> Optional[float]: # TODO try to make this work
+    def input_double_register_x(self, x:int) -> Optional[float]:
         if x in range(0, 48):
-            return self.fetch_data(f"input_double_register_{x}")
+            return self._register_value(self.inputs.double, x)
     
 
 class RobotStatusBit:
@@ -0,0 +1,241 @@
+__author__ = "Beck Isakov"
+__copyright__ = "Beck isakov"
+__contact__ = "https://github.com/Jp-Beck"
+__license__ = "GPL v3"
+__version__ = "0.2.0"
+__maintainer__ = "Beck Isakov"
+__email__ = "jp-beck@outlook.com"
+__status__ = "Development"
+
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Dict, Hashable, Optional, Union
+import logging
+import threading
+import time
+
+# Lanes in priority order
+STOP = 'stop'
+MOTION = 'motion'
+BACKGROUND = 'background'
+LANES = (STOP, MOTION, BACKGROUND)
+
+
+class LaneStats:
+    """Counters and queue wait times of one lane."""
+
+    def __init__(self):
+        self.sent = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.errors = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.last_wait = None
+
+    def record(self, wait: float):
+        self.sent += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        self.last_wait = wait
+
+    def as_dict(self) -> Dict[str, Union[int, float, None]]:
+        return {
+            'sent': self.sent,
+            'coalesced': self.coalesced,
+            'dropped': self.dropped,
+            'errors': self.errors,
+            'last_wait': self.last_wait,
+            'max_wait': self.max_wait,
+            'mean_wait': self.total_wait / self.sent if self.sent else None,
+        }
+
+
+class _Command:
+    __slots__ = ('lane', 'payload', 'key', 'progress', 'chunk_size', 'enqueued_at', 'future')
+
+    def __init__(self, lane, payload, key, progress, chunk_size=None):
+        self.lane = lane
+        self.payload = payload
+        self.key = key
+        self.progress = progress
+        self.chunk_size = chunk_size
+        self.enqueued_at = time.perf_counter()
+        self.future = Future()
+
+
+class ScriptCommandQueue:
+    """Prioritized outbound queue for the script socket with one writer thread.
+
+    Commands are queued in three lanes: 'stop' (stopj/stopl and other stops), 'motion'
+    (motion programs and program uploads) and 'background' (IO updates). The writer always
+    sends the oldest command of the highest lane that has one, so a stop never waits
+    behind queued uploads. Submitting a stop drops the motion commands that are still
+    queued, since they were meant to run before the stop.
+
+    Commands submitted with a ``key`` (e.g. ``('set_digital_out', 0)``) replace a queued,
+    not yet sent command with the same key; only the newest value is sent and both
+    callers get the same future.
+
+    A program upload that already started is written to the end, because a program cut
+    in half cannot be parsed by the controller. With ``stop_send`` (a second script
+    connection) stops bypass the queue and are written immediately, even during an upload.
+
+    Every future resolves with the seconds the command waited in the queue.
+
+    Example:
+    >>> queue = ScriptCommandQueue(client.write)
+    >>> queue.start()
+    >>> queue.submit(program, lane='motion')
+    >>> queue.submit('set_digital_out(0, True)\\n', lane='background', key=('set_digital_out', 0))
+    >>> queue.submit('stopj(2.0)\\n', lane='stop').result(timeout=1)
+    0.0004
+    >>> queue.stats()['stop']['max_wait']
+
+    Args:
+        send (callable): writes bytes to the script socket.
+        stop_send (callable): optional writer of a second script connection used for stops.
+        chunk_size (int): bytes written per send() call.
+    """
+
+    def __init__(self, send: Callable[[bytes], object], stop_send: Optional[Callable[[bytes], object]] = None,
+                 chunk_size: int = 65536):
+        self._send = send
+        self._stop_send = stop_send
+        self.chunk_size = chunk_size
+        self._lanes = {lane: deque() for lane in LANES}
+        self._keyed: Dict[Hashable, _Command] = {}
+        self._stats = {lane: LaneStats() for lane in LANES}
+        self._condition = threading.Condition()
+        self._stop_lock = threading.Lock()
+        self._stopping = False
+        self._thread = None
+
+    def start(self):
+        if self.is_running():
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name='script-command-queue', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 1.0):
+        """Stop the writer thread after sending whatever is still queued."""
+        if not self.is_running():
+            return
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def __len__(self):
+        with self._condition:
+            return sum(len(lane) for lane in self._lanes.values())
+
+    def submit(self, script: Union[str, bytes], lane: str = MOTION, key: Optional[Hashable] = None,
+               progress: Optional[Callable[[int, int], None]] = None, chunk_size: Optional[int] = None) -> Future:
+        """Queue a script and return a future resolved with its queue wait time.
+
+        Args:
+            script (str): program or script line(s), sent as they are.
+            lane (str): 'stop', 'motion' or 'background'.
+            key: coalescing key, a queued command with the same key is replaced.
+            progress (callable): called as progress(sent_bytes, total_bytes) while writing.
+            chunk_size (int): bytes written per send() call, the queue's chunk_size by default.
+        """
+        if lane not in LANES:
+            raise ValueError(f"lane must be one of {LANES}")
+        payload = script.encode('utf-8') if isinstance(script, str) else script
+        command = _Command(lane, payload, key, progress, chunk_size)
+        if lane == STOP:
+            self._drop_motion()
+            if self._stop_send is not None:
+                self._write(command, self._stop_send, self._stop_lock)
+                return command.future
+        with self._condition:
+            queued = self._keyed.get(key) if key is not None else None
+            if queued is not None and queued.lane == lane:
+                queued.payload = payload
+                queued.progress = progress
+                queued.chunk_size = chunk_size
+                self._stats[lane].coalesced += 1
+                return queued.future
+            self._lanes[lane].append(command)
+            if key is not None:
+                self._keyed[key] = command
+            self._condition.notify()
+        return command.future
+
+    def stats(self) -> Dict[str, Dict[str, Union[int, float, None]]]:
+        """Sent, coalesced, dropped and error counts and queue wait times per lane."""
+        with self._condition:
+            stats = {lane: self._stats[lane].as_dict() for lane in LANES}
+            for lane in LANES:
+                stats[lane]['queued'] = len(self._lanes[lane])
+        return stats
+
+    def _drop_motion(self):
+        with self._condition:
+            dropped = list(self._lanes[MOTION])
+            self._lanes[MOTION].clear()
+            for command in dropped:
+                self._forget(command)
+            self._stats[MOTION].dropped += len(dropped)
+        for command in dropped:
+            command.future.cancel()
+        if dropped:
+            logging.info(f"Stop dropped {len(dropped)} queued motion command(s)")
+
+    def _forget(self, command: _Command):
+        if command.key is not None and self._keyed.get(command.key) is command:
+            del self._keyed[command.key]
+
+    def _next(self) -> Optional[_Command]:
+        for lane in LANES:
+            if self._lanes[lane]:
+                command = self._lanes[lane].popleft()
+                self._forget(command)
+                return command
+        return None
+
+    def _write(self, command: _Command, send: Callable[[bytes], object], lock: Optional[threading.Lock] = None):
+        if not command.future.set_running_or_notify_cancel():
+            return
+        wait = time.perf_counter() - command.enqueued_at
+        data = memoryview(command.payload)
+        total = len(data)
+        chunk_size = command.chunk_size or self.chunk_size
+        try:
+            if lock is not None:
+                lock.acquire()
+            try:
+                for start in range(0, total, chunk_size):
+                    send(data[start:start + chunk_size])
+                    if command.progress is not None:
+                        command.progress(min(start + chunk_size, total), total)
+            finally:
+                if lock is not None:
+                    lock.release()
+        except Exception as e:
+            logging.error(f"Script command queue failed to send a {command.lane} command: {e}")
+            with self._condition:
+                self._stats[command.lane].errors += 1
+            command.future.set_exception(e)
+            return
+        with self._condition:
+            self._stats[command.lane].record(wait)
+        command.future.set_result(wait)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                command = self._next()
+                while command is None:
+                    if self._stopping:
+                        return
+                    self._condition.wait()
+                    command = self._next()
+            self._write(command, self._send)
@@ -0,0 +1,207 @@
+__author__ = "Beck Isakov"
+__copyright__ = "Beck isakov"
+__contact__ = "https://github.com/Jp-Beck"
+__license__ = "GPL v3"
+__version__ = "0.2.0"
+__maintainer__ = "Beck Isakov"
+__email__ = "jp-beck@outlook.com"
+__status__ = "Development"
+
+from concurrent.futures import Future
+from typing import Callable, Iterable, List, Optional
+import logging
+import re
+import socket
+import time
+
+from openur.connections.connection_manager import BackoffPolicy
+from openur.connections.line_transport import LineTransport
+
+INTERPRETER_PORT = 30020
+INTERPRETER_PROGRAM = 'def openur_interpreter():\n  interpreter_mode()\nend\n'
+
+_ACK = re.compile(r'^ack:\s*(\d+):')
+_ACK_PREFIX = re.compile(r'^ack:\s*\d+:\s*')
+_DISCARD = re.compile(r'^discard:\s*(.*?):\s')
+_LAST_NUMBER = re.compile(r'(-?\d+)\s*$')
+
+
+class InterpreterError(RuntimeError):
+    """Raised when the interpreter discards a statement, e.g. because of a syntax error."""
+
+
+class InterpreterSession(LineTransport):
+    """Stream single URScript statements to a program running in interpreter mode.
+
+    The interpreter program is started once; afterwards every statement is sent over the
+    interpreter socket (port 30020) and appended to the running program, so small commands
+    run without compiling and starting a new program and without aborting the previous one.
+    The controller answers every line in order, ``ack: <id>: <statement>`` or
+    ``discard: <reason>: <statement>``. One reader thread resolves a FIFO of futures with
+    the statement id, or with InterpreterError for discarded statements.
+
+    Interpreted statements stay in the program until they are cleared. After
+    ``clear_every`` acknowledged statements the session sends clear_interpreter() as soon
+    as all of them have been executed.
+
+    Example:
+    >>> session = client.interpreter_session()
+    >>> session.start()
+    >>> session.run('set_digital_out(0, True)')
+    1
+    >>> futures = session.execute_many(['movej([0, -1.57, 1.57, 0, 0, 0])', 'set_digital_out(0, False)'])
+    >>> session.wait_executed(futures[-1].result(), timeout=10)
+    True
+    >>> session.end()
+
+    Args:
+        host (str): robot IP address.
+        port (int): interpreter port.
+        send_program (callable): sends a program string to the controller, used by start()
+            to start interpreter mode. Not needed if the program is already running.
+        connect_timeout (float): socket connect timeout of one attempt.
+        timeout (float): default seconds to wait for an acknowledgement.
+        clear_every (int): acknowledged statements before clear_interpreter() is sent, 0 disables it.
+    """
+
+    def __init__(self, host: str, port: int = INTERPRETER_PORT, send_program: Optional[Callable[[str], object]] = None,
+                 connect_timeout: float = 2.0, timeout: float = 2.0, clear_every: int = 500):
+        super().__init__(host, port, 'Interpreter')
+        self.send_program = send_program
+        self.connect_timeout = connect_timeout
+        self.timeout = timeout
+        self.clear_every = clear_every
+        self.last_acked: Optional[int] = None
+        self.acked = 0
+        self.discarded = 0
+        self.since_clear = 0
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.end()
+
+    def start(self, policy: Optional[BackoffPolicy] = None) -> bool:
+        """Start interpreter mode (if send_program is set) and connect to the interpreter socket.
+
+        The socket only accepts connections once the interpreter program runs, so the
+        connection is retried with ``policy`` (short backoff by default).
+        """
+        if self.send_program is not None:
+            self.send_program(INTERPRETER_PROGRAM)
+        policy = policy or BackoffPolicy(initial=0.1, maximum=1.0, max_attempts=8)
+        return policy.run(self.connect_once, f'interpreter at {self.host}:{self.port}')
+
+    def connect_once(self):
+        """Make one connection attempt, raising on failure."""
+        sock = socket.create_connection((self.host, self.port), timeout=self.connect_timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._attach(sock)
+        logging.info(f"Interpreter session connected to {self.host}:{self.port}")
+
+    def end(self, timeout: Optional[float] = None):
+        """Leave interpreter mode (end_interpreter()) and close the connection."""
+        if self.is_open:
+            try:
+                self.execute('end_interpreter()').result(self.timeout if timeout is None else timeout)
+            except Exception as e:
+                logging.warning(f"Interpreter did not acknowledge end_interpreter(): {e}")
+        self.close()
+
+    def execute(self, statement: str) -> Future:
+        """Send one statement and return a future resolved with its statement id."""
+        return self.execute_many([statement])[0]
+
+    def execute_many(self, statements: Iterable[str]) -> List[Future]:
+        """Send several statements in one write and return one future per statement, in order."""
+        statements = [statement.strip() for statement in statements]
+        for statement in statements:
+            if '\n' in statement:
+                raise ValueError('The interpreter takes one statement per line')
+        if self.clear_every and self.since_clear >= self.clear_every:
+            self._clear_if_executed()
+        futures = self._send_lines(statements)
+        self.since_clear += len(statements)
+        return futures
+
+    def run(self, statement: str, timeout: Optional[float] = None) -> int:
+        """Send one statement and wait for its acknowledgement. Returns the statement id."""
+        return self.execute(statement).result(self.timeout if timeout is None else timeout)
+
+    def clear(self, timeout: Optional[float] = None):
+        """Send clear_interpreter() to drop all interpreted statements from the program."""
+        self._send_lines(['clear_interpreter()'])[0].result(self.timeout if timeout is None else timeout)
+        self.since_clear = 0
+
+    def skip_buffer(self, timeout: Optional[float] = None):
+        """Skip the statements that are interpreted but not executed yet."""
+        return self._send_lines(['skipbuffer'])[0].result(self.timeout if timeout is None else timeout)
+
+    def abort(self, timeout: Optional[float] = None):
+        """Abort the statement that is executing."""
+        return self._send_lines(['abort'])[0].result(self.timeout if timeout is None else timeout)
+
+    def state_last_executed(self, timeout: Optional[float] = None) -> Optional[int]:
+        """Id of the last statement that started executing."""
+        return self._query_id('statelastexecuted()', timeout)
+
+    def state_last_interpreted(self, timeout: Optional[float] = None) -> Optional[int]:
+        """Id of the last statement that was interpreted."""
+        return self._query_id('statelastinterpreted()', timeout)
+
+    def state_last_cleared(self, timeout: Optional[float] = None) -> Optional[int]:
+        """Id of the last statement that was cleared."""
+        return self._query_id('statelastcleared()', timeout)
+
+    def wait_executed(self, statement_id: int, timeout: float = 10.0, interval: float = 0.05) -> bool:
+        """Wait until the statement with the given id started executing."""
+        deadline = time.monotonic() + timeout
+        while True:
+            last = self.state_last_executed()
+            if last is not None and last >= statement_id:
+                return True
+            if time.monotonic() + interval > deadline:
+                return False
+            time.sleep(interval)
+
+    def _query_id(self, command: str, timeout: Optional[float]) -> Optional[int]:
+        # State queries resolve with the raw reply line and do not count as acknowledged
+        # statements. An ack of the query itself carries the query's own id, not the state:
+        # only a number after the echoed command is taken as the reply.
+        reply = self._send_lines([command], state_query=True)[0].result(self.timeout if timeout is None else timeout)
+        reply = _ACK_PREFIX.sub('', reply, count=1).replace(command, '', 1)
+        match = _LAST_NUMBER.search(reply)
+        return int(match.group(1)) if match else None
+
+    def _clear_if_executed(self):
+        try:
+            # Captured before the query, so its reply cannot move the target.
+            last_acked = self.last_acked
+            if last_acked is not None and self.state_last_executed() == last_acked:
+                self.clear()
+        except Exception as e:
+            logging.warning(f"Interpreter clear skipped: {e}")
+
+    def _send_lines(self, lines: List[str], state_query: bool = False) -> List[Future]:
+        payload = ''.join(line + '\n' for line in lines).encode('utf-8')
+        return self._send(payload, [Future() for _ in lines], state_query)
+
+    def _handle_reply(self, future: Future, state_query: bool, line: bytes):
+        line = line.decode('utf-8', 'replace').strip()
+        if state_query:
+            future.set_result(line)
+            return
+        ack = _ACK.match(line)
+        if ack:
+            self.last_acked = int(ack.group(1))
+            self.acked += 1
+            future.set_result(self.last_acked)
+            return
+        discard = _DISCARD.match(line)
+        if discard:
+            self.discarded += 1
+            future.set_exception(InterpreterError(f"Statement discarded: {discard.group(1)}"))
+            return
+        future.set_result(line)
@@ -0,0 +1,320 @@
+__author__ = "Beck Isakov"
+__copyright__ = "Beck isakov"
+__contact__ = "https://github.com/Jp-Beck"
+__license__ = "GPL v3"
+__version__ = "0.2.0"
+__maintainer__ = "Beck Isakov"
+__email__ = "jp-beck@outlook.com"
+__status__ = "Development"
+
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Callable, Dict, List, Optional, Sequence, Union
+import itertools
+import logging
+import re
+import selectors
+import socket
+import threading
+
+import numpy as np
+
+SOCKET_NAME = 'openur_query'
+
+def socket_name(request_id: int) -> str:
+    """Controller socket name of one query, so queries in flight never share a socket."""
+    return f'{SOCKET_NAME}_{request_id}'
+
+
+_NUMBER = re.compile(r'^[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?$')
+
+
+def parse_script_value(text: str):
+    """Convert the string form of a URScript value to a Python/NumPy value.
+
+    Poses and lists of numbers become float arrays, numbers become int or float, True and
+    False become bool. Anything else is returned as the stripped string.
+
+    Example:
+    >>> parse_script_value('p[0.1, -0.2, 0.3, 0, 3.14, 0]')
+    array([ 0.1 , -0.2 ,  0.3 ,  0.  ,  3.14,  0.  ])
+    >>> parse_script_value('42'), parse_script_value('True')
+    (42, True)
+    """
+    text = text.strip()
+    if text in ('True', 'true'):
+        return True
+    if text in ('False', 'false'):
+        return False
+    if _NUMBER.match(text):
+        number = float(text)
+        return int(number) if number.is_integer() and '.' not in text and 'e' not in text.lower() else number
+    body = text[1:] if text.startswith('p[') else text
+    if body.startswith('[') and body.endswith(']'):
+        items = [item.strip() for item in body[1:-1].split(',')] if body[1:-1].strip() else []
+        if all(_NUMBER.match(item) for item in items):
+            return np.array([float(item) for item in items])
+        if all(item in ('True', 'False', 'true', 'false') for item in items):
+            return np.array([item in ('True', 'true') for item in items])
+    return text
+
+
+def parse_batch_reply(reply: str, count: int, parse: bool = True) -> List:
+    """Split a batch reply '<count>;<len0>:<v0><len1>:<v1>...' (request id already removed) into its values.
+
+    Every value is prefixed with its length in bytes, so values may contain any character
+    except the newline that ends the reply.
+
+    Example:
+    >>> parse_batch_reply('2;11:p[0.1, 0.2]1:7', 2)
+    [array([0.1, 0.2]), 7]
+    """
+    header, _, body = reply.partition(';')
+    if header != str(count):
+        raise ValueError(f"Batch reply carries {header!r} values, expected {count}")
+    body = body.encode('utf-8')
+    values, position = [], 0
+    for _ in range(count):
+        colon = body.find(b':', position)
+        if colon < 0 or not body[position:colon].isdigit():
+            raise ValueError(f"Batch reply has {len(values)} values, expected {count}")
+        end = colon + 1 + int(body[position:colon])
+        if end > len(body):
+            raise ValueError(f"Batch reply value {len(values)} is truncated")
+        values.append(body[colon + 1:end].decode('utf-8', 'replace'))
+        position = end
+    if position != len(body):
+        raise ValueError(f"Batch reply has {len(body) - position} bytes after the last value")
+    return [parse_script_value(value) for value in values] if parse else [value.strip() for value in values]
+
+
+class QueryServer:
+    """Long-lived listener for the replies of URScript queries, with request multiplexing.
+
+    Every query is sent as a secondary program that evaluates the expression and writes
+    ``<id>;<value>\\n`` to a socket back to this server. The server keeps every connection
+    the controller opens and never closes one itself, reads them all from one selector
+    thread and frames replies on the newline, so replies of any length are read in full.
+    The id resolves the future of the matching request, which lets many threads have
+    queries in flight at the same time.
+
+    Example:
+    >>> server = QueryServer('192.168.1.100', 50000, send_program=client.upload_program)
+    >>> server.query('get_actual_tcp_pose()', parse=True)
+    array([ 0.1 , -0.2 ,  0.3 ,  0.  ,  3.14,  0.  ])
+    >>> futures = [server.submit(f'read_input_integer_register({x})') for x in range(24)]
+    >>> [future.result(3.0) for future in futures]
+
+    Args:
+        pc_ip (str): address of this PC as seen by the robot.
+        pc_port (int): port to listen on.
+        send_program (callable): sends a program string to the controller (script port).
+        timeout (float): default seconds to wait for a reply.
+    """
+
+    def __init__(self, pc_ip: str, pc_port: int, send_program: Callable[[str], object], timeout: float = 3.0):
+        self.pc_ip = pc_ip
+        self.pc_port = pc_port
+        self.send_program = send_program
+        self.timeout = timeout
+        self.connections = 0
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, Future] = {}
+        self._lock = threading.Lock()
+        self._selector = None
+        self._listener = None
+        self._thread = None
+        self._wakeup_r = self._wakeup_w = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def start(self):
+        if self.is_running():
+            return
+        self._listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._listener.bind((self.pc_ip, self.pc_port))
+        self._listener.listen(8)
+        self._listener.setblocking(False)
+        self._wakeup_r, self._wakeup_w = socket.socketpair()
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self._listener, selectors.EVENT_READ, None)
+        self._selector.register(self._wakeup_r, selectors.EVENT_READ, 'wakeup')
+        self._thread = threading.Thread(target=self._run, name=f'query-server-{self.pc_port}', daemon=True)
+        self._thread.start()
+        logging.info(f"Query server listening on {self.pc_ip}:{self.pc_port}")
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def close(self):
+        if self.is_running():
+            self._wakeup_w.send(b'x')
+            self._thread.join(1.0)
+        self._thread = None
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            future.set_exception(ConnectionError('Query server closed'))
+
+    @property
+    def pending(self) -> int:
+        """Number of queries waiting for a reply."""
+        return len(self._pending)
+
+    def program(self, request_id: int, expression: str) -> str:
+        """The secondary program that sends ``<id>;<value of expression>`` back to the server."""
+        name = socket_name(request_id)
+        return (f'sec openur_query():\n'
+                f'  socket_open("{self.pc_ip}", {self.pc_port}, "{name}")\n'
+                f'  socket_send_string("{request_id};", "{name}")\n'
+                f'  socket_send_string({expression}, "{name}")\n'
+                f'  socket_send_byte(10, "{name}")\n'
+                f'  socket_close("{name}")\n'
+                f'end\n')
+
+    def batch_program(self, request_id: int, expressions: Sequence[str]) -> str:
+        """The secondary program that sends all values in one reply ``<id>;<count>;<len0>:<v0><len1>:<v1>...``.
+
+        Each value is converted with to_str() and prefixed with its str_len(), so no value
+        can be mistaken for a separator.
+        """
+        name = socket_name(request_id)
+        send = '  socket_send_string({}, "%s")\n' % name
+        lines = [f'sec openur_query():\n',
+                 f'  socket_open("{self.pc_ip}", {self.pc_port}, "{name}")\n',
+                 send.format(f'"{request_id};{len(expressions)};"')]
+        for index, expression in enumerate(expressions):
+            value = f'openur_value_{index}'
+            lines += [f'  local {value} = to_str({expression})\n',
+                      send.format(f'str_cat(str_len({value}), ":")'),
+                      send.format(value)]
+        lines += [f'  socket_send_byte(10, "{name}")\n', f'  socket_close("{name}")\n', 'end\n']
+        return ''.join(lines)
+
+    def submit(self, expression: str) -> Future:
+        """Send a query and return a future resolved with the reply text."""
+        return self._submit(lambda request_id: self.program(request_id, expression))
+
+    def submit_batch(self, expressions: Sequence[str]) -> Future:
+        """Send several queries as one program and return a future resolved with the reply text."""
+        if not expressions:
+            raise ValueError('expressions must not be empty')
+        return self._submit(lambda request_id: self.batch_program(request_id, expressions))
+
+    def _submit(self, program: Callable[[int], str]) -> Future:
+        request_id = next(self._ids)
+        future = Future()
+        with self._lock:
+            if not self.is_running():
+                self.start()
+            self._pending[request_id] = future
+        future.request_id = request_id
+        try:
+            self.send_program(program(request_id))
+        except Exception as e:
+            self._discard(request_id)
+            future.set_exception(e)
+        return future
+
+    def query(self, expression: str, timeout: Optional[float] = None, parse: bool = False):
+        """Evaluate an expression on the controller and return the reply, or None on timeout."""
+        future = self.submit(expression)
+        try:
+            reply = future.result(self.timeout if timeout is None else timeout)
+        except FutureTimeout:
+            self._discard(future.request_id)
+            logging.error(f"Timeout error: No response from robot for {expression}")
+            return None
+        except Exception as e:
+            logging.error(f"Error: {e}")
+            return None
+        return parse_script_value(reply) if parse else reply
+
+    def query_batch(self, expressions: Union[Sequence[str], Dict[str, str]], timeout: Optional[float] = None,
+                    parse: bool = True):
+        """Evaluate several expressions in one program and one round trip.
+
+        Returns the values in the order of ``expressions``, or a dict with the same keys if
+        a dict of expressions is given. Values are parsed with parse_script_value() unless
+        parse is False. Returns None on timeout or a malformed reply.
+
+        Example:
+        >>> server.query_batch({'pose': 'get_actual_tcp_pose()', 'force': 'get_tcp_force()',
+        ...                     'q': 'get_target_joint_positions()', 'count': 'read_output_integer_register(0)'})
+        {'pose': array([...]), 'force': array([...]), 'q': array([...]), 'count': 3}
+        """
+        names = list(expressions) if isinstance(expressions, dict) else None
+        expressions = [expressions[name] for name in names] if names is not None else list(expressions)
+        future = self.submit_batch(expressions)
+        try:
+            reply = future.result(self.timeout if timeout is None else timeout)
+        except FutureTimeout:
+            self._discard(future.request_id)
+            logging.error(f"Timeout error: No response from robot for a batch of {len(expressions)} queries")
+            return None
+        except Exception as e:
+            logging.error(f"Error: {e}")
+            return None
+        try:
+            values = parse_batch_reply(reply, len(expressions), parse)
+        except ValueError as e:
+            logging.error(f"Error: {e}")
+            return None
+        return dict(zip(names, values)) if names is not None else values
+
+    def _discard(self, request_id: int):
+        with self._lock:
+            self._pending.pop(request_id, None)
+
+    def _resolve(self, line: bytes):
+        request_id, _, value = line.decode('utf-8', 'replace').partition(';')
+        try:
+            request_id = int(request_id)
+        except ValueError:
+            logging.warning(f"Query server dropped an untagged reply: {line[:80]!r}")
+            return
+        with self._lock:
+            future = self._pending.pop(request_id, None)
+        if future is not None:
+            future.set_result(value.strip())
+
+    def _run(self):
+        buffers = {}
+        try:
+            while True:
+                for key, _ in self._selector.select():
+                    if key.data == 'wakeup':
+                        return
+                    if key.data is None:
+                        connection, _ = self._listener.accept()
+                        connection.setblocking(False)
+                        buffers[connection] = b''
+                        self._selector.register(connection, selectors.EVENT_READ, 'reply')
+                        self.connections += 1
+                        continue
+                    connection = key.fileobj
+                    try:
+                        data = connection.recv(65536)
+                    except OSError:
+                        data = b''
+                    if not data:
+                        self._selector.unregister(connection)
+                        connection.close()
+                        del buffers[connection]
+                        continue
+                    buffers[connection] += data
+                    *lines, buffers[connection] = buffers[connection].split(b'\n')
+                    for line in lines:
+                        self._resolve(line)
+        finally:
+            for connection in buffers:
+                connection.close()
+            self._selector.close()
+            self._listener.close()
+            self._wakeup_r.close()
+            self._wakeup_w.close()
@@ -0,0 +1,286 @@
+__author__ = "Beck Isakov"
+__copyright__ = "Beck isakov"
+__contact__ = "https://github.com/Jp-Beck"
+__license__ = "GPL v3"
+__version__ = "0.2.0"
+__maintainer__ = "Beck Isakov"
+__email__ = "jp-beck@outlook.com"
+__status__ = "Development"
+
+from functools import lru_cache
+from typing import Iterable, List, Optional, Sequence
+import string
+
+import numpy as np
+
+PRECISION = 4
+
+
+class ScriptTemplate:
+    """A URScript template with ``{name}`` fields, compiled once into a %-format string.
+
+    Rendering is a single ``%`` operation on a tuple, instead of parsing the template and
+    building a ``locals()`` dict on every call.
+
+    Example:
+    >>> STOPJ = ScriptTemplate('stopj({a})')
+    >>> STOPJ.render(1.4)
+    'stopj(1.4)'
+    >>> STOPJ(a=1.4)
+    'stopj(1.4)'
+    """
+
+    def __init__(self, template: str):
+        parts, fields = [], []
+        for literal, field, _, _ in string.Formatter().parse(template):
+            parts.append(literal.replace('%', '%%'))
+            if field is not None:
+                parts.append('%s')
+                fields.append(field)
+        self.template = template
+        self.format_string = ''.join(parts)
+        self.fields = tuple(fields)
+
+    def __repr__(self):
+        return f"ScriptTemplate({self.template!r})"
+
+    def render(self, *values) -> str:
+        """Fill the fields positionally, in the order they appear in the template."""
+        return self.format_string % values
+
+    def __call__(self, **fields) -> str:
+        return self.format_string % tuple(fields[name] for name in self.fields)
+
+
+MOVE = ScriptTemplate('move{movetype}({target}, a={a}, v={v}, t={t}, r={r})')
+MOVEP = ScriptTemplate('movep({target}, a={a}, v={v}, r={r})')
+MOVEC = ScriptTemplate('movec({via}, {target}, a={a}, v={v}, r={r})')
+SERVOC = ScriptTemplate('servoc({pose}, {a}, {v}, {r})')
+SERVOJ = ScriptTemplate('servoj({q}, 0.5, 0.5, {t}, {lookahead_time}, {gain})')
+SPEEDJ = ScriptTemplate('speedj({qd}, {a}, {t})')
+SPEEDL = ScriptTemplate('speedl({xd}, {a}, {t}, {aRot})')
+STOPJ = ScriptTemplate('stopj({a})')
+STOPL = ScriptTemplate('stopl({a})')
+FORCE_MODE = ScriptTemplate('force_mode({task_frame}, {selection_vector}, {wrench}, {f_type}, {limits})')
+
+
+@lru_cache(maxsize=None)
+def vector_format(length: int, precision: int = PRECISION) -> str:
+    """The %-format string for a list of ``length`` floats, e.g. '[%.4f, %.4f]'."""
+    return '[' + ', '.join(['%.{}f'.format(precision)] * length) + ']'
+
+
+def format_vector(values: Sequence[float], precision: int = PRECISION, pose: bool = False) -> str:
+    """Format a pose or joint vector as a URScript list in one formatting call.
+
+    Example:
+    >>> format_vector([0.1, -0.2, 0.3, 0, 3.14159265, 0], pose=True)
+    'p[0.1000, -0.2000, 0.3000, 0.0000, 3.1416, 0.0000]'
+    """
+    if isinstance(values, np.ndarray):
+        values = values.tolist()
+    text = vector_format(len(values), precision) % tuple(values)
+    return 'p' + text if pose else text
+
+
+def move_lines(movetype: str, targets, a: float = 1.2, v: float = 0.25, t: float = 0, r: float = 0,
+               pose: bool = True, vias=None, via_pose: bool = True, precision: int = PRECISION) -> List[str]:
+    """Return the move command lines for one target or a (N, 6) array of waypoints.
+
+    For several waypoints the blend radius of the last one is set to 0 and a stopl(a) is
+    appended, so the robot comes to rest at the end of the path.
+
+    Args:
+        movetype (str): 'j', 'l', 'p' or 'c'.
+        targets: a pose/joint vector or an (N, 6) array of them.
+        pose (bool): True if targets are poses (p[...]), False for joint positions.
+        vias: via points for movec, same shape as targets.
+        via_pose (bool): True if the via points are poses.
+    """
+    targets = np.asarray(targets, dtype=float)
+    single = targets.ndim == 1
+    rows = [targets.tolist()] if single else targets.tolist()
+    if movetype == 'c':
+        if vias is None:
+            raise ValueError('movec needs via points')
+        vias = np.asarray(vias, dtype=float)
+        if vias.shape != targets.shape:
+            raise ValueError('targets and via points must have the same shape')
+        via_rows = [vias.tolist()] if single else vias.tolist()
+
+    fmt = vector_format(targets.shape[-1], precision)
+    prefix = 'p' if pose else ''
+    via_prefix = 'p' if via_pose else ''
+    last = len(rows) - 1
+    lines = []
+    for idx, row in enumerate(rows):
+        blend = 0 if idx == last and not single else r
+        target = prefix + fmt % tuple(row)
+        if movetype == 'c':
+            lines.append(MOVEC.render(via_prefix + fmt % tuple(via_rows[idx]), target, a, v, blend))
+        elif movetype == 'p':
+            lines.append(MOVEP.render(target, a, v, blend))
+        else:
+            lines.append(MOVE.render(movetype, target, a, v, t, blend))
+    if not single:
+        lines.append(STOPL.render(a))
+    return lines
+
+
+def _row_format(length: int, precision: int, pose: bool) -> str:
+    return ('p' if pose else '') + vector_format(length, precision)
+
+
+def format_rows(array, precision: int = PRECISION, pose: bool = False, separator: str = ', ') -> str:
+    """Format every row of an (N, M) array in a single formatting call.
+
+    Example:
+    >>> format_rows(np.zeros((2, 3)), pose=True)
+    'p[0.0000, 0.0000, 0.0000], p[0.0000, 0.0000, 0.0000]'
+    """
+    array = np.atleast_2d(np.asarray(array, dtype=float))
+    row = _row_format(array.shape[1], precision, pose).replace('%%', '%%%%')
+    return (separator.join([row] * len(array))) % tuple(array.ravel().tolist())
+
+
+def move_block(movetype: str, targets, a: float = 1.2, v: float = 0.25, t: float = 0, r: float = 0,
+               pose: bool = True, vias=None, via_pose: bool = True, precision: int = PRECISION,
+               indent: str = '    ') -> str:
+    """Vectorized move_lines(): the same commands as one newline-terminated string.
+
+    The per-row command is compiled into one %-format string and the whole (N, 6) array
+    is formatted with a single % operation, so no Python work is done per waypoint.
+    """
+    targets = np.asarray(targets, dtype=float)
+    single = targets.ndim == 1
+    targets = np.atleast_2d(targets)
+    width = targets.shape[1]
+    target = _row_format(width, precision, pose)
+    if movetype == 'c':
+        if vias is None:
+            raise ValueError('movec needs via points')
+        vias = np.atleast_2d(np.asarray(vias, dtype=float))
+        if vias.shape != targets.shape:
+            raise ValueError('targets and via points must have the same shape')
+        values = np.hstack([vias, targets])
+        via = _row_format(width, precision, via_pose)
+        row = (MOVEC.format_string.replace('%%', '%%%%') % (via, target, a, v, '{r}'))
+    else:
+        values = targets
+        if movetype == 'p':
+            row = MOVEP.format_string.replace('%%', '%%%%') % (target, a, v, '{r}')
+        else:
+            row = MOVE.format_string.replace('%%', '%%%%') % (movetype, target, a, v, t, '{r}')
+    row = indent + row + '\n'
+    if single:
+        rows = row.format(r=r)
+    else:
+        rows = row.format(r=r) * (len(values) - 1) + row.format(r=0) + indent + STOPL.render(a) + '\n'
+    return rows % tuple(values.ravel().tolist())
+
+
+def waypoint_table_program(movetype: str, targets, a: float = 1.2, v: float = 0.25, r: float = 0,
+                           pose: bool = True, name: str = 'OpenUr', table_size: int = 500,
+                           precision: int = PRECISION) -> str:
+    """Program that stores the waypoints in list variables and loops over them.
+
+    Compared to one move line per waypoint, only the coordinates are repeated, which
+    makes large paths much smaller to send and to parse. Long paths are split into tables
+    of ``table_size`` waypoints. All moves blend with radius ``r`` except the last one.
+
+    Example:
+    >>> print(waypoint_table_program('l', [[0.1, 0, 0.3, 0, 3.14, 0], [0.2, 0, 0.3, 0, 3.14, 0]], r=0.001))
+    def OpenUr():
+      wp0 = [p[0.1000, 0.0000, 0.3000, 0.0000, 3.1400, 0.0000], p[0.2000, 0.0000, 0.3000, 0.0000, 3.1400, 0.0000]]
+      i = 0
+      while i < 1:
+        movel(wp0[i], a=1.2, v=0.25, r=0.001)
+        i = i + 1
+      end
+      movel(wp0[1], a=1.2, v=0.25, r=0)
+      stopl(1.2)
+    end
+
+    Args:
+        movetype (str): 'j', 'l' or 'p'.
+        targets: (N, 6) array of poses (or joint positions with pose=False).
+        table_size (int): maximum number of waypoints per list variable.
+    """
+    if movetype not in ('j', 'l', 'p'):
+        raise ValueError("waypoint tables support movej, movel and movep")
+    targets = np.atleast_2d(np.asarray(targets, dtype=float))
+    count = len(targets)
+    lines = ['def {}():'.format(name)]
+    for number, start in enumerate(range(0, count, table_size)):
+        table = targets[start:start + table_size]
+        variable = 'wp{}'.format(number)
+        last_table = start + table_size >= count
+        loop_count = len(table) - 1 if last_table else len(table)
+        lines.append('  {} = [{}]'.format(variable, format_rows(table, precision, pose)))
+        if loop_count:
+            lines += ['  i = 0',
+                      '  while i < {}:'.format(loop_count),
+                      '    move{}({}[i], a={}, v={}, r={})'.format(movetype, variable, a, v, r),
+                      '    i = i + 1',
+                      '  end']
+        if last_table:
+            lines.append('  move{}({}[{}], a={}, v={}, r=0)'.format(movetype, variable, len(table) - 1, a, v))
+    lines += ['  ' + STOPL.render(a), 'end', '']
+    return '\n'.join(lines)
+
+
+class ScriptBuilder:
+    """Collect URScript lines and assemble them into a program with one join.
+
+    Lines are indented automatically: a line ending with ':' or starting with 'def '
+    opens a block and 'end' closes it, like URClient.format_program().
+
+    Example:
+    >>> builder = ScriptBuilder('OpenUr')
+    >>> builder.add('while True:')
+    >>> builder.extend(move_lines('j', [0, -1.57, 1.57, 0, 0, 0], pose=False))
+    >>> builder.add('end')
+    >>> print(builder.build())
+    def OpenUr():
+      while True:
+        movej([0.0000, -1.5700, 1.5700, 0.0000, 0.0000, 0.0000], a=1.2, v=0.25, t=0, r=0)
+      end
+    end
+    """
+
+    def __init__(self, name: str = 'OpenUr', indent: int = 2):
+        self.name = name
+        self.indent = indent
+        self._lines: List[str] = []
+        self._level = 1
+
+    def __len__(self):
+        return len(self._lines)
+
+    def add(self, line: str) -> 'ScriptBuilder':
+        line = line.strip()
+        if line == 'end':
+            self._level -= 1
+        self._lines.append(' ' * (self.indent * self._level) + line)
+        if line.endswith(':') or line.startswith('def '):
+            self._level += 1
+        return self
+
+    def extend(self, lines: Iterable[str]) -> 'ScriptBuilder':
+        for line in lines:
+            self.add(line)
+        return self
+
+    def build(self, name: Optional[str] = None) -> str:
+        header = 'def {}():'.format(name or self.name)
+        return '\n'.join([header] + self._lines + ['end', ''])
+
+
+def format_script(commands: Iterable[str], name: str = 'OpenUr') -> str:
+    """Wrap commands in a program, each indented by two spaces."""
+    return '\n'.join(['def {}():'.format(name)] + ['  ' + command for command in commands] + ['end', ''])
+
+
+def format_program(commands: Iterable[str], name: str = 'OpenUr') -> str:
+    """Wrap commands in a program, indenting nested blocks."""
+    return ScriptBuilder(name).extend(commands).build()
@@ -30,6 +30,13 @@ import URBasic
 import numpy as np
 import time
 
+from openur.urscript.script_builder import (FORCE_MODE, SERVOC, SERVOJ, SPEEDJ, SPEEDL, STOPJ, STOPL,
+                                            format_vector, move_block)
+
+# servoj/speedj/speedl targets are streamed every controller cycle (8 ms or 2 ms), so the
+# step between two targets is often below 1e-4 rad or m/s; 4 decimals would quantize it.
+STREAMING_PRECISION = 6
+
 class UrScript(object):
     '''
     Interface to remote access UR script commands.
@@ -105,7 +112,7 @@ end
 '''
         movestr = self._move(movetype='j', pose=pose, a=a, v=v, t=t, r=r, wait=wait, q=q)
         
-        programString = prg.format(**locals())
+        programString = prg.format(movestr=movestr)
         
         self.robotConnector.RealTimeClient.SendProgram(programString)
         if(wait):
@@ -131,7 +138,7 @@ end
 '''
         movestr = self._move(movetype='l', pose=pose, a=a, v=v, t=t, r=r, wait=wait, q=q)
         
-        programString = prg.format(**locals())
+        programString = prg.format(movestr=movestr)
         
         self.robotConnector.RealTimeClient.SendProgram(programString)
         #time.sleep(0.5)
@@ -161,7 +168,7 @@ end
 end
 '''
         movestr = self._move(movetype='p', pose=pose, a=a, v=v, t=0, r=r, wait=wait, q=q)
-        programString = prg.format(**locals())
+        programString = prg.format(movestr=movestr)
         
         self.robotConnector.RealTimeClient.SendProgram(programString)
         if(wait):
@@ -188,13 +195,13 @@ end
         q_to:     list of target joint positions
         '''
 
-        prg =  '''def move_p():
+        prg =  '''def move_c():
 {movestr}
 end
 '''
-        movestr = self._move(movetype='p', pose=pose_to, a=a, v=v, t=0, r=r, wait=wait, q=q_to,pose_via=pose_via, q_via=q_via)
+        movestr = self._move(movetype='c', pose=pose_to, a=a, v=v, t=0, r=r, wait=wait, q=q_to,pose_via=pose_via, q_via=q_via)
         
-        programString = prg.format(**locals())
+        programString = prg.format(movestr=movestr)
         
         self.robotConnector.RealTimeClient.SendProgram(programString)
         if(wait):
@@ -219,56 +226,18 @@ end
         q:    list of target joint positions  
         '''
 
-        prefix="p"
-        t_val=''
-        pose_via_val=''
-        if pose is None:
-            prefix=""
-            pose=q
-        pose = np.array(pose)
-        if movetype == 'j' or movetype == 'l':
-            tval='t={t},'.format(**locals())
-        
-        if movetype =='c':
-            if pose_via is None:
-                prefix_via=""
-                pose_via=q_via
-            else:
-                prefix_via="p"
-            
-            pose_via = np.array(pose_via)
-            
-            #Check if pose and pose_via have same shape 
-            if (pose.shape != pose_via.shape):
-                return False
-        
-        movestr = ''
-        if np.size(pose.shape)==2:
-            for idx in range(np.size(pose, 0)):
-                posex = np.round(pose[idx], 4)
-                posex = posex.tolist()
-                if movetype =='c':
-                    pose_via_x = np.round(pose_via[idx], 4)
-                    pose_via_x = pose_via_x.tolist()
-                    pose_via_val='{prefix_via}{pose_via_x},'
-                    
-                if (np.size(pose, 0)-1)==idx:
-                    r=0
-                movestr +=  '    move{movetype}({pose_via_val} {prefix}{posex}, a={a}, v={v}, {t_val} r={r})\n'.format(**locals())
-                
-            movestr +=  '    stopl({a})\n'.format(**locals())
-        else:
-            posex = np.round(pose, 4)
-            posex = posex.tolist()
-            if movetype =='c':
-                pose_via_x = np.round(pose_via, 4)
-                pose_via_x = pose_via_x.tolist()
-                pose_via_val='{prefix_via}{pose_via_x},'
-            movestr +=  '    move{movetype}({pose_via_val} {prefix}{posex}, a={a}, v={v}, {t_val} r={r})\n'.format(**locals())
-            
-
-        
-        return movestr
+        is_pose = pose is not None
+        if not is_pose:
+            pose = q
+        via_is_pose = pose_via is not None
+        if movetype == 'c' and not via_is_pose:
+            pose_via = q_via
+        try:
+            return move_block(movetype, pose, a=a, v=v, t=t, r=r, pose=is_pose, vias=pose_via,
+                              via_pose=via_is_pose)
+        except ValueError:
+            # pose and pose_via do not have the same shape
+            return False
  
     def force_mode(self, task_frame=[0.,0.,0., 0.,0.,0.], selection_vector=[0,0,1,0,0,0], wrench=[0.,0.,0., 0.,0.,0.], f_type=2, limits=[2, 2, 1.5, 1, 1, 1], wait=False, timeout=60):
         '''
@@ -307,13 +276,13 @@ end
         '''
         prg = '''def ur_force_mode():
         while True:
-            force_mode(p{task_frame}, {selection_vector}, {wrench}, {f_type}, {limits})
+            {force_mode}
             sync()
         end
 end
 '''
-        
-        programString = prg.format(**locals())
+        force_mode = FORCE_MODE.render(format_vector(task_frame, pose=True), selection_vector, wrench, f_type, limits)
+        programString = prg.format(force_mode=force_mode)
         
         self.robotConnector.RealTimeClient.SendProgram(programString)
         if(wait):
@@ -343,9 +312,7 @@ end
         v:    tool speed [m/s]
         r:    blend radius (of target pose) [m]
         '''
-        prg = 'servoc(p{pose}, {a}, {v}, {r})\n'
-        
-        programString = prg.format(**locals())
+        programString = SERVOC.render(format_vector(pose, pose=True), a, v, r) + '\n'
         
         self.robotConnector.RealTimeClient.Send(programString)
         if(wait):
@@ -366,8 +333,7 @@ end
         lookahead_time: time [S], range [0.03,0.2] smoothens the trajectory with this lookahead time
         gain:           proportional gain for following target position, range [100,2000]
         '''
-        prg = 'servoj({q}, 0.5, 0.5, {t}, {lookahead_time}, {gain})\n'
-        programString = prg.format(**locals())
+        programString = SERVOJ.render(format_vector(q, precision=STREAMING_PRECISION), t, lookahead_time, gain) + '\n'
         
         self.robotConnector.RealTimeClient.Send(programString)
         if(wait):
@@ -385,8 +351,7 @@ end
         a:  joint acceleration [rad/s^2] (of leading axis)
         t:  time [s] before the function returns (optional)
         '''
-        prg = 'speedj({qd}, {a}, {t})\n'
-        programString = prg.format(**locals())
+        programString = SPEEDJ.render(format_vector(qd, precision=STREAMING_PRECISION), a, t) + '\n'
         
         self.robotConnector.RealTimeClient.Send(programString)
         if(wait):
@@ -399,8 +364,7 @@ end
         Parameters
         a: joint acceleration [rad/s^2] (of leading axis)
         '''
-        prg = 'stopj({a})\n'
-        programString = prg.format(**locals())
+        programString = STOPJ.render(a) + '\n'
         
         self.robotConnector.RealTimeClient.Send(programString)
         if(wait):
@@ -423,11 +387,11 @@ end
             aRot=a
         prg = '''def ur_speedl():
     while(True):
-        speedl({xd}, {a}, {t}, {aRot})
+        {speedl}
     end
 end
 '''
-        programString = prg.format(**locals())
+        programString = prg.format(speedl=SPEEDL.render(format_vector(xd, precision=STREAMING_PRECISION), a, t, aRot))
         
         self.robotConnector.RealTimeClient.SendProgram(programString)
 #         prg = 'speedl({xd}, {a}, {t}, {aRot})\n'
@@ -444,8 +408,7 @@ end
         Parameters:
         a:    tool accleration [m/s^2]
         '''
-        prg = 'stopl({a})\n'
-        programString = prg.format(**locals())
+        programString = STOPL.render(a) + '\n'
         
         self.robotConnector.RealTimeClient.Send(programString)
         if(wait):
@@ -12,53 +12,46 @@ import socket
 import time
 import logging
 import threading
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+from openur.connections.connection_manager import BackoffPolicy
+from openur.urscript import command_queue, script_builder
+from openur.urscript.interpreter import InterpreterSession
+from openur.urscript.query_server import QueryServer
 
 class URController:
-    def __init__(self, robot_ip, robot_port, pc_ip, pc_port):
+    """Evaluate URScript queries on the robot and read the results back over a reverse socket.
+
+    The replies are collected by one long-lived QueryServer, so queries from several
+    threads can be in flight at the same time.
+    """
+
+    def __init__(self, robot_ip, robot_port, pc_ip, pc_port, timeout=3.0):
         self.robot_ip = robot_ip
         self.robot_port = robot_port
         self.pc_ip = pc_ip
         self.pc_port = pc_port
+        self.lock = threading.Lock()
 
         self.command_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.command_sock.connect((self.robot_ip, self.robot_port))
 
-        self.response_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.response_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        self.response_sock.bind((self.pc_ip, self.pc_port))
-        self.response_sock.listen(1)
+        self.server = QueryServer(self.pc_ip, self.pc_port, self._send_command, timeout=timeout)
+        self.server.start()
 
     def _send_command(self, command):
-        self.command_sock.sendall(command.encode('utf-8'))
+        with self.lock:
+            self.command_sock.sendall(command.encode('utf-8'))
 
-    def _get_response(self):
-        self.response_sock.settimeout(3)
-        try:
-            connection, _ = self.response_sock.accept()
-            with connection:
-                data = connection.recv(1024).decode('utf-8')
-                return data.strip()
-        except socket.timeout:
-            logging.error("Timeout error: No response from robot")
-            return None
-        except Exception as e:  
-            logging.error(f"Error: {e}")
-            return None
-
-    # ... rest of your methods ...
     def execute_command_and_get_response(self, user_command):
-        script = (
-            f"sec OpenUr():\n"
-            f"  result = {user_command}()\n"
-            f"  textmsg(\"{user_command}:\", result)\n"
-            f"  socket_open(\"{self.pc_ip}\", {self.pc_port})\n"
-            f"  socket_send_string(result)\n"
-            f"  socket_close()\n"
-            f"end\n"
-        )
-        self._send_command(script)
-        return self._get_response()
+        return self.server.query(f"{user_command}()")
+
+    def query(self, expression, timeout=None, parse=True):
+        """Evaluate any URScript expression, e.g. 'read_input_integer_register(3)', parsed by default."""
+        return self.server.query(expression, timeout=timeout, parse=parse)
+
+    def query_batch(self, expressions, timeout=None, parse=True):
+        """Evaluate a list (or dict) of expressions with one program and one reply, see QueryServer.query_batch()."""
+        return self.server.query_batch(expressions, timeout=timeout, parse=parse)
 
     # Desired modular function
     @classmethod
@@ -68,13 +61,13 @@ class URController:
         return cls._instance.execute_command_and_get_response(command)
 
     def close(self):
+        self.server.close()
         self.command_sock.close()
-        self.response_sock.close()
         logging.info("Robot socket closed to PC at {} on port: {}".format(self.pc_ip, self.pc_port))
 
 class URClient:
 
-    def __init__(self, ip_address, port=30003, pc_ip = None, pc_port = None, max_retries=5):
+    def __init__(self, ip_address, port=30003, pc_ip = None, pc_port = None, max_retries=5, auto_connect=True):
         self.ip_address = ip_address
         self.port = port
         self.pc_ip = pc_ip
@@ -84,7 +77,11 @@ class URClient:
         self.max_retries = max_retries
         self.exit_flag = threading.Event()
         self.lock = threading.Lock()
-        self.connect()
+        self.queue = None
+        self._stop_sock = None
+        self.connect_hook = None   # set by ConnectionManager.add_client()
+        if auto_connect:
+            self.connect()
     
     @property
     def controller(self):
@@ -98,47 +95,53 @@ class URClient:
         self.pc_port = pc_port
         return self.controller.execute_command_and_get_response(command)
 
+    def query_batch(self, expressions, pc_ip=None, pc_port=None, timeout=None):
+        '''Read several values in one round trip instead of one desired_function() call each.
+
+        Example:
+        >>> client.query_batch(['get_actual_tcp_pose()', 'get_tcp_force()', 'read_input_integer_register(0)'],
+        ...                    pc_ip='192.168.1.100', pc_port=50000)
+        [array([...]), array([...]), 0]
+        '''
+        if pc_ip is not None:
+            self.pc_ip = pc_ip
+        if pc_port is not None:
+            self.pc_port = pc_port
+        return self.controller.query_batch(expressions, timeout=timeout)
+
+    def interpreter_session(self, **kwargs):
+        '''Interpreter-mode session that streams single statements without restarting the program.
+
+        See InterpreterSession; start() sends the interpreter program through this client.
+        '''
+        return InterpreterSession(self.ip_address, send_program=self.upload_program, **kwargs)
+
     @staticmethod
     def format_script(commands):
-        program = "def OpenUr():\n"
-        for command in commands:
-            program += f"  {command}\n"
-        program += "end\n"
-        return program
+        return script_builder.format_script(commands)
 
     @staticmethod
     def format_program(commands):
-        program = "def OpenUr():\n"
-        indentation = 2
-        for command in commands:
-            if command == "end":
-                indentation -= 2
-            program += ' ' * indentation + command.lstrip() + "\n"
-            if command.endswith(":") or command.lstrip().startswith("def "):
-                indentation += 2
-        program += "end\n"
-        return program
+        return script_builder.format_program(commands)
+
+    def connect_once(self):
+        """Make one connection attempt, raising on failure."""
+        with self.lock:
+            if self.sock:
+                self.sock.close()
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self.sock.settimeout(1.0)
+            self.sock.connect((self.ip_address, self.port))
+        logging.info(f"URClient connected to robot: {self.ip_address}:{self.port}")
 
     def connect(self):
-        retries = 0
-        while retries < self.max_retries and not self.exit_flag.is_set():
-            try:
-                with self.lock:
-                    if self.sock:
-                        self.sock.close()
-                    self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                    self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
-                    self.sock.settimeout(1.0)
-                    self.sock.connect((self.ip_address, self.port))
-                    logging.info(f"URClient connected to robot: {self.ip_address}:{self.port}")
-                break
-            except Exception as e:
-                logging.error(f"URClient connection error: {e}")
-                retries += 1
-                time.sleep(min(retries * 2, 30)) # Exponential backoff with a maximum wait time of 30s.
-                
-        if retries == self.max_retries:
+        if self.connect_hook is not None:
+            return self.connect_hook()
+        if not BackoffPolicy(max_attempts=self.max_retries).run(self.connect_once, f'{self.ip_address}:{self.port}', self.exit_flag):
             logging.error("URClient failed to connect after maximum retries.")
+            return False
+        return True
 
     def send_script(self, script):
         if not self.sock:
@@ -152,6 +155,7 @@ class URClient:
             self.connect() # Try to reconnect if sending fails
 
     def close(self):
+        self.stop_queue()
         with self.lock:
             if self.sock:
                 self.sock.close()
@@ -171,29 +175,113 @@ class URClient:
         if hasattr(self, 'sock') and self.sock:
             self.stop_script_connection()
 
-    def send_script(self, program):
+    def send_script(self, program, lane=command_queue.MOTION, key=None):
         '''Send a URScript program as a list of strings, preferably the single lines'''
-        if not self.sock:
-            raise ConnectionError("URClient not connected to robot")
         program_string = self.format_script(program)
-        self.sock.send(program_string.encode())
+        return self.upload_program(program_string, lane=lane, key=key)
 
     def send_raw_program(self, program):
         '''Send a URScript program as a list of strings'''
-        if not self.sock:
-            raise ConnectionError("URClient not connected to robot")
         program_string = self.format_program(program)
-        self.sock.send(program_string.encode())
+        return self.upload_program(program_string)
     
     def send_txt_program(self, filename):
         '''Send a URScript program from a text file'''
-        if not self.sock:
-            raise ConnectionError("Not connected to robot")
         with open(filename, 'r') as file:
             program = file.read()
         program_string = self.format_program(program.split('\n'))
-        self.sock.send(program_string.encode())
+        result = self.upload_program(program_string)
         time.sleep(0.1)
+        return result
+
+    def upload_program(self, program_string, chunk_size=65536, progress=None, lane=command_queue.MOTION, key=None):
+        '''Send a complete program string in chunks, so large programs are never truncated.
+
+        While the command queue runs (see start_queue()) the program is queued instead and
+        the future of the queued command is returned.
+
+        Args:
+            program_string (str): the program, e.g. from format_program() or waypoint_table_program().
+            chunk_size (int): bytes written per sendall() call.
+            progress (callable): called as progress(sent_bytes, total_bytes) after every chunk.
+            lane (str): command queue lane, 'stop', 'motion' or 'background'.
+            key: command queue coalescing key.
+        '''
+        if self.queue is not None and self.queue.is_running():
+            return self.queue.submit(program_string, lane=lane, key=key, progress=progress, chunk_size=chunk_size)
+        if not self.sock:
+            raise ConnectionError("URClient not connected to robot")
+        data = memoryview(program_string.encode('utf-8'))
+        total = len(data)
+        with self.lock:
+            for start in range(0, total, chunk_size):
+                self.sock.sendall(data[start:start + chunk_size])
+                if progress is not None:
+                    progress(min(start + chunk_size, total), total)
+        logging.info(f"URClient uploaded a {total} byte program to {self.ip_address}:{self.port}")
+        return total
+
+    def send_path(self, waypoints, movetype='l', a=1.2, v=0.25, r=0, pose=True, table=True, progress=None, **kwargs):
+        '''Send an (N, 6) array of waypoints as one program.
+
+        With table=True the waypoints are sent as list variables and executed in a loop
+        (see script_builder.waypoint_table_program), otherwise as one move line per waypoint.
+        Both are formatted in one vectorized pass.
+
+        Example:
+        >>> client.send_path(np.load('bead.npy'), movetype='l', v=0.05, r=0.0005,
+        ...                  progress=lambda sent, total: print(f"{sent}/{total} bytes"))
+
+        Args:
+            waypoints: (N, 6) array of poses, or joint positions with pose=False.
+            movetype (str): 'j', 'l' or 'p'.
+            progress (callable): called as progress(sent_bytes, total_bytes) during the upload.
+            kwargs: passed on to upload_program(), e.g. chunk_size.
+        '''
+        if table:
+            program_string = script_builder.waypoint_table_program(movetype, waypoints, a=a, v=v, r=r, pose=pose)
+        else:
+            program_string = 'def OpenUr():\n{}end\n'.format(
+                script_builder.move_block(movetype, waypoints, a=a, v=v, r=r, pose=pose, indent='  '))
+        return self.upload_program(program_string, progress=progress, **kwargs)
+
+    def start_queue(self, stop_port=None):
+        '''Route all scripts through a prioritized ScriptCommandQueue with stop, motion and background lanes.
+
+        Stops (stop_command, stopj, stopl) are sent before queued motion programs and drop
+        them, repeated set_digital_out() calls on the same pin are coalesced. With
+        stop_port (e.g. 30002 next to 30003) stops use a second connection and are written
+        immediately, even while a large program is being uploaded.
+
+        Example:
+        >>> client.start_queue(stop_port=30002)
+        >>> client.send_path(waypoints)
+        >>> client.stopl(2.0).result(timeout=1)  # seconds spent in the queue
+        >>> client.queue.stats()
+        '''
+        stop_send = None
+        if stop_port is not None:
+            self._stop_sock = socket.create_connection((self.ip_address, stop_port), timeout=1.0)
+            self._stop_sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            stop_send = self._stop_sock.sendall
+        self.queue = command_queue.ScriptCommandQueue(self._write, stop_send)
+        self.queue.start()
+        return self.queue
+
+    def stop_queue(self):
+        '''Send what is still queued and write directly to the socket again.'''
+        if self.queue is not None:
+            self.queue.stop()
+            self.queue = None
+        if self._stop_sock is not None:
+            self._stop_sock.close()
+            self._stop_sock = None
+
+    def _write(self, data):
+        with self.lock:
+            if not self.sock:
+                raise ConnectionError("URClient not connected to robot")
+            self.sock.sendall(data)
     
 
     # Module Internals URScript commands:
@@ -252,23 +340,23 @@ class URClient:
         wrench_str = ",".join(map(str, wrench))
         limits_str = ",".join(map(str, limits))
         command = f"force_mode(p[{task_frame_str}], [{selection_vector_str}], [{wrench_str}], {f_type}, [{limits_str}])"
-        self.send_script([command])
+        return self.send_script([command])
     
     def end_force_mode(self):
         command = f"end_force_mode()"
-        self.send_script([command])
+        return self.send_script([command])
 
 
 
 
     # Frequentlsy used URScript commands
     def stop_command(self):
-        self.send_script(stop_command)
+        return self.send_script(stop_command, lane=command_queue.STOP)
 
     def set_digital_out(self, pin, value:bool):
         if value in [True, False]:
             command = f"set_digital_out({pin}, {value})"
-            self.send_script([command])
+            return self.send_script([command], lane=command_queue.BACKGROUND, key=('set_digital_out', pin))
         else:
             raise ValueError('Value shall be either True or False')
 
@@ -281,7 +369,7 @@ class URClient:
             raise ValueError("joints must be a list of 6 integers or floats")
         
         command = f"movej({joints}, a={a}, v={v}, t={t}, r={r})"
-        self.send_script([command])
+        return self.send_script([command])
     
     def movel(self, pose, a=1.2, v=0.25, t=0, r=0):
         if not (
@@ -291,55 +379,55 @@ class URClient:
         ):
             raise ValueError("pose must be a list of 6 integers or floats")
         command = f"movel({pose}, a={a}, v={v}, t={t}, r={r})"
-        self.send_script([command])
+        return self.send_script([command])
     
     def movep(self, pose, a=1.2, v=0.25, t=0, r=0):
         command = f"movep({pose}, a={a}, v={v}, t={t}, r={r})"
-        self.send_script([command])
+        return self.send_script([command])
     
     def movec(self, pose_via, pose_to, a=1.2, v=0.25, r=0):
         command = f"movec({pose_via}, {pose_to}, a={a}, v={v}, r={r})"
-        self.send_script([command])
+        return self.send_script([command])
     
     def stopj(self, a=1):
         command = f"stopj({a})"
-        self.send_script([command])
+        return self.send_script([command], lane=command_queue.STOP)
     
     def stopl(self, a=1):
         command = f"stopl({a})"
-        self.send_script([command])
+        return self.send_script([command], lane=command_queue.STOP)
     
     def sleep(self, t):
         command = f"sleep({t})"
-        self.send_script([command])
+        return self.send_script([command])
     
     def set_tcp(self, pose):
         command = f"set_tcp(p{pose})"
-        self.send_script([command])
+        return self.send_script([command])
     
     def end_freedrive_mode(self):
         command = f"end_freedrive_mode()"
-        self.send_script([command])
+        return self.send_script([command])
     
     def end_screw_driving(self):
         command = f"end_screw_driving()"
-        self.send_script([command])
+        return self.send_script([command])
     
     def end_teach_mode(self):
         command = f"end_teach_mode"
-        self.send_script([command])
+        return self.send_script([command])
     
     def force_mode_set_damping(self, damping):
         if 0 <= damping <= 1:
             command = f"force_mode_set_damping({damping})"
-            self.send_script([command])
+            return self.send_script([command])
         else:
             raise ValueError('Damping value should be between 0 and 1 inclusive.')
     
     def force_mode_set_gain_scaling(self, scaling=1):
         if 0 <= scaling <= 2:
             command = f"force_mode_set_gain_scaling({scaling})"
-            self.send_script([command])
+            return self.send_script([command])
         else:
             raise ValueError('Scaling value should be between 1 and 2 inclusive')
     
@@ -372,7 +460,7 @@ class URClient:
         feature_str = ",".join(map(str,feature))
         command = f"freedrive_mode([{freeAxes_str}], p[{feature_str}])"
         print(command)
-        self.send_script(command)
+        return self.send_script(command)
 
                     
 